@@ -0,0 +1,74 @@
+"""
+Benchmark: loading the two Excel workbooks.
+
+For each workbook, compares
+- pd.read_excel on every sheet (what load_population_raw does, for one sheet),
+- a cold parse with the read-only openpyxl loader (use_cache=False),
+- the disk cache (.npz) with an empty in-process memo (a fresh run),
+- the in-process memo (repeated loads in the same run).
+
+Run from the project root:
+    python -m benchmarks.bench_excel
+
+The benchmark uses a temporary cache folder, so data/cache/ is not touched.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+
+from src.cache import clear_cache
+from src.data_loader import RAW_DATA_DIR, load_remigration, load_resident_demog
+
+WORKBOOKS = {
+    "permanent_resident_demog.xlsx": load_resident_demog,
+    "remigration.xlsx": load_remigration,
+}
+
+
+def best_of(func, repeats: int = 5, setup=None) -> float:
+    """Best wall time in ms; setup() runs untimed before each repeat."""
+    best = float("inf")
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def run(repeats: int = 5) -> pd.DataFrame:
+    rows = []
+    for name, loader in WORKBOOKS.items():
+        path = RAW_DATA_DIR / name
+
+        def read_excel_all():
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                pd.read_excel(path, sheet_name=None, header=None)
+
+        loader(use_cache=True)  # make sure the .npz exists
+
+        cases = {
+            "pd.read_excel (all sheets)": (read_excel_all, None),
+            "openpyxl read-only (cold)": (lambda: loader(use_cache=False), None),
+            "disk cache (.npz)": (loader, lambda: clear_cache(memory=True, disk=False)),
+            "memory cache": (loader, None),
+        }
+        for label, (func, setup) in cases.items():
+            ms = best_of(func, repeats=repeats, setup=setup)
+            rows.append({"workbook": name, "path": label, "time_ms": ms})
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["POPGROWTH_CACHE_DIR"] = tmp
+        df = run()
+    print(df.to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
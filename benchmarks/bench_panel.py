@@ -0,0 +1,76 @@
+"""
+Benchmark: fitting the linear / AR model on many series.
+
+For synthetic panels of 10, 100, 1000 and 5000 series (165 years each),
+compares
+- a loop of sklearn LinearRegression fits, one per series, on the same
+  designs (what fitting fit_linear_model / fit_ar_model per series costs),
+- src.panel.fit_panel (one stacked least-squares solve for all series),
+and checks that both give the same test RMSE.
+
+Run from the project root:
+    python -m benchmarks.bench_panel
+"""
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from src.panel import fit_panel, panel_design, synthetic_panel
+
+N_SERIES = (10, 100, 1000, 5000)
+TEST_START_YEAR = 2000
+
+
+def best_of(func, repeats: int = 3) -> float:
+    """Best wall time in ms."""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def sklearn_loop(values: np.ndarray, years: np.ndarray, model: str, n_lags: int) -> np.ndarray:
+    """Test RMSE of every series, one LinearRegression per series."""
+    X, y, start = panel_design(values, model, n_lags)
+    train = years[start:-1] < TEST_START_YEAR
+    out = np.empty(len(values))
+    for s in range(len(values)):
+        scale = X[s, train].std(axis=0)
+        reg = LinearRegression().fit(X[s, train] / scale, y[s, train])
+        pred = reg.predict(X[s, ~train] / scale)
+        out[s] = np.sqrt(np.mean((y[s, ~train] - pred) ** 2))
+    return out
+
+
+def run(n_lags: int = 2) -> pd.DataFrame:
+    rows = []
+    for n in N_SERIES:
+        years, values = synthetic_panel(n)
+        for model in ("linear", "ar"):
+            loop = sklearn_loop(values, years, model, n_lags)
+            panel = fit_panel(values, years, model, n_lags, TEST_START_YEAR).metrics["test_rmse"]
+            max_rel_diff = float(np.max(np.abs(loop - panel) / loop))
+
+            repeats = 1 if n >= 1000 else 3
+            loop_ms = best_of(lambda: sklearn_loop(values, years, model, n_lags), repeats)
+            panel_ms = best_of(lambda: fit_panel(values, years, model, n_lags, TEST_START_YEAR))
+            rows.append({
+                "n_series": n,
+                "model": model,
+                "sklearn_loop_ms": loop_ms,
+                "fit_panel_ms": panel_ms,
+                "speedup": loop_ms / panel_ms,
+                "max_rel_rmse_diff": max_rel_diff,
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    df = run()
+    print(df.to_string(index=False, float_format=lambda x: f"{x:,.3g}"))
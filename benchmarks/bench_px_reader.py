@@ -0,0 +1,71 @@
+"""
+Benchmark: in-project PX reader (src.data_loader.read_px) vs pyaxis.
+
+Measures wall time (best of N runs) and peak Python memory (tracemalloc)
+for the three PX files shipped in data/raw.
+
+Run from the project root:
+    python -m benchmarks.bench_px_reader
+
+pyaxis is no longer a project dependency; install it to get the comparison
+column (pip install pyaxis), otherwise only read_px is measured.
+"""
+from __future__ import annotations
+
+import time
+import tracemalloc
+
+import pandas as pd
+
+from src.data_loader import RAW_DATA_DIR, read_px
+
+PX_FILES = ["Pop_sex_age.px", "Briths_monthly.px", "deaths_monthly.px"]
+
+
+def measure(func, repeats: int = 5) -> tuple[float, float]:
+    """Return (best wall time in ms, peak traced memory in MB)."""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1e6
+
+
+def run(repeats: int = 5) -> pd.DataFrame:
+    try:
+        from pyaxis import pyaxis
+    except ImportError:
+        pyaxis = None
+
+    rows = []
+    for name in PX_FILES:
+        path = RAW_DATA_DIR / name
+
+        cases = {
+            "read_px (array)": lambda: read_px(path),
+            "read_px (long frame)": lambda: read_px(path).to_frame(),
+        }
+        if name == "Pop_sex_age.px":
+            # Typical use: one sex/age slice only
+            cases["read_px (total slice)"] = lambda: read_px(
+                path, select={"Geschlecht": ["Geschlecht - Total"], "Alter": ["Alter - Total"]}
+            )
+        if pyaxis is not None:
+            cases["pyaxis.parse"] = lambda: pyaxis.parse(str(path), encoding="latin-1")
+
+        for label, func in cases.items():
+            ms, mb = measure(func, repeats=repeats)
+            rows.append({"file": name, "reader": label, "time_ms": ms, "peak_mem_mb": mb})
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    df = run()
+    print(df.to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
@@ -0,0 +1,112 @@
+"""
+Check: out-of-core fitting of a panel larger than the memory ceiling.
+
+For every memory limit of the sweep (default: 2, 4, 16 and 64 MB), writes
+a synthetic memory-mapped panel `--factor` times larger than the limit
+(at 64 MB: ~390_000 series x 165 years = 512 MB on disk), fits the linear
+and AR models block by block, and checks that
+
+- the peak of Python/NumPy allocations (tracemalloc) made while writing
+  and while fitting stays under the limit,
+- the results of the first series equal an in-memory src.panel.fit_panel,
+- a limit below the fixed cost of one block is refused (MemoryError).
+
+Peaks are counted above the memory already held when each step starts.
+Memory-mapped pages are file-backed and managed by the OS, so they are not
+part of the allocation peak. Exits with status 1 if a check fails.
+
+Run from the project root:
+    python -m benchmarks.check_out_of_core [--limits 2,4,16,64] [--factor 8]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from src.out_of_core import MemmapPanel, block_size, fit_panel_chunked, write_synthetic_panel
+from src.panel import fit_panel
+
+N_YEARS = 165
+N_COMPARED = 200
+
+
+def peak_above_start(func):
+    """(func(), peak MB allocated by func above what was held when it started)."""
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    out = func()
+    return out, (tracemalloc.get_traced_memory()[1] - start) / 1e6
+
+
+def check_limit(tmp: Path, limit_mb: float, factor: float) -> bool:
+    n_series = int(factor * limit_mb * 1e6 // (N_YEARS * 8))
+    ok = True
+
+    t0 = time.perf_counter()
+    panel, peak_mb = peak_above_start(
+        lambda: write_synthetic_panel(tmp / "panel", n_series, n_years=N_YEARS, limit_mb=limit_mb)
+    )
+    within = peak_mb <= limit_mb
+    ok &= within
+    print(f"limit {limit_mb:>5g} MB  panel {panel.n_series:,} series = {panel.values.nbytes / 1e6:,.0f} MB "
+          f"on disk, written in {time.perf_counter() - t0:.1f} s, "
+          f"peak allocations {peak_mb:,.2f} MB ({'ok' if within else 'OVER LIMIT'})")
+
+    for model in ("ar", "linear"):
+        t0 = time.perf_counter()
+        fit, peak_mb = peak_above_start(
+            lambda: fit_panel_chunked(panel, tmp / f"fit_{model}", model=model, limit_mb=limit_mb)
+        )
+        elapsed = time.perf_counter() - t0
+        within = peak_mb <= limit_mb
+
+        # Same numbers as the in-memory fit on the first series
+        first = np.array(MemmapPanel.open(panel.path).values[:N_COMPARED])
+        ref = fit_panel(first, panel.years, model=model).metrics["test_rmse"].to_numpy()
+        same = np.allclose(fit.test_rmse[:N_COMPARED], ref, rtol=1e-10, equal_nan=True)
+        del first, ref
+
+        ok &= within and same
+        print(f"  {model:<7} blocks of {fit.block_size:,} series, {elapsed:.1f} s, "
+              f"peak allocations {peak_mb:,.2f} MB ({'ok' if within else 'OVER LIMIT'}), "
+              f"matches in-memory fit: {same}")
+    return ok
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Out-of-core panel fitting check")
+    parser.add_argument("--limits", default="2,4,16,64",
+                        help="comma-separated memory limits in MB")
+    parser.add_argument("--factor", type=float, default=8.0,
+                        help="panel size on disk as a multiple of the limit")
+    args = parser.parse_args(argv)
+    limits = [float(x) for x in args.limits.split(",")]
+
+    ok = True
+    tracemalloc.start()
+    for limit_mb in limits:
+        with tempfile.TemporaryDirectory() as tmp:
+            ok &= check_limit(Path(tmp), limit_mb, args.factor)
+    tracemalloc.stop()
+
+    # A limit that cannot hold the fixed cost of a block must be refused
+    try:
+        block_size(N_YEARS, 4, limit_mb=0.1)
+        refused = False
+    except MemoryError:
+        refused = True
+    ok &= refused
+    print(f"limit 0.1 MB refused: {refused}")
+
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
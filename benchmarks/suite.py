@@ -0,0 +1,332 @@
+"""
+Benchmark suite for the hot paths of the project.
+
+Cases (wall time, best of N, and peak traced memory of one extra call):
+
+- load:     load_population_timeseries, cold (empty cache, PX file parsed)
+            and warm (in-process memo)
+- features: build_ml_table for several n_lags
+- fit:      every registered model (src.registry), via run_model
+- plot:     figure_specs + rendering of each plot module (what its main does),
+            written to a temporary folder so results/figures is untouched
+- import:   fresh interpreters: `python -X importtime -c "import <module>"`
+            (total import time, and whether sklearn/matplotlib got loaded),
+            and the cold start of `main.py --table-only` with a warm
+            pipeline cache, checked against COLD_START_TARGET_S
+
+Features and fits run on the real series and on fixed-seed synthetic
+series of 150, 10_000 and 1_000_000 years (--quick stops at 10_000). The
+component model needs the births/deaths files, so it only runs on the real
+series.
+
+Results are written as JSON (default: results/benchmarks/bench-<time>.json);
+--compare prints the time ratio against an earlier JSON file. The cache
+is pointed at a temporary folder while the suite runs.
+
+Run from the project root:
+    python -m benchmarks.suite [--quick] [--filter import] [--out FILE] [--compare OLD.json]
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+OUT_DIR = BASE_DIR / "results" / "benchmarks"
+
+SYNTHETIC_LENGTHS = (150, 10_000, 1_000_000)
+N_LAGS_VALUES = (1, 2, 5, 10)
+
+IMPORT_MODULES = ("src.data_loader", "src.registry", "src.stages", "src.models_linear", "src.rendering")
+HEAVY_MODULES = ("sklearn", "matplotlib")
+COLD_START_TARGET_S = 1.0  # main.py --table-only, everything cached
+
+
+def synthetic_series(n_years: int, seed: int = 0) -> pd.DataFrame:
+    """Population-like series: trend + noisy yearly increments (fixed seed)."""
+    rng = np.random.default_rng(seed)
+    increments = rng.normal(30_000, 20_000, size=n_years)
+    return pd.DataFrame({
+        "year": 1860 + np.arange(n_years),
+        "population_total": (2_500_000 + np.cumsum(increments)).round().astype(np.int64),
+    })
+
+
+def measure(func: Callable, repeats: int = 5, setup: Callable | None = None) -> dict:
+    """
+    Best and mean wall time (ms) over `repeats` calls, plus peak traced memory (MB).
+    If func returns a dict (last call), its entries are added to the result.
+    """
+    times = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    extra = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "time_ms": min(times) * 1000,
+        "mean_ms": float(np.mean(times)) * 1000,
+        "repeats": repeats,
+        "peak_mem_mb": peak / 1e6,
+        **(extra if isinstance(extra, dict) else {}),
+    }
+
+
+def _repeats(n_years: int) -> int:
+    return 5 if n_years <= 10_000 else 2
+
+
+# ---------------------------------------------------------------------------
+# Cases: each yields (name, params, func, repeats, setup)
+# ---------------------------------------------------------------------------
+
+def load_cases():
+    from src.cache import clear_cache
+    from src.data_loader import load_population_timeseries
+
+    def cold():
+        clear_cache(memory=True, disk=True)
+
+    yield "load_population_timeseries", {"cache": "cold"}, load_population_timeseries, 3, cold
+    load_population_timeseries()
+    yield "load_population_timeseries", {"cache": "warm"}, load_population_timeseries, 20, None
+
+
+def feature_cases(series: list[tuple[str, pd.DataFrame]]):
+    from src.features import build_ml_table
+
+    for data, ts in series:
+        for n_lags in N_LAGS_VALUES:
+            yield (
+                "build_ml_table", {"data": data, "n_years": len(ts), "n_lags": n_lags},
+                lambda ts=ts, n_lags=n_lags: build_ml_table(ts, n_lags=n_lags),
+                _repeats(len(ts)), None,
+            )
+
+
+def fit_cases(series: list[tuple[str, pd.DataFrame]]):
+    from src.registry import available_models, run_model
+
+    for data, ts in series:
+        test_start_year = int(ts["year"].iloc[int(len(ts) * 0.85)])
+        for key in available_models():
+            if key == "components" and data != "real":
+                continue
+            yield (
+                "fit", {"data": data, "n_years": len(ts), "model": key},
+                lambda ts=ts, key=key, y=test_start_year: run_model(key, ts, test_start_year=y),
+                _repeats(len(ts)), None,
+            )
+
+
+def plot_cases(out_dir: Path):
+    from src.compare_models import fit_all_models
+    from src import plots_ar, plots_baseline, plots_fan, plots_linear
+    from src.rendering import render_figures
+
+    fits = fit_all_models(executor="serial")
+
+    builders = {
+        "plots_baseline": lambda: plots_baseline.figure_specs(fits["ts"]),
+        "plots_linear": lambda: plots_linear.figure_specs(fits["linear"]),
+        "plots_ar": lambda: plots_ar.figure_specs(fits["ar"], test_start_year=2000, n_lags=2),
+        "plots_fan": lambda: plots_fan.figure_specs(fits["ts"], linear=fits["linear"], ar=fits["ar"]),
+    }
+    for module, build in builders.items():
+        def run(build=build):
+            specs = [
+                dataclasses.replace(s, out_path=out_dir / Path(s.out_path).name) for s in build()
+            ]
+            render_figures(specs, max_workers=1, force=True)
+        yield "plot", {"module": module}, run, 3, None
+
+
+def import_time(module: str) -> dict:
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+    Returns the total import time (ms, sum of the top-level entries) and
+    which of HEAVY_MODULES were loaded.
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    loaded = set()
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        if not name.startswith("  "):  # top-level import
+            total_us += int(cumulative)
+        loaded.add(name.strip().split(".")[0])
+    return {
+        "import_ms": total_us / 1000,
+        **{f"loads_{m}": m in loaded for m in HEAVY_MODULES},
+    }
+
+
+def import_cases(tmp: Path):
+    for module in IMPORT_MODULES:
+        yield "import", {"module": module}, lambda module=module: import_time(module), 3, None
+
+    # The table-only run writes results/tables/model_comparison.csv; run it
+    # on a copy of the project files so the committed table is untouched
+    project = tmp / "project"
+    shutil.copytree(BASE_DIR / "src", project / "src", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copytree(BASE_DIR / "data" / "raw", project / "data" / "raw")
+    shutil.copy(BASE_DIR / "main.py", project / "main.py")
+    cache_dir = tmp / "cold_start_cache"
+
+    def run() -> dict:
+        env = {**os.environ, "POPGROWTH_CACHE_DIR": str(cache_dir), "POPGROWTH_LOG_LEVEL": "WARNING"}
+        subprocess.run(
+            [sys.executable, "main.py", "--table-only"],
+            cwd=project, env=env, capture_output=True, check=True,
+        )
+        return {"target_s": COLD_START_TARGET_S}
+
+    run()  # fill the pipeline cache
+    yield "cold_start", {"command": "main.py --table-only", "cache": "warm"}, run, 3, None
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(quick: bool = False, name_filter: str | None = None) -> dict:
+    from src.data_loader import load_population_timeseries
+
+    lengths = [n for n in SYNTHETIC_LENGTHS if not quick or n <= 10_000]
+    series = [("real", load_population_timeseries())]
+    series += [("synthetic", synthetic_series(n)) for n in lengths]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Cold loads clear the cache: point it at a scratch folder
+        old_cache_dir = os.environ.get("POPGROWTH_CACHE_DIR")
+        os.environ["POPGROWTH_CACHE_DIR"] = str(Path(tmp) / "cache")
+        groups = {
+            "load_population_timeseries": load_cases,
+            "build_ml_table": lambda: feature_cases(series),
+            "fit": lambda: fit_cases(series),
+            "plot": lambda: plot_cases(Path(tmp) / "figures"),
+            "import": lambda: import_cases(Path(tmp)),
+        }
+        try:
+            for group, cases in groups.items():
+                if name_filter and name_filter not in group:
+                    continue
+                for name, params, func, repeats, setup in cases():
+                    stats = measure(func, repeats=repeats, setup=setup)
+                    if "target_s" in stats:
+                        stats["meets_target"] = stats["time_ms"] / 1000 <= stats["target_s"]
+                    results.append({"name": name, "params": params, **stats})
+                    label = ", ".join(f"{k}={v}" for k, v in params.items())
+                    line = f"{name:<28} {label:<48} {stats['time_ms']:>10.2f} ms {stats['peak_mem_mb']:>9.2f} MB"
+                    if "import_ms" in stats:
+                        heavy = [m for m in HEAVY_MODULES if stats[f"loads_{m}"]]
+                        line += f"  imports {stats['import_ms']:.0f} ms, loads {', '.join(heavy) or '-'}"
+                    if "target_s" in stats:
+                        line += f"  target {stats['target_s']:.1f} s: {'ok' if stats['meets_target'] else 'MISSED'}"
+                    print(line)
+        finally:
+            if old_cache_dir is None:
+                os.environ.pop("POPGROWTH_CACHE_DIR", None)
+            else:
+                os.environ["POPGROWTH_CACHE_DIR"] = old_cache_dir
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def _case_id(row: dict) -> str:
+    return row["name"] + "|" + json.dumps(row["params"], sort_keys=True)
+
+
+def compare(new: dict, old: dict) -> pd.DataFrame:
+    """Time ratio new / old for the cases present in both runs."""
+    old_rows = {_case_id(r): r for r in old["results"]}
+    rows = []
+    for r in new["results"]:
+        o = old_rows.get(_case_id(r))
+        if o is not None:
+            rows.append({
+                "case": _case_id(r),
+                "old_ms": o["time_ms"],
+                "new_ms": r["time_ms"],
+                "ratio": r["time_ms"] / o["time_ms"],
+            })
+    return pd.DataFrame(rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Population growth benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="skip the 1M-year synthetic series")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--out", type=Path, help="JSON output file")
+    parser.add_argument("--compare", type=Path, help="earlier JSON run to compare against")
+    args = parser.parse_args(argv)
+
+    report = run_suite(quick=args.quick, name_filter=args.filter)
+
+    out = args.out or OUT_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved benchmark results → {out}")
+
+    if args.compare is not None:
+        diff = compare(report, json.loads(args.compare.read_text()))
+        print(f"\nComparison with {args.compare}:\n")
+        print(diff.to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
 
 import pandas as pd
@@ -10,75 +11,99 @@ def ensure_results_folders() -> dict[str, Path]:
     results = root / "results"
     figures = results / "figures"
     tables = results / "tables"
+    reports = results / "reports"
 
     figures.mkdir(parents=True, exist_ok=True)
     tables.mkdir(parents=True, exist_ok=True)
 
-    return {"root": root, "results": results, "figures": figures, "tables": tables}
+    return {"root": root, "results": results, "figures": figures, "tables": tables, "reports": reports}
 
 
-def run_model_comparison(test_start_year: int = 2000) -> pd.DataFrame:
-    # Comparison pipeline
-    from src.compare_models import compare_all_models
+def save_comparison_table(df: pd.DataFrame, forecasts: pd.DataFrame, params: dict | None = None) -> None:
+    """Append the comparison table and the forecasts of this run to the run store (src.run_store)."""
+    from src import run_store
 
-    df = compare_all_models(test_start_year=test_start_year)
-    return df
+    run_store.append("comparison", df, params=params)
+    run_store.append("forecasts", forecasts, params=params)
+    print(f"\nRun {run_store.current_run_id()} recorded in the run store ({run_store.store_dir()})")
 
 
-def save_comparison_table(df: pd.DataFrame, out_path: Path) -> None:
-    df.to_csv(out_path, index=False)
-    print(f" Saved model comparison table → {out_path}")
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Population growth: model comparison pipeline",
+        epilog="Every run (except --dry-run) appends its comparison table and forecasts to the "
+               "run store in results/runs, also when all stages come from the cache: those runs "
+               "are stored with param_recomputed=False and the fit timings of the cached fits.",
+    )
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only show which stages would run")
+    parser.add_argument("--force", action="store_true",
+                        help="rerun every stage, ignoring cached outputs")
+    parser.add_argument("--test-start-year", type=int, default=2000)
+    parser.add_argument("--n-lags", type=int, default=2)
+    parser.add_argument("--table-only", action="store_true",
+                        help="stop after the model comparison table (no figures)")
+    return parser.parse_args(argv)
 
 
-def run_plots(test_start_year: int = 2000, n_lags: int = 2) -> None:
-    """
-    Tries to run plot scripts if they exist.
-    If a plot module is missing, it will just skip it (no crash).
-    """
-    # Baseline plot
-    try:
-        from src.plots_baseline import main as baseline_plots_main
-
-        baseline_plots_main(test_start_year=test_start_year)
-        print("Baseline plots generated.")
-    except Exception as e:
-        print(f"⚠️ Skipped baseline plots (src.plots_baseline). Reason: {e}")
-
-    # Linear regression plots
-    try:
-        from src.plots_linear import main as linear_plot_main
-
-        linear_plot_main(test_start_year=test_start_year, n_lags=n_lags)
-        print("Linear regression plots generated.")
-    except Exception as e:
-        print(f"⚠️ Skipped linear plots (src.plots_linear). Reason: {e}")
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    paths = ensure_results_folders()
 
-    # AR plots
-    try:
-        from src.plots_ar import main as ar_plot_main
+    # Diagnostics are logged (POPGROWTH_LOG_LEVEL), stages are timed into a
+    # run report; POPGROWTH_PROFILE=cprofile,tracemalloc adds profiling
+    from src import instrumentation
 
-        ar_plot_main(test_start_year=test_start_year, n_lags=n_lags)
-        print("AR plots generated.")
-    except Exception as e:
-        print(f"⚠️ Skipped AR plots (src.plots_ar). Reason: {e}")
+    instrumentation.configure_logging()
+    instrumentation.enable()
+    with instrumentation.profiling(out_dir=paths["reports"]):
+        run_pipeline(args, paths)
+    if not args.dry_run:
+        instrumentation.write_run_report(paths["reports"] / "run_report.json")
 
 
-def main() -> None:
-    paths = ensure_results_folders()
-
+def run_pipeline(args: argparse.Namespace, paths: dict[str, Path]) -> None:
     print("\n=== Population Growth Project: Running main pipeline ===\n")
 
-    # 1) Compare models
-    df = run_model_comparison(test_start_year=2000)
-    print("\nModel comparison table:\n")
-    print(df)
+    # Stages: raw load -> time series -> ML table -> fits -> table -> figures.
+    # Only stages whose inputs or code changed since the last run are executed.
+    from src.pipeline import print_report
+    from src.stages import build_pipeline
+
+    pipeline = build_pipeline(
+        tables_dir=paths["tables"],
+        test_start_year=args.test_start_year,
+        n_lags=args.n_lags,
+        figures=not args.table_only,
+    )
+    report = pipeline.run(dry_run=args.dry_run, force=args.force)
+    print_report(report, dry_run=args.dry_run)
+    if args.dry_run:
+        return
 
-    # 2) Save table
     out_csv = paths["tables"] / "model_comparison.csv"
-    save_comparison_table(df, out_csv)
-
-    # 3) Plots 
-    run_plots(test_start_year=2000, n_lags=2)
+    print("\nModel comparison table:\n")
+    print(pd.read_csv(out_csv))
+
+    # Every invocation is recorded, including fully cached ones
+    save_comparison_table(
+        pipeline.output("table"),
+        pipeline.output("forecasts"),
+        params={
+            "test_start_year": args.test_start_year,
+            "n_lags": args.n_lags,
+            "recomputed": report["table"]["status"] == "run",
+        },
+    )
+
+    # Raw data cache usage (the .px file should only be parsed once per run)
+    from src.cache import cache_stats
+
+    stats = cache_stats()
+    print(
+        f"\nData cache: {stats['memory_hits']} memory hits, "
+        f"{stats['disk_hits']} disk hits, {stats['misses']} misses"
+    )
 
     print("\n=== Done. Check results/figures and results/tables ===\n")
 
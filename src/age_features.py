@@ -0,0 +1,137 @@
+"""
+Age-structure features from the Pop_sex_age cube.
+
+Every indicator is computed for all years at once from the (age x year)
+matrix of the cube: one cumulative sum over the age axis gives every age
+band as a difference of two rows, and the median age is read off the same
+cumulative counts. The 165-year history takes well under a millisecond,
+so the table can be rebuilt inside grid searches.
+
+Indicators (one column each, per year):
+  - share_0_19, share_20_39, share_40_64, share_65_plus : shares of the total
+  - youth_dependency    : 0-19 / 20-64
+  - old_age_dependency  : 65+ / 20-64
+  - total_dependency    : (0-19 + 65+) / 20-64
+  - median_age          : interpolated within the single-year class
+  - mean_age            : the open-ended last class counts at its lower bound
+  - sex_ratio           : men per woman
+
+Use them as exogenous features of the ML table:
+
+    exog = age_features(cube, ["share_20_39", "old_age_dependency"])
+    df = build_ml_table(ts, n_lags=2, exog=exog)
+    fit = fit_linear_model(df, extra_features=["share_20_39", "old_age_dependency"])
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import load_population_cube
+from src.population_cube import TOTAL, PopulationCube
+
+# (first age, last age + 1); None means up to the open-ended last class
+AGE_BANDS = {
+    "0_19": (0, 20),
+    "20_39": (20, 40),
+    "20_64": (20, 65),
+    "40_64": (40, 65),
+    "65_plus": (65, None),
+}
+
+AGE_FEATURES = (
+    "share_0_19",
+    "share_20_39",
+    "share_40_64",
+    "share_65_plus",
+    "youth_dependency",
+    "old_age_dependency",
+    "total_dependency",
+    "median_age",
+    "mean_age",
+    "sex_ratio",
+)
+
+
+def age_indicators(cube: PopulationCube) -> dict[str, np.ndarray]:
+    """Every indicator of AGE_FEATURES as an (n_years,) array."""
+    A = cube.age_matrix(TOTAL).astype(float)  # (n_ages, n_years)
+
+    # 1) Cumulative counts: C[a] = people aged < a (C[0] = 0)
+    C = np.zeros((A.shape[0] + 1, A.shape[1]))
+    np.cumsum(A, axis=0, out=C[1:])
+    total = C[-1]
+
+    def band(lo: int, hi: int | None) -> np.ndarray:
+        return C[A.shape[0] if hi is None else hi] - C[lo]
+
+    counts = {name: band(lo, hi) for name, (lo, hi) in AGE_BANDS.items()}
+    working = counts["20_64"]
+
+    # 2) Median age: first class where the cumulative count reaches half,
+    #    interpolated linearly inside that class
+    half = total / 2
+    a = np.argmax(C[1:] >= half, axis=0)
+    cols = np.arange(A.shape[1])
+    median = a + (half - C[a, cols]) / A[a, cols]
+
+    return {
+        "share_0_19": counts["0_19"] / total,
+        "share_20_39": counts["20_39"] / total,
+        "share_40_64": counts["40_64"] / total,
+        "share_65_plus": counts["65_plus"] / total,
+        "youth_dependency": counts["0_19"] / working,
+        "old_age_dependency": counts["65_plus"] / working,
+        "total_dependency": (counts["0_19"] + counts["65_plus"]) / working,
+        "median_age": median,
+        "mean_age": cube.ages @ A / total,
+        "sex_ratio": cube.sex_ratio().astype(float),
+    }
+
+
+def age_features(
+    cube: PopulationCube | None = None,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Yearly age-structure table (year + the chosen AGE_FEATURES columns),
+    ready to pass as `exog` to build_ml_table.
+    """
+    if cube is None:
+        cube = load_population_cube()
+    columns = list(columns) if columns is not None else list(AGE_FEATURES)
+    unknown = set(columns) - set(AGE_FEATURES)
+    if unknown:
+        raise KeyError(f"Unknown age feature(s) {sorted(unknown)}; available: {list(AGE_FEATURES)}")
+
+    values = age_indicators(cube)
+    df = pd.DataFrame({c: values[c] for c in columns})
+    df.insert(0, "year", cube.years)
+    return df
+
+
+if __name__ == "__main__":
+    import time
+
+    from src.data_loader import timeseries_from_cube
+    from src.features import build_ml_table
+    from src.models_linear import fit_linear_model
+
+    cube = load_population_cube()
+    t0 = time.perf_counter()
+    feats = age_features(cube)
+    elapsed = time.perf_counter() - t0
+    print(f"Age features for {len(feats)} years in {elapsed * 1000:.2f} ms\n")
+    print(feats.iloc[::20].round(3).to_string(index=False))
+
+    ts = timeseries_from_cube(cube)
+    extra = ["share_20_39", "old_age_dependency", "median_age"]
+    base = fit_linear_model(build_ml_table(ts, n_lags=2), test_start_year=2000)
+    aged = fit_linear_model(
+        build_ml_table(ts, n_lags=2, exog=feats[["year"] + extra]),
+        test_start_year=2000,
+        extra_features=extra,
+    )
+    print()
+    for fit in (base, aged):
+        print(f"{fit.name:<70} test RMSE: {fit.results['test_rmse']:,.0f}")
@@ -0,0 +1,191 @@
+"""
+Rolling-origin (walk-forward) backtest.
+
+For every origin year o (the last year we pretend to have observed) each
+model is trained on all data up to o and forecasts o + 1 ... o + H
+recursively. The training window only grows by one row per origin, so the
+linear and AR models keep their sufficient statistics (means and centred
+cross-products of X and y) and update them with one rank-one step per
+origin instead of refitting from scratch. The coefficients of every origin
+are then passed to src.forecasting.forecast in one batched call per model.
+
+Note: the horizon is counted from the origin year for every model
+(h = 1 is the first unobserved year), so the baseline and the regression
+models are compared on exactly the same targets.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import load_population_timeseries
+from src.forecasting import ConstantGrowth, LagModel, forecast
+
+
+# ---------------------------------------------------------------------------
+# Features: one row per year t, target is pop[t + 1]
+# ---------------------------------------------------------------------------
+
+LINEAR_COLS = ("population_total", "growth_rate", "pop_lag_1", "pop_lag_2")
+
+
+def _linear_features(pop: np.ndarray, t: int) -> np.ndarray:
+    """population_total, growth_rate, pop_lag_1, pop_lag_2 (as in fit_linear_model)."""
+    return np.array([pop[t], pop[t] / pop[t - 1] - 1.0, pop[t - 1], pop[t - 2]])
+
+
+def _ar_features(p: int) -> Callable[[np.ndarray, int], np.ndarray]:
+    """pop_lag_1 ... pop_lag_p (as in fit_ar_model)."""
+    def features(pop: np.ndarray, t: int) -> np.ndarray:
+        return pop[t - p:t][::-1].copy()
+    return features
+
+
+@dataclass
+class IncrementalOLS:
+    """
+    Ordinary least squares with an intercept, updated one row at a time.
+
+    Keeps the running means of x and y and the centred cross-products
+    Sxx = sum (x - mean_x)(x - mean_x)' and Sxy = sum (x - mean_x)(y - mean_y),
+    updated with Welford-style rank-one steps. Solving the centred system
+    (like sklearn's LinearRegression does) avoids the very poor conditioning
+    of raw X'X with population-sized features.
+    """
+
+    n_features: int
+    n: int = 0
+    mean_x: np.ndarray = field(init=False)
+    mean_y: float = 0.0
+    sxx: np.ndarray = field(init=False)
+    sxy: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.mean_x = np.zeros(self.n_features)
+        self.sxx = np.zeros((self.n_features, self.n_features))
+        self.sxy = np.zeros(self.n_features)
+
+    def update(self, x: np.ndarray, y: float) -> None:
+        self.n += 1
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x += dx / self.n
+        self.mean_y += dy / self.n
+        self.sxx += np.outer(dx, x - self.mean_x)
+        self.sxy += dx * (y - self.mean_y)
+
+    def solve(self) -> tuple[float, np.ndarray]:
+        """Return (intercept, coefficients)."""
+        # Scale columns to unit variance before solving (pure conditioning)
+        scale = np.sqrt(np.diag(self.sxx))
+        scale[scale == 0] = 1.0
+        a = self.sxx / np.outer(scale, scale)
+        b = self.sxy / scale
+        coef = np.linalg.lstsq(a, b, rcond=None)[0] / scale
+        intercept = self.mean_y - self.mean_x @ coef
+        return float(intercept), coef
+
+
+def run_backtest(
+    ts: pd.DataFrame | None = None,
+    first_origin: int = 1950,
+    horizon: int = 10,
+    ar_orders: tuple[int, ...] = (2,),
+    start_year_for_growth: int = 1980,
+) -> pd.DataFrame:
+    """
+    Walk-forward evaluation of the baseline, linear and AR(p) models.
+
+    Returns a tidy table with one row per (origin, horizon, model):
+    origin, horizon, target_year, model, y_true, y_pred, error.
+    Forecasts beyond the last observed year are not scored and not returned.
+    """
+    if ts is None:
+        ts = load_population_timeseries()
+    ts = ts.sort_values("year")
+    years = ts["year"].to_numpy()
+    pop = ts["population_total"].to_numpy(dtype=float)
+    n = len(pop)
+
+    # model name -> (feature columns, feature function, first usable row, running OLS state)
+    models: dict[str, tuple[tuple[str, ...], Callable, int, IncrementalOLS]] = {
+        "Linear regression": (LINEAR_COLS, _linear_features, 2, IncrementalOLS(4)),
+    }
+    for p in ar_orders:
+        cols = tuple(f"pop_lag_{k}" for k in range(1, p + 1))
+        models[f"AR({p})"] = (cols, _ar_features(p), p, IncrementalOLS(p))
+
+    first = int(np.searchsorted(years, first_origin))
+    origins = np.arange(first, n - 1)
+
+    # Baseline: mean growth from start_year_for_growth up to each origin
+    # (whole history for origins before start_year_for_growth)
+    growth = pop[1:] / pop[:-1] - 1.0  # growth[t - 1] = growth from t - 1 to t
+    growth_start = int(np.searchsorted(years, start_year_for_growth))
+    csum = np.concatenate([[0.0], np.cumsum(growth)])
+    g_start = np.where(origins > growth_start, growth_start, 0)
+    rates = (csum[origins] - csum[g_start]) / (origins - g_start)
+    forecasts = {"Baseline constant growth": (origins, forecast(ConstantGrowth(rates), pop, horizon, origins))}
+
+    # Regression models: one rank-one update per new row and one solve per
+    # origin, then every origin is forecast in a single batched call
+    for name, (cols, features, start, ols) in models.items():
+        fitted, intercepts, coefs = [], [], []
+        next_row = start
+        for origin in origins:
+            # rows t with a known target pop[t + 1] <= pop[origin]
+            while next_row <= origin - 1:
+                ols.update(features(pop, next_row), pop[next_row + 1])
+                next_row += 1
+            if ols.n <= ols.n_features:
+                continue
+            intercept, coef = ols.solve()
+            fitted.append(origin)
+            intercepts.append(intercept)
+            coefs.append(coef)
+        if fitted:
+            model = LagModel(cols, np.array(intercepts), np.array(coefs))
+            fitted = np.array(fitted)
+            forecasts[name] = (fitted, forecast(model, pop, horizon, fitted))
+
+    # Tidy table: only targets that were observed
+    frames = []
+    h = np.arange(1, horizon + 1)
+    for name, (o, preds) in forecasts.items():
+        target = o[:, None] + h[None, :]
+        keep = target < n
+        oo = np.broadcast_to(o[:, None], target.shape)[keep]
+        tt = target[keep]
+        frames.append(pd.DataFrame({
+            "origin": years[oo],
+            "horizon": np.broadcast_to(h, target.shape)[keep],
+            "target_year": years[tt],
+            "model": name,
+            "y_true": pop[tt],
+            "y_pred": preds[keep],
+        }))
+
+    df = pd.concat(frames, ignore_index=True)
+    df["error"] = df["y_pred"] - df["y_true"]
+    return df
+
+
+def summarize_backtest(df: pd.DataFrame) -> pd.DataFrame:
+    """RMSE per model and horizon (rows: horizon, columns: model)."""
+    rmse = (
+        df.assign(sq=df["error"] ** 2)
+        .groupby(["horizon", "model"])["sq"]
+        .mean()
+        .pow(0.5)
+    )
+    return rmse.unstack("model")
+
+
+if __name__ == "__main__":
+    bt = run_backtest()
+    print(f"Backtest rows: {len(bt)}")
+    print("\nRMSE by horizon:\n")
+    print(summarize_backtest(bt).round(0))
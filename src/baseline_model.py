@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from src.forecasting import ConstantGrowth, forecast
+
 def add_growth_rate(ts: pd.DataFrame) -> pd.DataFrame:
     """
     Add year-over-year population growth rate to the time series.
@@ -37,18 +40,11 @@ def forecast_baseline(ts: pd.DataFrame, avg_growth: float, horizon: int) -> pd.D
     """
     ts = ts.copy()
     last_year = ts["year"].max()
-    last_pop = ts["population_total"].iloc[-1]
-
-    future_years = []
-    future_population = []
-
-    population = last_pop
+    pop = ts["population_total"].to_numpy(dtype=float)
 
-    for h in range(1, horizon + 1):
-        year = last_year + h
-        population = population * (1 + avg_growth)  # apply growth
-        future_years.append(year)
-        future_population.append(population)
+    # pop_T * (1 + g) ** h for h = 1..horizon, no Python loop
+    future_population = forecast(ConstantGrowth(avg_growth), pop, horizon)[0]
+    future_years = np.arange(last_year + 1, last_year + horizon + 1)
 
     df_future = pd.DataFrame({
         "year": future_years,
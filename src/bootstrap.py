@@ -0,0 +1,229 @@
+"""
+Bootstrap prediction intervals.
+
+Forecast uncertainty is simulated by re-running each model's recursion with
+resampled in-sample residuals added at every step:
+
+- baseline: growth rates since start_year_for_growth are split into their
+  mean and deviations; paths apply mean + resampled deviation each year
+  (one cumprod over the whole (paths, horizon) array),
+- linear / AR: the fitted recursion is stepped for all paths at once
+  (a vector of paths per step), with resampled training residuals added.
+
+Residuals are drawn one by one (block_size=1) or as moving blocks of
+consecutive residuals (block_size > 1) to keep their autocorrelation.
+
+Randomness comes from a seeded numpy Generator. Paths are simulated in
+shards of shard_size paths, each with its own child seed, so the result for
+a given seed does not depend on how many worker processes are used.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.fitted_model import FittedModel
+from src.forecasting import history_length, lag_features
+
+DEFAULT_LEVELS = (0.5, 0.8, 0.95)
+SHARD_SIZE = 50_000
+
+
+def resample_residuals(
+    residuals: np.ndarray,
+    n_paths: int,
+    horizon: int,
+    block_size: int = 1,
+    rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    """
+    Draw a (n_paths, horizon) array of residuals.
+    With block_size > 1, runs of block_size consecutive residuals are drawn
+    (moving-block bootstrap) and concatenated.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    residuals = np.asarray(residuals, dtype=float)
+    residuals = residuals[~np.isnan(residuals)]
+    block_size = max(1, min(block_size, len(residuals)))
+
+    if block_size == 1:
+        return residuals[rng.integers(0, len(residuals), size=(n_paths, horizon))]
+
+    n_blocks = -(-horizon // block_size)
+    starts = rng.integers(0, len(residuals) - block_size + 1, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :horizon]
+    return residuals[idx]
+
+
+# ---------------------------------------------------------------------------
+# Path simulation (one shard)
+# ---------------------------------------------------------------------------
+
+def _baseline_shard(
+    last_pop: float,
+    mean_growth: float,
+    deviations: np.ndarray,
+    horizon: int,
+    block_size: int,
+    n_paths: int,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    shocks = resample_residuals(deviations, n_paths, horizon, block_size, rng)
+    return last_pop * np.cumprod(1.0 + mean_growth + shocks, axis=1)
+
+
+def _model_shard(
+    fit: FittedModel,
+    history: np.ndarray,
+    residuals: np.ndarray,
+    horizon: int,
+    block_size: int,
+    n_paths: int,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    shocks = resample_residuals(residuals, n_paths, horizon, block_size, rng)
+
+    L = len(history)
+    levels = np.empty((n_paths, L + horizon))
+    levels[:, :L] = history
+    for h in range(horizon):
+        t = L + h
+        X = lag_features(fit.feature_cols, levels[:, t - L:t])
+        levels[:, t] = fit.predict(X) + shocks[:, h]
+    return levels[:, L:]
+
+
+def _simulate(
+    shard_func: Callable[..., np.ndarray],
+    args: tuple,
+    n_paths: int,
+    seed: int | None,
+    max_workers: int | None,
+    shard_size: int,
+) -> np.ndarray:
+    """Run shard_func over shards of paths (in a pool when there are several)."""
+    sizes = [shard_size] * (n_paths // shard_size)
+    if n_paths % shard_size:
+        sizes.append(n_paths % shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    workers = min(len(sizes), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(shard_func, *args, n, s) for n, s in zip(sizes, seeds)]
+            shards = [f.result() for f in futures]
+    else:
+        shards = [shard_func(*args, n, s) for n, s in zip(sizes, seeds)]
+    return np.concatenate(shards, axis=0)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def baseline_paths(
+    ts: pd.DataFrame,
+    horizon: int = 20,
+    start_year_for_growth: int = 1980,
+    n_paths: int = 5000,
+    block_size: int = 1,
+    seed: int | None = None,
+    max_workers: int | None = None,
+    shard_size: int = SHARD_SIZE,
+) -> np.ndarray:
+    """Simulated constant-growth paths after the last year of ts, shape (n_paths, horizon)."""
+    ts = ts.sort_values("year")
+    pop = ts["population_total"].to_numpy(dtype=float)
+    years = ts["year"].to_numpy()
+
+    growth = pop[1:] / pop[:-1] - 1.0
+    growth = growth[years[1:] > start_year_for_growth]
+    mean_growth = growth.mean()
+
+    args = (pop[-1], mean_growth, growth - mean_growth, horizon, block_size)
+    return _simulate(_baseline_shard, args, n_paths, seed, max_workers, shard_size)
+
+
+def model_paths(
+    fit: FittedModel,
+    ts: pd.DataFrame,
+    horizon: int = 20,
+    n_paths: int = 5000,
+    block_size: int = 1,
+    seed: int | None = None,
+    max_workers: int | None = None,
+    shard_size: int = SHARD_SIZE,
+) -> np.ndarray:
+    """
+    Simulated paths of a linear or AR FittedModel after the last year of ts,
+    shape (n_paths, horizon). Uses the model's training residuals.
+    """
+    pop = ts.sort_values("year")["population_total"].to_numpy(dtype=float)
+    history = pop[-history_length(fit.feature_cols):]
+    residuals = fit.residuals[fit.train_mask]
+
+    args = (fit, history, residuals, horizon, block_size)
+    return _simulate(_model_shard, args, n_paths, seed, max_workers, shard_size)
+
+
+def prediction_intervals(
+    paths: np.ndarray,
+    first_year: int,
+    levels: tuple[float, ...] = DEFAULT_LEVELS,
+) -> pd.DataFrame:
+    """
+    Quantiles of the simulated paths, one row per forecast year.
+    Columns: year, median, lower_50, upper_50, lower_80, ... (per level).
+    """
+    probs = [0.5]
+    for level in levels:
+        probs += [(1 - level) / 2, (1 + level) / 2]
+    q = np.quantile(paths, probs, axis=0)
+
+    out = {"year": first_year + np.arange(paths.shape[1]), "median": q[0]}
+    for i, level in enumerate(levels):
+        pct = round(level * 100)
+        out[f"lower_{pct}"] = q[1 + 2 * i]
+        out[f"upper_{pct}"] = q[2 + 2 * i]
+    return pd.DataFrame(out)
+
+
+def forecast_intervals(
+    ts: pd.DataFrame,
+    linear: FittedModel | None = None,
+    ar: FittedModel | None = None,
+    horizon: int = 20,
+    n_paths: int = 5000,
+    block_size: int = 1,
+    seed: int | None = 0,
+    levels: tuple[float, ...] = DEFAULT_LEVELS,
+) -> dict[str, pd.DataFrame]:
+    """Prediction intervals of the baseline (and the given fits), keyed by model name."""
+    first_year = int(ts["year"].max()) + 1
+    out = {
+        "Baseline constant growth": prediction_intervals(
+            baseline_paths(ts, horizon, n_paths=n_paths, block_size=block_size, seed=seed),
+            first_year, levels,
+        )
+    }
+    for fit in (linear, ar):
+        if fit is not None:
+            paths = model_paths(fit, ts, horizon, n_paths=n_paths, block_size=block_size, seed=seed)
+            out[fit.name] = prediction_intervals(paths, first_year, levels)
+    return out
+
+
+if __name__ == "__main__":
+    from src.compare_models import fit_all_models
+
+    fits = fit_all_models()
+    intervals = forecast_intervals(fits["ts"], fits["linear"], fits["ar"], horizon=10)
+    for name, df in intervals.items():
+        print(f"\n{name}:\n")
+        print(df.round(0).to_string(index=False))
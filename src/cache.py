@@ -0,0 +1,263 @@
+"""
+Small cache for parsed raw data files.
+
+Parsing the BFS files is by far the slowest part of loading the data, and a
+single run of main.py used to parse the same file several times. This module
+keeps two layers:
+
+- an in-process memo (a dict lookup for repeated loads in the same run)
+- an on-disk cache of the parsed table as a compressed NumPy archive (.npz);
+  objects built from a file (cached_object, e.g. the population cube) are
+  stored the same way when they can be turned into plain arrays
+
+Both layers are keyed by a fingerprint of the source file (size, mtime and a
+content hash) plus a parser version, so editing the raw file or the parser
+invalidates the cache automatically.
+
+Set the environment variable POPGROWTH_CACHE=0 to disable caching, and
+POPGROWTH_CACHE_DIR to move the cache folder.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = BASE_DIR / "data" / "cache"
+
+# In-process memo: key -> DataFrame (or other parsed object)
+_MEMO: dict[str, object] = {}
+
+# Stat lookups are cheap, hashing is not: remember the content hash per (path, size, mtime)
+_HASHES: dict[tuple[str, int, int], str] = {}
+
+_STATS = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "invalidations": 0}
+
+
+def cache_enabled() -> bool:
+    """Caching is on unless POPGROWTH_CACHE is set to 0/false/no/off."""
+    value = os.environ.get("POPGROWTH_CACHE", "1").strip().lower()
+    return value not in {"0", "false", "no", "off"}
+
+
+def cache_dir() -> Path:
+    """Folder used for the on-disk cache."""
+    return Path(os.environ.get("POPGROWTH_CACHE_DIR", DEFAULT_CACHE_DIR))
+
+
+def file_fingerprint(path: Path) -> str:
+    """
+    Fingerprint of a source file: size + mtime + sha256 of the content.
+    The content hash is only recomputed when size or mtime change.
+    """
+    path = Path(path)
+    st = path.stat()
+    stat_key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+
+    digest = _HASHES.get(stat_key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        _HASHES[stat_key] = digest
+
+    return f"{st.st_size}-{st.st_mtime_ns}-{digest}"
+
+
+def cache_key(path: Path, parser_version: str) -> str:
+    """Key combining the file fingerprint and the parser version."""
+    raw = f"{Path(path).name}|{file_fingerprint(path)}|{parser_version}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def save_frame_npz(df: pd.DataFrame, out_path: Path) -> None:
+    """
+    Store a DataFrame as a compressed .npz archive.
+    Numeric columns are stored as-is, text columns as integer codes + labels.
+    """
+    arrays: dict[str, np.ndarray] = {"__columns__": np.array(df.columns, dtype=str)}
+
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values):
+            arrays[f"num_{i}"] = values.to_numpy()
+        else:
+            codes, labels = pd.factorize(values, use_na_sentinel=True)
+            arrays[f"codes_{i}"] = codes.astype(np.int32)
+            arrays[f"labels_{i}"] = np.asarray(labels, dtype=str)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(".tmp.npz")
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, out_path)
+
+
+def load_frame_npz(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Inverse of save_frame_npz. With `columns`, only those columns are
+    decompressed (in that order); names not in the archive are skipped.
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        stored = list(archive["__columns__"])
+        columns = stored if columns is None else [c for c in columns if c in stored]
+        data = {}
+        for col in columns:
+            i = stored.index(col)
+            if f"num_{i}" in archive:
+                data[col] = archive[f"num_{i}"]
+            else:
+                codes = archive[f"codes_{i}"]
+                # one extra slot at the end so that code -1 (missing) maps to None
+                labels = np.append(archive[f"labels_{i}"].astype(object), None)
+                data[col] = labels[codes]
+    return pd.DataFrame(data, columns=columns)
+
+
+def cached_frame(
+    path: Path,
+    loader: Callable[[], pd.DataFrame],
+    parser_version: str,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    Return loader() for the file at `path`, going through the memo and disk cache.
+
+    The returned DataFrame is a shallow copy, so callers may add or drop
+    columns without touching the cached object.
+    """
+    if not (use_cache and cache_enabled()):
+        _STATS["misses"] += 1
+        return loader()
+
+    path = Path(path)
+    key = cache_key(path, parser_version)
+
+    # 1) In-process memo
+    if key in _MEMO:
+        _STATS["memory_hits"] += 1
+        return _MEMO[key].copy(deep=False)
+
+    # 2) On-disk archive
+    disk_path = cache_dir() / f"{path.stem}-{key}.npz"
+    if disk_path.exists():
+        try:
+            df = load_frame_npz(disk_path)
+            _STATS["disk_hits"] += 1
+            _MEMO[key] = df
+            return df.copy(deep=False)
+        except (OSError, ValueError, KeyError):
+            # Corrupt/partial archive: fall through and rebuild it
+            disk_path.unlink(missing_ok=True)
+
+    # 3) Miss: parse, drop stale archives for this file, store the new one
+    _STATS["misses"] += 1
+    df = loader()
+
+    for stale in cache_dir().glob(f"{path.stem}-*.npz"):
+        if stale != disk_path:
+            stale.unlink(missing_ok=True)
+            _STATS["invalidations"] += 1
+
+    try:
+        save_frame_npz(df, disk_path)
+    except OSError:
+        # A read-only checkout should still work, just without the disk layer
+        pass
+
+    _MEMO[key] = df
+    return df.copy(deep=False)
+
+
+def cached_object(
+    path: Path,
+    builder: Callable[[], object],
+    version: str,
+    use_cache: bool = True,
+    to_arrays: Callable[[object], dict[str, np.ndarray]] | None = None,
+    from_arrays: Callable[[dict[str, np.ndarray]], object] | None = None,
+) -> object:
+    """
+    Return builder() for the file at `path`, for objects derived from it
+    that are not DataFrames (e.g. arrays). Same keying as cached_frame.
+
+    The object is memoized in-process. With to_arrays/from_arrays (object
+    -> dict of arrays and back) it is also stored on disk as an .npz
+    archive, so a new process skips the builder (typically a text parse);
+    without them nothing is written to disk. The same object is returned
+    to every caller: treat it as read-only.
+    """
+    if not (use_cache and cache_enabled()):
+        _STATS["misses"] += 1
+        return builder()
+
+    path = Path(path)
+    key = cache_key(path, version)
+
+    # 1) In-process memo
+    if "obj-" + key in _MEMO:
+        _STATS["memory_hits"] += 1
+        return _MEMO["obj-" + key]
+
+    # 2) On-disk archive (named apart from cached_frame's "<stem>-<key>.npz")
+    persist = to_arrays is not None and from_arrays is not None
+    disk_path = cache_dir() / f"{path.stem}.obj-{key}.npz"
+    if persist and disk_path.exists():
+        try:
+            with np.load(disk_path, allow_pickle=False) as archive:
+                obj = from_arrays({name: archive[name] for name in archive.files})
+            _STATS["disk_hits"] += 1
+            _MEMO["obj-" + key] = obj
+            return obj
+        except (OSError, ValueError, KeyError):
+            disk_path.unlink(missing_ok=True)
+
+    # 3) Miss: build, drop stale archives for this file, store the new one
+    _STATS["misses"] += 1
+    obj = builder()
+
+    if persist:
+        for stale in cache_dir().glob(f"{path.stem}.obj-*.npz"):
+            if stale != disk_path:
+                stale.unlink(missing_ok=True)
+                _STATS["invalidations"] += 1
+        try:
+            disk_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = disk_path.with_suffix(".tmp.npz")
+            np.savez_compressed(tmp_path, **to_arrays(obj))
+            os.replace(tmp_path, disk_path)
+        except OSError:
+            pass
+
+    _MEMO["obj-" + key] = obj
+    return obj
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters since start (or last reset), plus the overall hit rate."""
+    stats = dict(_STATS)
+    hits = stats["memory_hits"] + stats["disk_hits"]
+    total = hits + stats["misses"]
+    stats["hit_rate"] = hits / total if total else float("nan")
+    return stats
+
+
+def reset_cache_stats() -> None:
+    for k in _STATS:
+        _STATS[k] = 0
+
+
+def clear_cache(memory: bool = True, disk: bool = True) -> None:
+    """Drop the in-process memo and/or every archive in the cache folder."""
+    if memory:
+        _MEMO.clear()
+        _HASHES.clear()
+    if disk and cache_dir().exists():
+        for p in cache_dir().glob("*.npz"):
+            p.unlink(missing_ok=True)
@@ -0,0 +1,241 @@
+"""
+Cohort-component population projection.
+
+The population is kept by sex and single-year age and moved forward one year
+at a time, Leslie-matrix style:
+
+    pop[s, a + 1, t + 1] = pop[s, a, t] * (1 - q[s, a]) * (1 + m[s, a])
+    pop[s, 0, t + 1]     = births[t + 1] * newborn_ratio[s]
+    births[t + 1]        = sum_a f[a] * women[a, t]
+
+The last age class (99+) is open: its survivors stay in it.
+
+Rates are estimated from the raw BFS files (population by sex/age, yearly
+births and deaths). Many scenarios are projected at once: every rate array
+carries a leading scenario axis and each yearly step is a handful of array
+operations over (scenario, sex, age).
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import load_births_deaths_yearly, load_population_cube
+from src.population_cube import FEMALE, MALE, PopulationCube
+
+# Sex axis of the projection: 0 = male, 1 = female (no total)
+SEXES = (MALE, FEMALE)
+
+# Ages of the mother used for the (flat) fertility schedule
+FERTILE_AGES = (15, 49)
+
+# Gompertz slope used to spread total deaths over ages (mortality roughly
+# doubles every 8 years of age in adults)
+GOMPERTZ_SLOPE = 0.09
+
+
+@dataclass
+class CohortRates:
+    """
+    Demographic rates. Arrays may carry a leading scenario axis S.
+
+    fertility     : births per woman of age a and year,   shape ([S,] n_ages)
+    mortality     : probability of dying within the year, shape ([S,] 2, n_ages)
+    migration     : net migration per survivor,           shape ([S,] 2, n_ages)
+    newborn_ratio : newborns alive at year end by sex per birth, shape ([S,] 2)
+    """
+
+    fertility: np.ndarray
+    mortality: np.ndarray
+    migration: np.ndarray
+    newborn_ratio: np.ndarray
+
+    @property
+    def n_scenarios(self) -> int:
+        return 1 if self.fertility.ndim == 1 else self.fertility.shape[0]
+
+
+def estimate_rates(
+    cube: PopulationCube | None = None,
+    vital: pd.DataFrame | None = None,
+    start_year: int = 2014,
+    end_year: int | None = None,
+) -> CohortRates:
+    """
+    Estimate rates over the window [start_year, end_year] (end_year defaults
+    to the last year available in the cube).
+
+    - Cohort transition ratios pop[a + 1, t + 1] / pop[a, t] by sex.
+    - Fertility: births / women aged 15-49, spread evenly over those ages.
+    - Mortality: Gompertz curve scaled so that it reproduces recorded deaths.
+    - Migration: what is left of the transition ratio after mortality.
+    """
+    cube = cube if cube is not None else load_population_cube()
+    vital = vital if vital is not None else load_births_deaths_yearly()
+
+    end_year = int(cube.years[-1]) if end_year is None else end_year
+    t0, t1 = cube.year_index(start_year), cube.year_index(end_year)
+    if t1 <= t0:
+        raise ValueError("Need at least two years to estimate cohort rates")
+
+    # (2, n_ages, n_years) by sex, for years t (start) and t + 1 (end)
+    pop = cube.values[list(SEXES), 1:, :].astype(float)
+    p_start = pop[:, :, t0:t1]
+    p_end = pop[:, :, t0 + 1:t1 + 1]
+    n_ages = pop.shape[1]
+
+    vital = vital.set_index("year")
+    next_years = cube.years[t0 + 1:t1 + 1]
+    births = vital.loc[next_years, "births"].to_numpy(dtype=float)
+    deaths = vital.loc[next_years, "deaths"].to_numpy(dtype=float)
+
+    # 1) Net cohort transition ratios (survival x migration)
+    transition = np.empty((2, n_ages))
+    transition[:, :-2] = p_end[:, 1:-1].sum(axis=2) / p_start[:, :-2].sum(axis=2)
+    open_ratio = p_end[:, -1].sum(axis=1) / p_start[:, -2:].sum(axis=(1, 2))
+    transition[:, -2:] = open_ratio[:, None]
+
+    # 2) Newborns still resident at year end, per birth of that year
+    newborn_ratio = p_end[:, 0].sum(axis=1) / births.sum()
+
+    # 3) Fertility: flat schedule over the fertile ages
+    lo, hi = FERTILE_AGES
+    women = p_start[1, lo:hi + 1].sum()
+    fertility = np.zeros(n_ages)
+    fertility[lo:hi + 1] = births.sum() / women
+
+    # 4) Mortality: q(a) = alpha * exp(slope * a), alpha matches total deaths
+    shape = np.exp(GOMPERTZ_SLOPE * np.arange(n_ages))
+    alpha = deaths.sum() / (p_start.sum(axis=(0, 2)) * shape).sum()
+    q = np.minimum(alpha * shape, 1.0)
+    mortality = np.broadcast_to(q, (2, n_ages)).copy()
+
+    # 5) Migration: transition = (1 - q) * (1 + m)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        migration = np.where(q < 1.0, transition / (1.0 - q) - 1.0, 0.0)
+
+    return CohortRates(
+        fertility=fertility,
+        mortality=mortality,
+        migration=migration,
+        newborn_ratio=newborn_ratio,
+    )
+
+
+def scenario_rates(
+    base: CohortRates,
+    fertility_scale: np.ndarray | float = 1.0,
+    mortality_scale: np.ndarray | float = 1.0,
+    migration_scale: np.ndarray | float = 1.0,
+) -> CohortRates:
+    """
+    Stack S scenarios by scaling the base rates.
+    The scale arguments are broadcast against each other to shape (S,).
+    """
+    f, q, m = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(fertility_scale, dtype=float)),
+        np.atleast_1d(np.asarray(mortality_scale, dtype=float)),
+        np.atleast_1d(np.asarray(migration_scale, dtype=float)),
+    )
+    n = f.shape[0]
+
+    return CohortRates(
+        fertility=f[:, None] * base.fertility[None, :],
+        mortality=np.minimum(q[:, None, None] * base.mortality[None], 1.0),
+        migration=m[:, None, None] * base.migration[None],
+        newborn_ratio=np.broadcast_to(base.newborn_ratio, (n, 2)).copy(),
+    )
+
+
+def project_cohorts(
+    base_pop: np.ndarray,
+    rates: CohortRates,
+    horizon: int,
+    totals_only: bool = True,
+) -> np.ndarray:
+    """
+    Project a (2, n_ages) population `horizon` years ahead for every scenario.
+
+    Returns
+    -------
+    np.ndarray
+        totals_only=True : total population, shape (S, horizon + 1)
+        totals_only=False: full detail,      shape (S, horizon + 1, 2, n_ages)
+        Index 0 on the time axis is the starting population.
+    """
+    n_scen = rates.n_scenarios
+    n_ages = base_pop.shape[-1]
+
+    fert = np.broadcast_to(rates.fertility, (n_scen, n_ages))
+    newborn = np.broadcast_to(rates.newborn_ratio, (n_scen, 2))
+    # Combined one-year transition factor per scenario, sex and age
+    growth = np.broadcast_to(
+        (1.0 - rates.mortality) * (1.0 + rates.migration), (n_scen, 2, n_ages)
+    )
+
+    pop = np.broadcast_to(np.asarray(base_pop, dtype=float), (n_scen, 2, n_ages)).copy()
+
+    if totals_only:
+        out = np.empty((n_scen, horizon + 1))
+        out[:, 0] = pop.sum(axis=(1, 2))
+    else:
+        out = np.empty((n_scen, horizon + 1, 2, n_ages))
+        out[:, 0] = pop
+
+    moved = np.empty_like(pop)
+    for h in range(1, horizon + 1):
+        births = np.einsum("sa,sa->s", pop[:, 1, :], fert)
+
+        np.multiply(pop, growth, out=moved)
+        pop[:, :, 1:] = moved[:, :, :-1]
+        pop[:, :, -1] += moved[:, :, -1]
+        pop[:, :, 0] = births[:, None] * newborn
+
+        if totals_only:
+            out[:, h] = pop.sum(axis=(1, 2))
+        else:
+            out[:, h] = pop
+
+    return out
+
+
+def main(n_scenarios: int = 300, horizon: int = 50, start_year: int = 2014) -> None:
+    cube = load_population_cube()
+    base = estimate_rates(cube, start_year=start_year)
+    last_year = int(cube.years[-1])
+    base_pop = cube.values[list(SEXES), 1:, -1]
+
+    # Back-check: rates from 2004-2014, projected 2014 -> last year
+    back = estimate_rates(cube, start_year=2004, end_year=2014)
+    back_proj = project_cohorts(
+        cube.values[list(SEXES), 1:, cube.year_index(2014)], back, last_year - 2014
+    )
+    actual = cube.total()[-1]
+    print(f"Back-check 2014 -> {last_year}: projected {back_proj[0, -1]:,.0f}, actual {actual:,.0f}")
+
+    rng = np.random.default_rng(0)
+    scenarios = scenario_rates(
+        base,
+        fertility_scale=rng.uniform(0.8, 1.2, n_scenarios),
+        mortality_scale=rng.uniform(0.8, 1.2, n_scenarios),
+        migration_scale=rng.uniform(0.0, 2.0, n_scenarios),
+    )
+
+    t0 = time.perf_counter()
+    totals = project_cohorts(base_pop, scenarios, horizon)
+    elapsed = time.perf_counter() - t0
+
+    final = totals[:, -1]
+    print(f"Projected {n_scenarios} scenarios x {horizon} years in {elapsed * 1000:.1f} ms")
+    print(
+        f"Population in {last_year + horizon}: "
+        f"median {np.median(final):,.0f}, 5%-95% {np.percentile(final, 5):,.0f} - "
+        f"{np.percentile(final, 95):,.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
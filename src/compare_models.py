@@ -1,47 +1,54 @@
+from __future__ import annotations
+
 from pathlib import Path
 
 import pandas as pd
 
 from src.data_loader import load_population_timeseries
-from src.features import build_ml_table
-from src.evaluation import evaluate_baseline_constant_growth
-from src.models_linear import fit_linear_model
-from src.models_ar import fit_ar_model
+from src.registry import results_table, run_models
 
 
-def compare_all_models(test_start_year=2000):
-    ts = load_population_timeseries()
-    ml = build_ml_table(ts, n_lags=2)
+def fit_all_models(
+    test_start_year: int = 2000,
+    n_lags: int = 2,
+    ts: pd.DataFrame | None = None,
+    executor: str = "thread",
+) -> dict:
+    """
+    Fit every registered model once (concurrently, see src.registry).
 
-    results = []
+    Returns a dict with:
+      - "ts": the yearly time series used
+      - "baseline": results dict of the constant-growth baseline
+      - "linear": FittedModel of the linear regression (None if it could not be fit)
+      - "ar": FittedModel of the AR(n_lags) model
+      - "components": FittedModel of the births/deaths/migration model
+      - "runs": {key: ModelRun} with the timings of every model
+    """
+    if ts is None:
+        ts = load_population_timeseries()
 
-    # Baseline
-    baseline_res = evaluate_baseline_constant_growth(
-        ts,
-        test_start_year=test_start_year,
-        start_year_for_growth=1980,
-    )
-    results.append(baseline_res)
+    runs = run_models(ts, test_start_year=test_start_year, n_lags=n_lags, executor=executor)
 
-    # Linear regression
-    linear_res = fit_linear_model(
-        ml,
-        test_start_year=test_start_year,
-    )
-    results.append(linear_res)
+    fits = {"ts": ts, "runs": runs, "linear": None}
+    fits.update({key: run.fitted for key, run in runs.items()})
+    return fits
 
-    # AR model
-    ar_res = fit_ar_model(
-        ml,
-        test_start_year=test_start_year,
-        n_lags=2,
-    )
-    results.append(ar_res)
 
-    return pd.DataFrame(results)
+def comparison_table(fits: dict) -> pd.DataFrame:
+    """One row per model (schema-validated), from the output of fit_all_models."""
+    return results_table(fits["runs"].values())
 
 
+def compare_all_models(test_start_year=2000):
+    fits = fit_all_models(test_start_year=test_start_year)
+    return comparison_table(fits)
+
 if __name__ == "__main__":
+    from src.instrumentation import configure_logging
+    from src.run_store import save_table
+
+    configure_logging()
     df = compare_all_models()
     print("\n Model comparison table:\n")
     print(df)
@@ -50,5 +57,5 @@ if __name__ == "__main__":
     RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
     out_path = RESULTS_DIR / "model_comparison.csv"
-    df.to_csv(out_path, index=False)
-    print(f"\n Saved comparison table to {out_path}")
+    save_table("comparison", df, csv_path=out_path, params={"test_start_year": 2000})
+    print(f"\n Saved comparison table to {out_path} (and the run store)")
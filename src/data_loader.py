@@ -1,6 +1,19 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import re
+import warnings
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
+
+import numpy as np
 import pandas as pd
-from pyaxis import pyaxis
+
+from src.cache import cached_frame, cached_object
+from src.instrumentation import count, stage
+from src.population_cube import PopulationCube
 
 # Find the project root 
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -8,57 +21,279 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 # Path to data/raw/ for POPULATION_RESIDENT_DEMOG.XLSX
 RAW_DATA_DIR = BASE_DIR / "data" / "raw"
 
+logger = logging.getLogger(__name__)
+
 
 def load_population_raw() -> pd.DataFrame:
     """
     Load the raw permanent resident population Excel file.
+
+    Returns the raw cells of the first sheet, as read by pd.read_excel (not
+    cached). For the typed table of all yearly sheets, use
+    load_resident_demog().
     """
     path = RAW_DATA_DIR / "permanent_resident_demog.xlsx"
-    df = pd.read_excel(path)
-    return df
+    with warnings.catch_warnings():
+        # the FSO files have page headers openpyxl cannot parse
+        warnings.simplefilter("ignore", UserWarning)
+        return pd.read_excel(path)
+
+
+# Bump these when the parsing below changes, so cached tables are rebuilt
+PX_PARSER_VERSION = "px-reader-1"
+XLSX_PARSER_VERSION = "xlsx-reader-1"
+
+
+# ---------------------------------------------------------------------------
+# PX (PC-Axis) reader
+# ---------------------------------------------------------------------------
+# A PX file is a header of KEYWORD[lang]("arg")=value; statements followed by
+# a DATA= block holding every cell of the cube in row-major order over the
+# STUB dimensions then the HEADING dimensions. Missing cells are quoted
+# symbols such as "..." or "-".
+
+_PX_KEYWORD = re.compile(r'^([A-Z0-9-]+)(?:\[([a-z]{2})\])?(?:\((.*)\))?$', re.S)
+_PX_TOKEN = re.compile(r'"[^"]*"|,|[^",\s]+')
+
+
+@dataclass
+class PxTable:
+    """
+    Parsed PX cube.
+
+    dims   : dimension names (stub first, then heading), in the chosen language
+    labels : value labels for each dimension (only the selected ones)
+    data   : float array of shape [len(l) for l in labels], NaN for missing cells
+    meta   : raw header statements, {(keyword, lang, arg): value}
+    """
+
+    dims: list[str]
+    labels: list[list[str]]
+    data: np.ndarray
+    meta: dict = field(default_factory=dict, repr=False)
+
+    def to_frame(self, value_col: str = "DATA") -> pd.DataFrame:
+        """Long format: one column per dimension + one value column."""
+        grids = np.meshgrid(*[np.arange(len(l)) for l in self.labels], indexing="ij")
+        out = {
+            dim: np.asarray(labels, dtype=object)[grid.ravel()]
+            for dim, labels, grid in zip(self.dims, self.labels, grids)
+        }
+        out[value_col] = self.data.ravel()
+        return pd.DataFrame(out)
+
+
+def _split_px_values(text: str) -> list[str]:
+    """
+    Split a header value into items.
+    Items are comma-separated; adjacent quoted strings are concatenated
+    (long texts are wrapped over several lines that way).
+    """
+    items = [""]
+    for tok in _PX_TOKEN.findall(text):
+        if tok == ",":
+            items.append("")
+        elif tok.startswith('"'):
+            items[-1] += tok[1:-1]
+        else:
+            items[-1] += tok
+    return items
+
+
+def _parse_px_header(header: str) -> dict:
+    """Parse the header into {(keyword, lang, arg): [values]}."""
+    meta: dict = {}
+    statement: list[str] = []
+    in_quotes = False
+
+    for ch in header:
+        if ch == '"':
+            in_quotes = not in_quotes
+        if ch == ";" and not in_quotes:
+            text = "".join(statement).strip()
+            statement = []
+            # split key/value on the first "=" outside quotes
+            q = False
+            for i, c in enumerate(text):
+                if c == '"':
+                    q = not q
+                elif c == "=" and not q:
+                    break
+            else:
+                continue
+            m = _PX_KEYWORD.match(text[:i].strip())
+            if m is None:
+                continue
+            keyword, lang, arg = m.groups()
+            if arg is not None:
+                arg = ",".join(_split_px_values(arg))
+            meta[(keyword, lang, arg)] = _split_px_values(text[i + 1:])
+        else:
+            statement.append(ch)
+
+    return meta
+
+
+def read_px(
+    path: Path,
+    language: str | None = None,
+    select: dict[str, list[str]] | None = None,
+) -> PxTable:
+    """
+    Read a PX file into a dense float array.
+
+    The header is parsed once; the DATA block is then streamed line by line
+    and only the cells of the selected dimension values are converted and
+    written into a preallocated array, so unused cells are never stored.
+
+    Parameters
+    ----------
+    path : Path
+        .px file.
+    language : str | None
+        "de", "fr", "it" or "en". Defaults to the file's main LANGUAGE.
+    select : dict | None
+        {dimension name: [value labels]} in the chosen language. Dimensions
+        not listed are kept whole. The output follows the order given here.
+    """
+    path = Path(path)
+
+    # 1) Read raw header bytes up to the DATA= line
+    header_lines: list[bytes] = []
+    with open(path, "rb") as f:
+        for line in f:
+            if line.startswith(b"DATA="):
+                first_data = line[len(b"DATA="):]
+                break
+            header_lines.append(line)
+        else:
+            raise ValueError(f"No DATA= block found in {path}")
+
+        raw_header = b"".join(header_lines)
+        m = re.search(rb'CODEPAGE="([^"]+)"', raw_header)
+        codepage = m.group(1).decode("ascii") if m else "latin-1"
+        meta = _parse_px_header(raw_header.decode(codepage, errors="replace"))
+
+        # 2) Dimensions in the requested language
+        main_language = meta.get(("LANGUAGE", None, None), [None])[0]
+        lang = None if language in (None, main_language) else language
+
+        def lookup(keyword: str, arg: str | None = None) -> list[str]:
+            key = (keyword, lang, arg)
+            if key not in meta:
+                raise KeyError(f"{keyword}[{lang}]({arg}) not found in {path.name}")
+            return meta[key]
+
+        stub = lookup("STUB") if ("STUB", lang, None) in meta else []
+        heading = lookup("HEADING") if ("HEADING", lang, None) in meta else []
+        dims = stub + heading
+        all_labels = [lookup("VALUES", d) for d in dims]
+        shape = tuple(len(v) for v in all_labels)
+
+        # 3) Which cells to keep: per-dimension index arrays (in output order)
+        select = select or {}
+        unknown = set(select) - set(dims)
+        if unknown:
+            raise KeyError(f"Unknown dimension(s) {sorted(unknown)}; available: {dims}")
+
+        keep_idx = []
+        for d, values in zip(dims, all_labels):
+            if d in select:
+                pos = {v: i for i, v in enumerate(values)}
+                missing = [v for v in select[d] if v not in pos]
+                if missing:
+                    raise KeyError(f"Values {missing} not found in dimension {d!r}")
+                keep_idx.append(np.array([pos[v] for v in select[d]], dtype=np.int64))
+            else:
+                keep_idx.append(np.arange(len(values), dtype=np.int64))
+
+        out_shape = tuple(len(ix) for ix in keep_idx)
+        grids = np.meshgrid(*keep_idx, indexing="ij")
+        flat_in = np.ravel_multi_index([g.ravel() for g in grids], shape)
+        order = np.argsort(flat_in, kind="stable")
+        kept_flat = flat_in[order]  # file positions to keep (sorted)
+        kept_out = order  # where each of them goes in the output
+
+        out = np.full(int(np.prod(out_shape)), np.nan)
+
+        # 4) Stream the DATA block
+        pos = 0
+        k = 0
+        n_kept = len(kept_flat)
+        for line in itertools.chain([first_data], f):
+            if k >= n_kept:
+                break
+            tokens = line.replace(b",", b" ").replace(b";", b" ").split()
+            if not tokens:
+                continue
+            end = pos + len(tokens)
+            hi = np.searchsorted(kept_flat, end, side="left")
+            if hi - k == len(tokens) and b'"' not in line:
+                # whole line kept and no missing symbols: convert in one go
+                out[kept_out[k:hi]] = np.array(tokens, dtype=np.float64)
+                k = hi
+                pos = end
+                continue
+            for j in range(k, hi):
+                tok = tokens[kept_flat[j] - pos]
+                if not tok.startswith(b'"'):
+                    out[kept_out[j]] = float(tok)
+            k = hi
+            pos = end
+
+    if pos < int(np.prod(shape)) and k < n_kept:
+        raise ValueError(
+            f"{path.name}: DATA block has {pos} cells, expected {int(np.prod(shape))}"
+        )
+
+    count("px_cells_scanned", pos)
+    count("px_cells_kept", n_kept)
+    labels = [[all_labels[i][j] for j in ix] for i, ix in enumerate(keep_idx)]
+    return PxTable(dims=dims, labels=labels, data=out.reshape(out_shape), meta=meta)
 
 
 # For POP_SEX_AGE.CSV
-def load_pop_sex_age_raw() -> pd.DataFrame:
+def load_pop_sex_age_raw(use_cache: bool = True) -> pd.DataFrame:
     """
     Load the BFS .px file for population by sex and age.
-    Returns a pandas DataFrame with the actual DATA table.
+    Returns a pandas DataFrame with the actual DATA table
+    (columns Geschlecht, Alter, Jahr, DATA).
+
+    The parsed table is cached (in memory and under data/cache/) and reused
+    until the .px file changes. Pass use_cache=False to force a fresh parse.
     """
     path = RAW_DATA_DIR / "Pop_sex_age.px"
+    with stage("load_pop_sex_age_raw") as rec:
+        df = cached_frame(
+            path,
+            loader=lambda: read_px(path).to_frame(),
+            parser_version=PX_PARSER_VERSION,
+            use_cache=use_cache,
+        )
+        if rec is not None:
+            rec.rows = len(df)
+    return df
 
-    tables = pyaxis.parse(str(path), encoding="latin-1")
-
-    print("Multilingual PX file")
-    print("Type returned by pyaxis:", type(tables))
-    print("Top-level keys:", tables.keys())
-
-    # 1) Get the DATA part (numbers)
-    data_part = tables.get("DATA", None)
-    if data_part is None:
-        raise ValueError("DATA key not found in PX structure")
-
-    print("Type of DATA part:", type(data_part))
-
-    # 2) If DATA is already a DataFrame, we are done
-    if isinstance(data_part, pd.DataFrame):
-        df = data_part
-    # 3) If DATA is a dict (e.g. different languages or tables), take the first table
-    elif isinstance(data_part, dict):
-        print("DATA subkeys:", data_part.keys())
-        # Take the first DataFrame among the values
-        first_value = list(data_part.values())[0]
-        if isinstance(first_value, pd.DataFrame):
-            df = first_value
-        else:
-            raise TypeError("DATA substructure is not a DataFrame; got type: "
-                            f"{type(first_value)}")
-    else:
-        raise TypeError(f"Unexpected DATA type: {type(data_part)}")
+# Dense (sex, age, year) cube
+def load_population_cube(use_cache: bool = True) -> PopulationCube:
+    """
+    Load Pop_sex_age.px as a PopulationCube (contiguous sex x age x year array).
 
-    print("Loaded DATA table with shape:", df.shape)
-    print("Columns:", df.columns)
+    The cube is cached in memory and under data/cache/, so the .px file is
+    only parsed again when it changes. It is shared; treat its arrays as
+    read-only.
+    """
+    path = RAW_DATA_DIR / "Pop_sex_age.px"
+    with stage("load_population_cube"):
+        return cached_object(
+            path,
+            builder=lambda: PopulationCube.from_px(read_px(path)),
+            version=PX_PARSER_VERSION,
+            use_cache=use_cache,
+            to_arrays=PopulationCube.to_arrays,
+            from_arrays=PopulationCube.from_arrays,
+        )
 
-    return df
 
 # Time series
 def load_population_timeseries() -> pd.DataFrame:
@@ -67,34 +302,282 @@ def load_population_timeseries() -> pd.DataFrame:
 
     Output columns:
     - year: int
-    - population_total: float
+    - population_total: int
+
+    Built from the population cube (total sex, total age); the columns are
+    copies, so changing the returned frame leaves the cached cube intact.
+    """
+    return timeseries_from_cube(load_population_cube())
+
+
+def timeseries_from_cube(cube: PopulationCube) -> pd.DataFrame:
+    """Yearly total series (year, population_total) from the cube (copied, not a view)."""
+    df_total = pd.DataFrame({"year": cube.years, "population_total": cube.total()}, copy=True)
+
+    logger.debug("Yearly population time series shape: %s", df_total.shape)
+    return df_total
+
+
+# Births and deaths (BEVNAT)
+MONTHS = (
+    "Januar", "Februar", "März", "April", "Mai", "Juni",
+    "Juli", "August", "September", "Oktober", "November", "Dezember",
+)
+
+
+@dataclass(frozen=True)
+class MonthlySeries:
+    """
+    Monthly counts for one BEVNAT series.
+
+    years   : int array of years, sorted
+    monthly : float array (n_years, 12), NaN where months were not recorded
+    yearly  : float array (n_years,), official yearly total (always filled in)
     """
-    # 1. Load the raw BFS PX data as a DataFrame
-    df = load_pop_sex_age_raw()
 
-    # 2. Keep only rows where sex is 'total' AND age is 'total'
-    mask_total = (
-        (df["Geschlecht"] == "Geschlecht - Total") &
-        (df["Alter"] == "Alter - Total")
+    years: np.ndarray
+    monthly: np.ndarray
+    yearly: np.ndarray
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        return {"years": self.years, "monthly": self.monthly, "yearly": self.yearly}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "MonthlySeries":
+        return cls(years=arrays["years"], monthly=arrays["monthly"], yearly=arrays["yearly"])
+
+    def sum_months(self) -> np.ndarray:
+        """Yearly sums of the monthly values (NaN for years with missing months)."""
+        return self.monthly.sum(axis=1)
+
+    def flat(self) -> tuple[np.ndarray, np.ndarray]:
+        """Monthly values as one series: (fractional year t + (m - 1) / 12, value)."""
+        t = (self.years[:, None] + np.arange(12)[None, :] / 12).ravel()
+        return t, self.monthly.ravel()
+
+
+def _load_monthly(file_name: str, prefix: str) -> MonthlySeries:
+    """Read the total and the 12 monthly columns of a BEVNAT PX file."""
+    dim = "Demografisches Merkmal und Indikator"
+    columns = [f"{prefix} - Total"] + [f"{prefix} im {m}" for m in MONTHS]
+    table = read_px(RAW_DATA_DIR / file_name, select={dim: columns})
+
+    years = np.array([int(y) for y in table.labels[0]])
+    order = np.argsort(years)
+    data = table.data[order]
+    return MonthlySeries(
+        years=years[order],
+        monthly=np.ascontiguousarray(data[:, 1:]),
+        yearly=np.ascontiguousarray(data[:, 0]),
     )
-    df_total = df.loc[mask_total].copy()
 
-    # 3. Clean up types and sort
-    df_total["Jahr"] = df_total["Jahr"].astype(int)
-    df_total = df_total.sort_values("Jahr")
 
-    # 4. Rename columns jahr to year
-    df_total = df_total.rename(columns={
-        "Jahr": "year",
-        "DATA": "population_total",
+def load_births_monthly(use_cache: bool = True) -> MonthlySeries:
+    """Live births per month since 1803 (months recorded from 1871 on)."""
+    path = RAW_DATA_DIR / "Briths_monthly.px"
+    return cached_object(
+        path,
+        builder=lambda: _load_monthly(path.name, "Lebendgeburten"),
+        version=PX_PARSER_VERSION,
+        use_cache=use_cache,
+        to_arrays=MonthlySeries.to_arrays,
+        from_arrays=MonthlySeries.from_arrays,
+    )
+
+
+def load_deaths_monthly(use_cache: bool = True) -> MonthlySeries:
+    """Deaths per month since 1803 (months recorded from 1877 on)."""
+    path = RAW_DATA_DIR / "deaths_monthly.px"
+    return cached_object(
+        path,
+        builder=lambda: _load_monthly(path.name, "Todesfälle"),
+        version=PX_PARSER_VERSION,
+        use_cache=use_cache,
+        to_arrays=MonthlySeries.to_arrays,
+        from_arrays=MonthlySeries.from_arrays,
+    )
+
+
+def load_births_deaths_yearly() -> pd.DataFrame:
+    """
+    Yearly births, deaths and natural increase since 1803.
+
+    Output columns:
+    - year: int
+    - births: float
+    - deaths: float
+    - natural_increase: float (births - deaths)
+
+    Uses the official yearly totals; for years where all 12 months are
+    recorded the monthly values add up to them (up to a few historical
+    revisions in the births file).
+    """
+    births = load_births_monthly()
+    deaths = load_deaths_monthly()
+
+    # Align the two files on a common year axis (vectorized, no merge)
+    years = np.union1d(births.years, deaths.years)
+    b = np.full(len(years), np.nan)
+    d = np.full(len(years), np.nan)
+    b[np.searchsorted(years, births.years)] = births.yearly
+    d[np.searchsorted(years, deaths.years)] = deaths.yearly
+
+    return pd.DataFrame({
+        "year": years,
+        "births": b,
+        "deaths": d,
+        "natural_increase": b - d,
     })
 
-    # 5. Keep only the columns needed
-    df_total = df_total[["year", "population_total"]].reset_index(drop=True)
-    df_total["population_total"] = df_total["population_total"].astype(int)  
 
-    print("Yearly population time series shape:", df_total.shape)
-    return df_total
+# ---------------------------------------------------------------------------
+# Excel workbooks (STATPOP / DVS)
+# ---------------------------------------------------------------------------
+# Both workbooks are read with openpyxl in read-only mode (rows are streamed
+# from the XML, no cell objects or styles are kept) and only the cell range
+# holding data is kept. The normalized tables are cached as .npz, so the
+# workbook is only parsed again when it changes.
+
+@contextmanager
+def _open_workbook(path: Path):
+    """openpyxl workbook in read-only mode, closed on exit."""
+    from openpyxl import load_workbook
 
+    with warnings.catch_warnings():
+        # the FSO files have page headers openpyxl cannot parse
+        warnings.simplefilter("ignore", UserWarning)
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield wb
+        finally:
+            wb.close()
 
 
+RESIDENT_COUNTS = ["total", "age_0_19", "age_20_39", "age_40_64", "age_65_79", "age_80_plus"]
+RESIDENT_RATIOS = ["average_age", "old_age_dependency", "youth_dependency", "total_dependency"]
+
+
+def _parse_resident_demog(path: Path) -> pd.DataFrame:
+    """
+    One row per (year, citizenship, sex) from the yearly sheets.
+
+    Each sheet holds 7 data rows (Total, Swiss + Male/Female,
+    Foreigner + Male/Female) in columns A-K; the rows around them are titles
+    and footnotes with an empty column B.
+    """
+    n_cols = 1 + len(RESIDENT_COUNTS) + len(RESIDENT_RATIOS)
+    years, citizenship, sex, values = [], [], [], []
+
+    with _open_workbook(path) as wb:
+        for name in wb.sheetnames:
+            if not name.isdigit():
+                continue
+            current = "Total"
+            for row in wb[name].iter_rows(max_col=n_cols, values_only=True):
+                if not isinstance(row[1], (int, float)):
+                    continue
+                label = str(row[0]).strip()
+                if label in ("Male", "Female"):
+                    row_sex = label
+                else:
+                    current, row_sex = label, "Total"
+                years.append(int(name))
+                citizenship.append(current)
+                sex.append(row_sex)
+                values.append(row[1:])
+
+    data = np.array(values, dtype=np.float64)
+    n_counts = len(RESIDENT_COUNTS)
+    df = pd.DataFrame({"year": np.array(years, dtype=np.int64), "citizenship": citizenship, "sex": sex})
+    for j, col in enumerate(RESIDENT_COUNTS):
+        df[col] = data[:, j].astype(np.int64)
+    for j, col in enumerate(RESIDENT_RATIOS):
+        df[col] = data[:, n_counts + j]
+    return df.sort_values("year", kind="stable", ignore_index=True)
+
+
+def load_resident_demog(use_cache: bool = True) -> pd.DataFrame:
+    """
+    Permanent resident population by citizenship and sex, 2010-2024.
+
+    Output columns:
+    - year: int
+    - citizenship: "Total", "Swiss" or "Foreigner"
+    - sex: "Total", "Male" or "Female"
+    - total, age_0_19, age_20_39, age_40_64, age_65_79, age_80_plus: int
+    - average_age: float
+    - old_age_dependency, youth_dependency, total_dependency: float (in %)
+    """
+    path = RAW_DATA_DIR / "permanent_resident_demog.xlsx"
+    return cached_frame(
+        path,
+        loader=lambda: _parse_resident_demog(path),
+        parser_version=XLSX_PARSER_VERSION,
+        use_cache=use_cache,
+    )
+
+
+REMIGRATION_SHEETS = {"re-emigration": "re-emigration", "return to Switzerland": "return"}
+
+
+def _parse_remigration(path: Path) -> pd.DataFrame:
+    """
+    Long table of the cumulated cohort counts of both sheets.
+
+    Each sheet has a header row (observation years 2011 ... 2024 from
+    column D on) and blocks of rows: group, cohort year, cohort size, then
+    the cumulated count at the end of each observation year. Cells before
+    the cohort year are empty and are not stored.
+    """
+    flows, groups, cohorts, sizes, obs_years, counts = [], [], [], [], [], []
+
+    with _open_workbook(path) as wb:
+        for name, flow in REMIGRATION_SHEETS.items():
+            header = None
+            for row in wb[name].iter_rows(values_only=True):
+                if header is None:
+                    if isinstance(row[3], int):
+                        header = np.array([v for v in row[3:] if v is not None], dtype=np.int64)
+                    continue
+                if not isinstance(row[1], int):
+                    continue  # footnotes
+                cells = np.array(row[3:3 + len(header)], dtype=np.float64)
+                keep = ~np.isnan(cells)
+                n = int(keep.sum())
+                flows += [flow] * n
+                groups += [str(row[0]).strip()] * n
+                cohorts += [row[1]] * n
+                sizes += [row[2]] * n
+                obs_years.append(header[keep])
+                counts.append(cells[keep])
+
+    return pd.DataFrame({
+        "flow": flows,
+        "group": groups,
+        "cohort_year": np.array(cohorts, dtype=np.int64),
+        "cohort_size": np.array(sizes, dtype=np.int64),
+        "year": np.concatenate(obs_years),
+        "cumulated": np.concatenate(counts).astype(np.int64),
+    })
+
+
+def load_remigration(use_cache: bool = True) -> pd.DataFrame:
+    """
+    Re-emigration of immigrants and return of emigrants, by cohort (2011-2024).
+
+    Output columns:
+    - flow: "re-emigration" (immigrants who left again) or
+      "return" (emigrants who came back to Switzerland)
+    - group: "Total", "Men", "Women", "Swiss nationals", ...
+    - cohort_year: year of immigration / emigration
+    - cohort_size: number of immigrants / emigrants in the cohort
+    - year: observation year (>= cohort_year)
+    - cumulated: how many of the cohort had left / returned by that year
+    """
+    path = RAW_DATA_DIR / "remigration.xlsx"
+    return cached_frame(
+        path,
+        loader=lambda: _parse_remigration(path),
+        parser_version=XLSX_PARSER_VERSION,
+        use_cache=use_cache,
+    )
@@ -1,8 +1,15 @@
 from __future__ import annotations
 
+import logging
+
 import numpy as np
 import pandas as pd
 
+from src.forecasting import ConstantGrowth, forecast
+from src.registry import Estimator, register_model
+
+logger = logging.getLogger(__name__)
+
 
 def rmse(y_true: np.ndarray, y_pred: np.ndarray) -> float:
     """Root mean squared error."""
@@ -26,6 +33,8 @@ def evaluate_baseline_constant_growth(
 
     train = ts[ts["year"] < test_start_year].copy()
     test = ts[ts["year"] >= test_start_year].copy()
+    if train.empty or test.empty:
+        raise ValueError("Train or test is empty for this test_start_year.")
 
     # Use only part of the training window to estimate growth (1980)
     growth_window = train[train["year"] >= start_year_for_growth].copy()
@@ -34,23 +43,19 @@ def evaluate_baseline_constant_growth(
     growth_window["growth_rate"] = growth_window["population_total"].pct_change()
     avg_growth = growth_window ["growth_rate"].dropna().mean()
 
-    # Forecast for each year in test period, recursively
-    last_pop = train["population_total"].iloc[-1]
-    preds = []
-    for _ in range (len(test)): 
-        last_pop = last_pop * (1 + avg_growth)
-        preds.append(last_pop)
+    # Forecast every year of the test period from the last training year
+    pop = ts["population_total"].to_numpy()
+    y_pred = forecast(ConstantGrowth(avg_growth), pop, len(test), origins=len(train) - 1)[0]
 
     y_true = test["population_total"].values
-    y_pred = np.array(preds)
 
     test_rmse = rmse(y_true, y_pred)
     train_rmse = float("nan")
 
-    print("Baseline constant growth evaluated.")
-    print(f"Estimated avg growth (from {start_year_for_growth}): {avg_growth*100:.4f}%")
-    print(f"Test RMSE: {test_rmse:,.0f}")
-    print(f"Train n={len(train)}, Test n={len(test)}")
+    logger.info(
+        "Baseline constant growth: avg growth (from %d) %.4f%%, test RMSE %.0f, train n=%d, test n=%d",
+        start_year_for_growth, avg_growth * 100, test_rmse, len(train), len(test),
+    )
 
     results = {
         "model": "Baseline constant growth",
@@ -62,3 +67,25 @@ def evaluate_baseline_constant_growth(
     }
 
     return results
+
+
+@register_model("baseline")
+class BaselineEstimator(Estimator):
+    """Constant-growth baseline; its fitted artifact is the results dict."""
+
+    name = "Baseline constant growth"
+    start_year_for_growth = 1980
+
+    def fit(self, ts, test_start_year=2000, n_lags=2):
+        return evaluate_baseline_constant_growth(
+            ts,
+            test_start_year=test_start_year,
+            start_year_for_growth=self.start_year_for_growth,
+        )
+
+    def predict(self, fitted, ts, horizon=10):
+        pop = ts.sort_values("year")["population_total"].to_numpy(dtype=float)
+        return forecast(ConstantGrowth(fitted["avg_growth"]), pop, horizon)[0]
+
+    def evaluate(self, fitted):
+        return dict(fitted)
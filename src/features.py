@@ -1,6 +1,96 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 
-def build_ml_table(ts : pd.DataFrame, n_lags: int = 1) -> pd.DataFrame: 
+
+@dataclass(frozen=True)
+class LagTable:
+    """
+    Supervised rows of a series, as read-only views over one float buffer.
+
+    Row i is time t = index[i]:
+      - index       : (rows,) time stamps (years, or fractional years for monthly data)
+      - population  : (rows,) value at t
+      - growth_rate : (rows,) value[t] / value[t-1] - 1
+      - lags        : (rows, n_lags) value at t-1 .. t-n_lags (lag 1 first);
+                      a sliding window view, so no lag column is copied
+      - target      : (rows,) value at t+1
+    """
+
+    index: np.ndarray
+    population: np.ndarray
+    growth_rate: np.ndarray
+    lags: np.ndarray
+    target: np.ndarray
+
+    @property
+    def n_lags(self) -> int:
+        return self.lags.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.target)
+
+    def to_frame(self, index_name: str = "year") -> pd.DataFrame:
+        """Materialise the rows with build_ml_table's columns."""
+        columns = {
+            index_name: self.index,
+            "population_total": self.population,
+            "growth_rate": self.growth_rate,
+        }
+        for k in range(self.n_lags):
+            columns[f"pop_lag_{k + 1}"] = self.lags[:, k]
+        columns["target_pop_next"] = self.target
+        return pd.DataFrame(columns)
+
+
+def _read_only(a: np.ndarray) -> np.ndarray:
+    a = a.view()
+    a.flags.writeable = False
+    return a
+
+
+def lag_table(values: np.ndarray, n_lags: int = 1, index: np.ndarray | None = None) -> LagTable:
+    """
+    Lag matrix, growth rates and targets of an evenly spaced series, without
+    building a DataFrame. Works the same for yearly and monthly series
+    (e.g. MonthlySeries.flat()) and for hundreds of lags: the lag matrix is
+    a strided view, so memory stays O(len(values)) whatever n_lags is.
+
+    Rows are the times t with n_lags previous values (and at least one, for
+    the growth rate) and a next value.
+    """
+    pop = np.asarray(values, dtype=float)
+    n = len(pop)
+    index = np.arange(n) if index is None else np.asarray(index)
+    start = max(n_lags, 1)
+    if n - 1 <= start:
+        raise ValueError(f"Series of length {n} is too short for n_lags={n_lags}")
+
+    # Window i covers pop[i : i + n_lags], i.e. the lags of t = i + n_lags
+    windows = np.lib.stride_tricks.sliding_window_view(pop[:-2], n_lags)
+    lags = windows[start - n_lags:, ::-1]
+
+    current = pop[start:-1]
+    growth = current / pop[start - 1:-2] - 1.0
+
+    return LagTable(
+        index=_read_only(index[start:-1]),
+        population=_read_only(current),
+        growth_rate=growth,
+        lags=lags,
+        target=_read_only(pop[start + 1:]),
+    )
+
+
+def build_ml_table(
+    ts : pd.DataFrame,
+    n_lags: int = 1,
+    exog: pd.DataFrame | None = None,
+    as_frame: bool = True,
+) -> pd.DataFrame | LagTable: 
     """
     Turn the population time series into a supervised ML table.
 
@@ -18,6 +108,15 @@ def build_ml_table(ts : pd.DataFrame, n_lags: int = 1) -> pd.DataFrame:
         pop_lag_1 (pop at t-1)
         pop_lag_2 (pop at t-2)
 
+    exog : pd.DataFrame | None
+        Optional yearly exogenous features with a `year` column, e.g.
+        load_births_deaths_yearly() (births, deaths, natural_increase).
+        Every other column is added to the row of the same year t.
+
+    as_frame : bool
+        False returns the LagTable (array views, no DataFrame); exog and any
+        extra columns of ts are then ignored.
+
     Returns
 
     pd.Dataframe
@@ -26,29 +125,39 @@ def build_ml_table(ts : pd.DataFrame, n_lags: int = 1) -> pd.DataFrame:
         - population_toal
         - growth rate
         - pop_lag_1, pop_lag_2...
+        - exogenous columns (if exog is given)
         - target_pop_next (population at t+1)
     """
 
-    # 1) Making sure the data is sorted and copying it so not modifying the original
-    ts = ts.sort_values("year").copy()
-
-    # 2) Use float for population (better for ML)
-    ts["population_total"] = ts["population_total"].astype(float)
-
-    # 3) Year-over-year growth rate: (pop_t - pop_{t-1}) / pop_{t-1}
-    ts["growth_rate"] = ts["population_total"].pct_change()
-
-    # 4) Lag features: past population values
-    # pop_lag_1 = previous year's population
-    # pop_lag_2 = population 2 years ago, etc.
+    # 1) Sorted arrays; the lags, growth rate and target are views/arrays
+    # over this one buffer (see lag_table)
+    ts = ts.sort_values("year")
+    table = lag_table(ts["population_total"].to_numpy(dtype=float), n_lags, ts["year"].to_numpy())
+    if not as_frame:
+        return table
 
-    for k in range(1, n_lags + 1):
-        ts[f"pop_lag_{k}"] = ts["population_total"].shift(k)
+    # 2) Table: year, population_total, (other ts columns), growth_rate, lags, target
+    ts_ml = table.to_frame()
+    extra = [c for c in ts.columns if c not in ("year", "population_total")]
+    start = len(ts) - 1 - len(table)
+    for i, col in enumerate(extra):
+        ts_ml.insert(2 + i, col, ts[col].to_numpy()[start:-1])
 
-    # 5) Target we want to predict : NExt year's population
-    ts[f"target_pop_next"] = ts["population_total"].shift(-1)
+    # 3) Exogenous features, aligned on year with one searchsorted (no merge)
+    if exog is not None:
+        exog = exog.sort_values("year")
+        exog_years = exog["year"].to_numpy()
+        years = table.index
+        pos = np.searchsorted(exog_years, years).clip(0, len(exog_years) - 1)
+        found = exog_years[pos] == years
+        at = ts_ml.columns.get_loc("target_pop_next")
+        for col in exog.columns.drop("year"):
+            values = exog[col].to_numpy(dtype=float)[pos]
+            ts_ml.insert(at, col, np.where(found, values, np.nan))
+            at += 1
 
-    # 6) Drop rows with missing values (beginning + last row)
-    ts_ml = ts.dropna().reset_index(drop=True)
+    # 4) Drop rows with missing values (e.g. years without exogenous data)
+    if ts_ml.isna().to_numpy().any():
+        ts_ml = ts_ml.dropna().reset_index(drop=True)
 
-    return ts_ml
\ No newline at end of file
+    return ts_ml
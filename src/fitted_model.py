@@ -0,0 +1,48 @@
+"""
+Fitted-model artifact shared by the model, comparison and plotting code.
+
+A FittedModel keeps everything a fit produced (coefficients, predictions,
+residuals, feature columns and the train/test split), so downstream steps
+such as plots can reuse it instead of refitting.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class FittedModel:
+    """
+    name         : model label used in tables and plots, e.g. "AR(2)"
+    feature_cols : columns of the ML table used as features (in coef order)
+    intercept    : fitted intercept
+    coef         : fitted coefficients, shape (n_features,)
+    years        : year t of each ML row (the target is the population at t+1)
+    y            : target_pop_next for each row
+    y_pred       : model prediction for each row
+    train_mask   : rows used for fitting
+    test_mask    : rows used for evaluation
+    results      : summary metrics (one row of the comparison table)
+    """
+
+    name: str
+    feature_cols: list[str]
+    intercept: float
+    coef: np.ndarray
+    years: np.ndarray
+    y: np.ndarray
+    y_pred: np.ndarray
+    train_mask: np.ndarray
+    test_mask: np.ndarray
+    results: dict = field(default_factory=dict)
+
+    @property
+    def residuals(self) -> np.ndarray:
+        """Actual - predicted, for every row."""
+        return self.y - self.y_pred
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict from a feature matrix with columns in feature_cols order."""
+        return self.intercept + np.asarray(X, dtype=float) @ self.coef
@@ -0,0 +1,167 @@
+"""
+Multi-horizon recursive forecasts for many origins at once.
+
+    forecast(model, history, horizon, origins) -> array (n_origins, horizon)
+
+`history` is the observed population series and `origins` are the indices
+of the last observed value of each forecast (default: the last one).
+Row i, column h - 1 holds the forecast of history[origins[i] + h].
+
+- ConstantGrowth: closed form, pop[o] * (1 + g) ** h (a cumulative product
+  of a constant factor), for all origins and horizons in one expression.
+- LagModel whose features are linear in past levels (AR(p), i.e.
+  pop_lag_k and population_total): the recursion is written as a companion
+  matrix A over the state [pop_t, ..., pop_{t-m+1}, 1], and the h-step
+  forecast is the first row of A^h applied to each origin's state.
+- LagModel with nonlinear features (growth_rate, as in the linear model):
+  stepped one horizon at a time, vectorized over origins.
+
+Models can have one set of coefficients for every origin, or one per
+origin (intercept shape (n_origins,), coef shape (n_origins, n_features)),
+which is what walk-forward backtests need.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.fitted_model import FittedModel
+
+
+@dataclass(frozen=True)
+class ConstantGrowth:
+    """pop[t+1] = pop[t] * (1 + rate). rate: scalar, or one value per origin."""
+
+    rate: float | np.ndarray
+
+
+@dataclass(frozen=True)
+class LagModel:
+    """
+    pop[t+1] = intercept + sum_j coef_j * feature_j(t)
+
+    feature_cols : "population_total" (pop[t]), "pop_lag_k" (pop[t-k]) or
+                   "growth_rate" (pop[t] / pop[t-1] - 1), as in build_ml_table
+    intercept    : scalar, or (n_origins,)
+    coef         : (n_features,), or (n_origins, n_features)
+    """
+
+    feature_cols: tuple[str, ...]
+    intercept: float | np.ndarray
+    coef: np.ndarray
+
+    @classmethod
+    def from_fitted(cls, fit: FittedModel) -> "LagModel":
+        return cls(tuple(fit.feature_cols), fit.intercept, np.asarray(fit.coef, dtype=float))
+
+    @property
+    def is_linear(self) -> bool:
+        """True when the prediction is linear in past levels (companion form exists)."""
+        return "growth_rate" not in self.feature_cols
+
+    @property
+    def history_length(self) -> int:
+        """How many past levels (including pop[t]) the features need."""
+        return history_length(self.feature_cols)
+
+
+def history_length(feature_cols) -> int:
+    depth = 0
+    for col in feature_cols:
+        if col.startswith("pop_lag_"):
+            depth = max(depth, int(col.removeprefix("pop_lag_")))
+        elif col == "growth_rate":
+            depth = max(depth, 1)
+        elif col != "population_total":
+            raise ValueError(f"Feature {col!r} cannot be forecast recursively")
+    return depth + 1
+
+
+def lag_features(feature_cols, levels: np.ndarray) -> np.ndarray:
+    """Feature matrix (rows, n_features) from levels (rows, L), pop[t] last."""
+    cols = []
+    for col in feature_cols:
+        if col == "population_total":
+            cols.append(levels[:, -1])
+        elif col == "growth_rate":
+            cols.append(levels[:, -1] / levels[:, -2] - 1.0)
+        else:
+            cols.append(levels[:, -1 - int(col.removeprefix("pop_lag_"))])
+    return np.column_stack(cols)
+
+
+def _windows(history: np.ndarray, origins: np.ndarray, length: int) -> np.ndarray:
+    """history[o - length + 1 .. o] for every origin, shape (n_origins, length)."""
+    if origins.min() < length - 1:
+        raise ValueError(f"Origins need at least {length} observed values")
+    return np.lib.stride_tricks.sliding_window_view(history, length)[origins - length + 1]
+
+
+def companion_matrix(model: LagModel) -> np.ndarray:
+    """
+    Companion matrices (n_sets, m + 1, m + 1) of a linear LagModel, over the
+    state [pop_t, pop_{t-1}, ..., pop_{t-m+1}, 1].
+    """
+    m = model.history_length
+    coef = np.atleast_2d(model.coef)
+    intercept = np.broadcast_to(np.asarray(model.intercept, dtype=float), coef.shape[:1])
+
+    A = np.zeros((coef.shape[0], m + 1, m + 1))
+    for j, col in enumerate(model.feature_cols):
+        lag = 0 if col == "population_total" else int(col.removeprefix("pop_lag_"))
+        A[:, 0, lag] += coef[:, j]
+    A[:, 0, m] = intercept
+    A[:, np.arange(1, m), np.arange(0, m - 1)] = 1.0  # shift the state down
+    A[:, m, m] = 1.0
+    return A
+
+
+def forecast(
+    model: ConstantGrowth | LagModel | FittedModel,
+    history: np.ndarray,
+    horizon: int,
+    origins: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    h-step recursive forecasts, shape (n_origins, horizon).
+    origins are positions in history (0 .. len(history) - 1); negative
+    positions are rejected rather than counted from the end.
+    """
+    history = np.asarray(history, dtype=float)
+    origins = np.atleast_1d(
+        np.asarray(origins if origins is not None else len(history) - 1, dtype=np.int64)
+    )
+    if origins.size and (origins.min() < 0 or origins.max() >= len(history)):
+        raise ValueError(f"Origins must lie in 0..{len(history) - 1}, got {origins.min()}..{origins.max()}")
+    if isinstance(model, FittedModel):
+        model = LagModel.from_fitted(model)
+
+    # 1) Constant growth: closed form
+    if isinstance(model, ConstantGrowth):
+        factor = 1.0 + np.asarray(model.rate, dtype=float).reshape(-1, 1)
+        return history[origins, None] * factor ** np.arange(1, horizon + 1)
+
+    m = model.history_length
+    state = _windows(history, origins, m)[:, ::-1]  # pop_t first
+
+    # 2) Linear in levels: rows of the companion matrix powers
+    if model.is_linear:
+        A = companion_matrix(model)
+        state = np.column_stack([state, np.ones(len(origins))])
+        out = np.empty((len(origins), horizon))
+        row = A[:, 0, :]  # first row of A^1
+        for h in range(horizon):
+            out[:, h] = (state * row).sum(axis=1)
+            row = np.einsum("si,sij->sj", row, A)  # first row of A^(h+2)
+        return out
+
+    # 3) Nonlinear features: step over the horizon, all origins at once
+    coef = np.asarray(model.coef, dtype=float)
+    levels = np.empty((len(origins), m + horizon))
+    levels[:, :m] = state[:, ::-1]
+    for h in range(horizon):
+        t = m + h
+        X = lag_features(model.feature_cols, levels[:, t - m:t])
+        levels[:, t] = model.intercept + (X * coef).sum(axis=1)
+    return levels[:, m:]
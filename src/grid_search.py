@@ -0,0 +1,188 @@
+"""
+Parallel grid search over the evaluation settings.
+
+Runs the baseline, linear and AR models for every combination of
+test_start_year, n_lags and start_year_for_growth, spread over a pool of
+worker processes.
+
+The population series (two arrays of ~165 values) is sent to each worker
+once, through the pool initializer, instead of with every task; at that
+size a pickled copy per worker costs less than setting up shared memory.
+Tasks are sent in chunks and results are streamed back (and optionally
+appended to a CSV) as soon as each chunk completes. Grid points a model
+cannot be fit on (every model raises ValueError when test_start_year leaves
+the train or test split empty) are skipped.
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import load_population_timeseries
+from src.evaluation import evaluate_baseline_constant_growth
+from src.features import build_ml_table
+from src.models_ar import fit_ar_model
+from src.models_linear import fit_linear_model
+
+# fit_linear_model only uses pop_lag_1 and pop_lag_2
+LINEAR_MAX_LAGS = 2
+
+logger = logging.getLogger(__name__)
+
+# Worker-side state (set by _init_worker)
+_TS: pd.DataFrame | None = None
+_ML_CACHE: dict[int, pd.DataFrame] = {}
+
+# Fixed schema: every model's result dict is mapped onto these columns
+RESULT_COLUMNS = [
+    "test_start_year", "n_lags", "start_year_for_growth", "model",
+    "train_rmse", "test_rmse", "avg_growth", "n_features", "train_size", "test_size",
+]
+
+
+def _init_worker(years: np.ndarray, population: np.ndarray) -> None:
+    """Keep the series sent to this worker for all its tasks."""
+    global _TS
+    _TS = pd.DataFrame({"year": years, "population_total": population})
+
+
+def _ml_table(n_lags: int) -> pd.DataFrame:
+    """ML tables only depend on n_lags: build each one once per worker."""
+    if n_lags not in _ML_CACHE:
+        _ML_CACHE[n_lags] = build_ml_table(_TS, n_lags=n_lags)
+    return _ML_CACHE[n_lags]
+
+
+def _run_task(task: tuple) -> list[dict]:
+    """Evaluate one grid point. task = (kind, test_start_year, param)."""
+    kind, test_start_year, param = task
+    row = {"test_start_year": test_start_year, "n_lags": np.nan, "start_year_for_growth": np.nan}
+
+    try:
+        if kind == "baseline":
+            res = evaluate_baseline_constant_growth(
+                _TS, test_start_year=test_start_year, start_year_for_growth=param
+            )
+            row["start_year_for_growth"] = param
+        elif kind == "linear":
+            res = fit_linear_model(_ml_table(param), test_start_year=test_start_year)
+            row["n_lags"] = param
+        else:
+            res = fit_ar_model(_ml_table(param), test_start_year=test_start_year, n_lags=param)
+            row["n_lags"] = param
+    except ValueError as exc:
+        logger.debug("Skipping grid point %s: %s", task, exc)
+        return []
+
+    if res is None:
+        return []
+    if kind != "baseline":
+        res = res.results
+    return [{**row, **res}]
+
+
+def _run_chunk(tasks: list[tuple]) -> list[dict]:
+    rows: list[dict] = []
+    for task in tasks:
+        rows += _run_task(task)
+    return rows
+
+
+def build_grid(
+    test_start_years: Iterable[int],
+    n_lags_values: Iterable[int],
+    growth_start_years: Iterable[int],
+) -> list[tuple]:
+    """
+    Distinct model fits needed for the grid.
+    The baseline does not depend on n_lags and the regressions do not depend
+    on start_year_for_growth, so those combinations are not repeated. The
+    linear model uses at most LINEAR_MAX_LAGS lags, so it is not refit for
+    larger n_lags (that would only drop a few early rows).
+    """
+    tsy = list(test_start_years)
+    lags = list(n_lags_values)
+    growth = list(growth_start_years)
+
+    tasks = [("baseline", y, g) for y, g in itertools.product(tsy, growth) if g < y]
+    tasks += [("linear", y, p) for y, p in itertools.product(tsy, lags) if p <= LINEAR_MAX_LAGS]
+    tasks += [("ar", y, p) for y, p in itertools.product(tsy, lags)]
+    return tasks
+
+
+def run_grid(
+    test_start_years: Iterable[int] = range(1980, 2021),
+    n_lags_values: Iterable[int] = range(1, 11),
+    growth_start_years: Iterable[int] = range(1950, 2000, 5),
+    max_workers: int | None = None,
+    chunk_size: int = 16,
+    out_csv: Path | None = None,
+    on_result: Callable[[list[dict]], None] | None = None,
+    ts: pd.DataFrame | None = None,
+) -> pd.DataFrame:
+    """
+    Evaluate every grid point in parallel and return one results table.
+
+    Rows are collected as chunks complete (so the order is not fixed).
+    If out_csv is given, each completed chunk is appended to it right away;
+    on_result is called with each completed chunk's rows.
+    """
+    if ts is None:
+        ts = load_population_timeseries()
+    ts = ts.sort_values("year")
+
+    tasks = build_grid(test_start_years, n_lags_values, growth_start_years)
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+    if out_csv is not None:
+        out_csv = Path(out_csv)
+        out_csv.parent.mkdir(parents=True, exist_ok=True)
+        out_csv.unlink(missing_ok=True)
+
+    # 1) Each worker gets the series once, when it starts
+    rows: list[dict] = []
+    with ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(ts["year"].to_numpy(dtype=int), ts["population_total"].to_numpy(dtype=float)),
+    ) as pool:
+        futures = [pool.submit(_run_chunk, chunk) for chunk in chunks]
+
+        # 2) Stream results as they complete
+        for fut in as_completed(futures):
+            chunk_rows = fut.result()
+            rows += chunk_rows
+            if out_csv is not None and chunk_rows:
+                pd.DataFrame(chunk_rows, columns=RESULT_COLUMNS).to_csv(
+                    out_csv, mode="a", header=not out_csv.exists(), index=False
+                )
+            if on_result is not None:
+                on_result(chunk_rows)
+
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def main() -> None:
+    tables_dir = Path(__file__).resolve().parents[1] / "results" / "tables"
+
+    t0 = time.perf_counter()
+    df = run_grid(out_csv=tables_dir / "grid_search.csv")
+    elapsed = time.perf_counter() - t0
+
+    print(f"Grid search: {len(df)} fits in {elapsed:.2f} s")
+    best = df.sort_values("test_rmse").groupby("test_start_year").head(1)
+    print("\nBest model per test_start_year:\n")
+    print(best[["test_start_year", "model", "n_lags", "start_year_for_growth", "test_rmse"]]
+          .sort_values("test_start_year").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Lightweight instrumentation: logging, stage timers, counters, profiling.
+
+Diagnostics go through the `logging` module (loggers named after the
+modules, e.g. "src.models_ar"). Nothing is configured by default, so
+library code is silent below WARNING; scripts call configure_logging().
+
+Stage timers and counters are off unless enabled (enable() or the
+environment variable POPGROWTH_INSTRUMENT=1). When off, stage() and
+count() return right away, so sweeps pay almost nothing for them:
+
+    with stage("fit_ar_model", rows=len(df)):
+        ...
+    count("rows_parsed", n)
+
+Profiling is toggled with POPGROWTH_PROFILE ("cprofile", "tracemalloc" or
+both, comma-separated) and applies to code run inside profiling(). With
+tracemalloc on, every stage also records its peak traced memory.
+
+run_report() / write_run_report() collect stage durations, rows processed,
+counters and peak memory as JSON.
+
+Stages may run in several threads at once (e.g. registry.run_models with
+executor="thread"): each thread has its own stack of open stages, and the
+shared records and counters are guarded by a lock. tracemalloc peaks are
+process-wide, so with concurrent stages a stage's peak also covers what the
+other threads allocated meanwhile.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = "%(levelname)-7s %(name)s: %(message)s"
+
+_ENABLED = os.environ.get("POPGROWTH_INSTRUMENT", "0").strip().lower() in {"1", "true", "yes", "on"}
+_RECORDS: list["StageRecord"] = []
+_COUNTERS: dict[str, int] = {}
+_LOCK = threading.Lock()  # guards _RECORDS and _COUNTERS
+_LOCAL = threading.local()  # per-thread stack of open stages
+_STARTED = time.perf_counter()
+
+
+@dataclass
+class StageRecord:
+    """
+    name         : stage name
+    seconds      : wall time
+    rows         : rows processed (if the stage reports it)
+    peak_mem_mb  : peak traced memory during the stage (only with tracemalloc)
+    """
+
+    name: str
+    seconds: float = 0.0
+    rows: int | None = None
+    peak_mem_mb: float | None = None
+
+
+def configure_logging(level: int | str | None = None) -> None:
+    """
+    Log the project's messages to stderr. The level defaults to
+    POPGROWTH_LOG_LEVEL (or INFO).
+    """
+    level = level or os.environ.get("POPGROWTH_LOG_LEVEL", "INFO")
+    root = logging.getLogger("src")
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def enable(on: bool = True) -> None:
+    """Turn stage timers and counters on or off."""
+    global _ENABLED
+    _ENABLED = on
+
+
+def enabled() -> bool:
+    return _ENABLED
+
+
+def reset() -> None:
+    """Forget recorded stages and counters."""
+    global _STARTED
+    with _LOCK:
+        _RECORDS.clear()
+        _COUNTERS.clear()
+    _stack().clear()
+    _STARTED = time.perf_counter()
+
+
+def _stack() -> list[StageRecord]:
+    """Open stages of the current thread, innermost last."""
+    if not hasattr(_LOCAL, "stack"):
+        _LOCAL.stack = []
+    return _LOCAL.stack
+
+
+def record(name: str, seconds: float, rows: int | None = None, peak_mem_mb: float | None = None) -> None:
+    """Add a stage measured elsewhere (e.g. in a worker process)."""
+    if _ENABLED:
+        with _LOCK:
+            _RECORDS.append(StageRecord(name, seconds, rows, peak_mem_mb))
+
+
+def count(name: str, n: int = 1) -> None:
+    if _ENABLED:
+        with _LOCK:
+            _COUNTERS[name] = _COUNTERS.get(name, 0) + n
+
+
+@contextmanager
+def stage(name: str, rows: int | None = None):
+    """
+    Time the enclosed block. Yields the StageRecord (or None when disabled),
+    so the block can set .rows once it knows them.
+    """
+    if not _ENABLED:
+        yield None
+        return
+
+    rec = StageRecord(name, rows=rows)
+    stack = _stack()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        _flush_peak(stack)
+        tracemalloc.reset_peak()
+    stack.append(rec)
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec.seconds = time.perf_counter() - t0
+        if stack and stack[-1] is rec:  # reset() may have emptied it meanwhile
+            stack.pop()
+        if tracing:
+            peak = max(tracemalloc.get_traced_memory()[1] / 1e6, rec.peak_mem_mb or 0.0)
+            rec.peak_mem_mb = peak
+            if stack:  # the parent's peak includes its children
+                parent = stack[-1]
+                parent.peak_mem_mb = max(parent.peak_mem_mb or 0.0, peak)
+            tracemalloc.reset_peak()
+        with _LOCK:
+            _RECORDS.append(rec)
+        logger.debug("stage %s: %.4f s", name, rec.seconds)
+
+
+def _flush_peak(stack: list[StageRecord]) -> None:
+    """Fold the peak since the last reset into the enclosing stage of this thread."""
+    if stack:
+        parent = stack[-1]
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        parent.peak_mem_mb = max(parent.peak_mem_mb or 0.0, peak)
+
+
+def profile_modes() -> set[str]:
+    value = os.environ.get("POPGROWTH_PROFILE", "")
+    return {m.strip().lower() for m in value.split(",") if m.strip()}
+
+
+@contextmanager
+def profiling(out_dir: Path | None = None, top: int = 15):
+    """
+    Profile the enclosed block according to POPGROWTH_PROFILE.
+    cProfile stats are written to out_dir/profile.prof (if out_dir is given)
+    and the top functions by cumulative time are logged.
+    """
+    modes = profile_modes()
+    profiler = cProfile.Profile() if "cprofile" in modes else None
+    started_tracing = "tracemalloc" in modes and not tracemalloc.is_tracing()
+
+    if started_tracing:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            if out_dir is not None:
+                out_dir = Path(out_dir)
+                out_dir.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(out_dir / "profile.prof")
+            buf = io.StringIO()
+            pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(top)
+            logger.info("cProfile (top %d by cumulative time):\n%s", top, buf.getvalue())
+        if started_tracing:
+            _, peak = tracemalloc.get_traced_memory()
+            with _LOCK:
+                _COUNTERS["peak_traced_bytes"] = max(_COUNTERS.get("peak_traced_bytes", 0), peak)
+            tracemalloc.stop()
+
+
+def run_report() -> dict:
+    """Stage durations, rows, counters and peak memory recorded so far."""
+    with _LOCK:
+        records = list(_RECORDS)
+        counters = dict(_COUNTERS)
+    peaks = [r.peak_mem_mb for r in records if r.peak_mem_mb is not None]
+    if "peak_traced_bytes" in counters:
+        peaks.append(counters["peak_traced_bytes"] / 1e6)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "wall_seconds": time.perf_counter() - _STARTED,
+        "stages": [asdict(r) for r in records],
+        "counters": counters,
+        "peak_mem_mb": max(peaks) if peaks else None,
+    }
+
+
+def write_run_report(path: Path) -> dict:
+    report = run_report()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+    logger.info("Run report written to %s", path)
+    return report
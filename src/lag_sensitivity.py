@@ -3,11 +3,11 @@ from __future__ import annotations
 from pathlib import Path
 
 import pandas as pd
-import matplotlib.pyplot as plt
 
 from src.data_loader import load_population_timeseries
-from src.features import build_ml_table
-from src.models_ar import fit_ar_model
+from src.models_ar import fit_ar_orders
+from src.rendering import FigureSpec, render_figures
+from src.run_store import save_table
 
 
 def ensure_results_dirs() -> tuple[Path, Path]:
@@ -26,18 +26,21 @@ def run_lag_sensitivity(
 ) -> pd.DataFrame:
     """
     Fit AR(p) models for p=1..max_lag and return a comparison DataFrame.
-    Uses the same ML table builder so columns match pop_lag_1, pop_lag_2, ...
+    Each order is fit on its full sample (as in the model comparison table),
+    with AIC/BIC alongside the train/test RMSE; the AIC/BIC of different
+    orders come from different samples.
     """
     ts = load_population_timeseries()
-    results: list[dict] = []
+    df = fit_ar_orders(ts, max_lag=max_lag, test_start_year=test_start_year, common_sample=False)
+    return df.drop(columns=["coefs"])
 
-    for p in range(1, max_lag + 1):
-        ml = build_ml_table(ts, n_lags=p)
-        res = fit_ar_model(ml, test_start_year=test_start_year, n_lags=p)
-        results.append(res)
 
-    df = pd.DataFrame(results)
-    return df
+def draw_rmse_vs_lag(fig, n_lags, test_rmse) -> None:
+    ax = fig.add_subplot()
+    ax.plot(n_lags, test_rmse, marker="o")
+    ax.set_xlabel("AR lag order (p)")
+    ax.set_ylabel("Test RMSE")
+    ax.set_title("Lag sensitivity: AR(p) test error")
 
 
 def plot_rmse_vs_lag(df: pd.DataFrame, out_path: Path) -> None:
@@ -45,32 +48,34 @@ def plot_rmse_vs_lag(df: pd.DataFrame, out_path: Path) -> None:
     df_plot = df.copy()
     df_plot = df_plot.sort_values("n_lags")
 
-    plt.figure(figsize=(9, 5))
-    plt.plot(df_plot["n_lags"], df_plot["test_rmse"], marker="o")
-    plt.xlabel("AR lag order (p)")
-    plt.ylabel("Test RMSE")
-    plt.title("Lag sensitivity: AR(p) test error")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    plt.close()
+    spec = FigureSpec(
+        out_path,
+        draw_rmse_vs_lag,
+        dict(n_lags=df_plot["n_lags"].to_numpy(), test_rmse=df_plot["test_rmse"].to_numpy()),
+        figsize=(9, 5),
+    )
+    render_figures([spec])
 
 
 def main() -> None:
     figures_dir, tables_dir = ensure_results_dirs()
 
-    df = run_lag_sensitivity(test_start_year=2000, max_lag=5)
+    params = {"test_start_year": 2000, "max_lag": 5}
+    df = run_lag_sensitivity(**params)
 
     csv_path = tables_dir / "lag_sensitivity_ar.csv"
     fig_path = figures_dir / "lag_sensitivity_ar.png"
 
-    df.to_csv(csv_path, index=False)
+    # Every run is appended to the run store; the CSV holds the latest one
+    stored = save_table("lag_sensitivity", df, csv_path=csv_path, params=params)
     plot_rmse_vs_lag(df, fig_path)
 
     print("\n✅ Lag sensitivity finished.")
     print(f"Saved table:  {csv_path}")
+    print(f"Run store:    {stored}")
     print(f"Saved figure: {fig_path}")
     print("\nResults preview:\n")
-    print(df[["model", "n_lags", "train_rmse", "test_rmse", "train_size", "test_size"]])
+    print(df[["model", "n_lags", "train_rmse", "test_rmse", "aic", "bic", "train_size", "test_size"]])
 
 
 if __name__ == "__main__":
@@ -1,17 +1,28 @@
 from __future__ import annotations
 
+import logging
+
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
+
+from src.features import build_ml_table
+from src.fitted_model import FittedModel
+from src.registry import Estimator, register_model
+
+logger = logging.getLogger(__name__)
 
 def fit_ar_model(
         ml_df: pd.DataFrame,
         test_start_year: int = 2000,
         n_lags: int = 2,
-) -> dict: 
+) -> FittedModel: 
     
     """
     Fit an autoregressive (AR) model using only lagged population values.
+
+    Returns a FittedModel; its `results` dict is the row used in the
+    model comparison table. Raises ValueError if test_start_year leaves the
+    train or test split empty.
     """
 
     df = ml_df.copy()
@@ -23,24 +34,28 @@ def fit_ar_model(
 
     train = df["year"] < test_start_year
     test = df["year"] >= test_start_year
+    if not train.any() or not test.any():
+        raise ValueError("Train or test is empty for this test_start_year.")
 
     X_train, X_test = X[train], X[test]
     y_train, y_test = y[train], y[test]
 
+    from sklearn.linear_model import LinearRegression  # only needed to fit
+
     model = LinearRegression()
     model.fit(X_train, y_train)
 
-    y_train_pred = model.predict(X_train)
-    y_test_pred = model.predict(X_test)
+    y_pred = model.predict(X)
+    y_train_pred = y_pred[train.to_numpy()]
+    y_test_pred = y_pred[test.to_numpy()]
 
     rmse_train = np.sqrt(np.mean((y_train - y_train_pred) ** 2))
     rmse_test = np.sqrt(np.mean((y_test - y_test_pred) ** 2))
 
-    print("AR model fitted.")
-    print(f"AR order: {n_lags}")
-    print(f"Train RMSE: {rmse_train:,.0f}")
-    print(f"Test  RMSE: {rmse_test:,.0f}")
-    print(f"Train n={len(X_train)}, Test n={len(X_test)}")
+    logger.info(
+        "AR(%d) fitted: train RMSE %.0f, test RMSE %.0f, train n=%d, test n=%d",
+        n_lags, rmse_train, rmse_test, len(X_train), len(X_test),
+    )
 
     results = {
         "model": f"AR({n_lags})",
@@ -51,9 +66,131 @@ def fit_ar_model(
         "test_size": len(X_test),
     }
 
-    return results
-
+    return FittedModel(
+        name=f"AR({n_lags})",
+        feature_cols=lag_cols,
+        intercept=float(model.intercept_),
+        coef=np.asarray(model.coef_, dtype=float),
+        years=df["year"].to_numpy(),
+        y=y.to_numpy(dtype=float),
+        y_pred=y_pred,
+        train_mask=train.to_numpy(),
+        test_mask=test.to_numpy(),
+        results=results,
+    )
+
+
+def fit_ar_orders(
+        ts: pd.DataFrame,
+        max_lag: int = 5,
+        test_start_year: int = 2000,
+        common_sample: bool = True,
+) -> pd.DataFrame:
+    """
+    Fit AR(1) ... AR(max_lag) in one pass.
+
+    Same model as fit_ar_model (target = population at t+1, features =
+    pop_lag_1..pop_lag_p plus an intercept), but the lag (Hankel) matrix is
+    built once up to max_lag and factorised once with QR. Because the
+    columns are nested, the QR of the first p + 1 columns is the top-left
+    block of the full QR, so every order is solved from the same R and Q'y.
+
+    By default all orders use the same sample (rows where max_lag lags
+    exist), which is what makes their train RMSE and information criteria
+    comparable. With common_sample=False each order is fit on every row
+    where its own lags exist, like fit_ar_model (same numbers as the model
+    comparison table, one QR per order; AIC/BIC are then not comparable
+    across orders).
+
+    Returns one row per order: model, n_lags, intercept, coefs, train_rmse,
+    test_rmse, aic, bic, train_size, test_size.
+    """
+    if not common_sample:
+        # AR(p) is the last row of the common-sample fit up to p
+        rows = [fit_ar_orders(ts, max_lag=p, test_start_year=test_start_year).iloc[-1:]
+                for p in range(1, max_lag + 1)]
+        return pd.concat(rows, ignore_index=True)
+
+    ts = ts.sort_values("year")
+    pop = ts["population_total"].to_numpy(dtype=float)
+
+    # 1) Rows t = max_lag .. n-2: lags pop[t-1..t-max_lag], target pop[t+1]
+    table = build_ml_table(ts, n_lags=max_lag, as_frame=False)
+    lags = table.lags  # column k-1 holds pop_lag_k
+    y = table.target
+    row_years = table.index
+
+    # One common scale for the population columns keeps QR well behaved
+    scale = pop.mean()
+    Z = np.column_stack([np.ones(len(y)), lags / scale])
+    yz = y / scale
+
+    train = row_years < test_start_year
+    test = ~train
+    if train.sum() <= max_lag + 1 or test.sum() == 0:
+        raise ValueError("Train or test is empty (or too short) for this test_start_year.")
+
+    # 2) One QR for all orders
+    Q, R = np.linalg.qr(Z[train])
+    qty = Q.T @ yz[train]
+
+    # B[p-1] = [intercept, coef_1..coef_p, 0...] for order p
+    B = np.zeros((max_lag, max_lag + 1))
+    for p in range(1, max_lag + 1):
+        k = p + 1
+        B[p - 1, :k] = np.linalg.solve(R[:k, :k], qty[:k])
+
+    # 3) Predictions of every order at once: (rows, orders)
+    preds = (Z @ B.T) * scale
+    resid = y[:, None] - preds
+
+    n_train = int(train.sum())
+    rss = (resid[train] ** 2).sum(axis=0)
+    train_rmse = np.sqrt(rss / n_train)
+    test_rmse = np.sqrt((resid[test] ** 2).mean(axis=0))
+
+    orders = np.arange(1, max_lag + 1)
+    n_params = orders + 1
+    aic = n_train * np.log(rss / n_train) + 2 * n_params
+    bic = n_train * np.log(rss / n_train) + n_params * np.log(n_train)
+
+    return pd.DataFrame({
+        "model": [f"AR({p})" for p in orders],
+        "n_lags": orders,
+        "intercept": B[:, 0] * scale,
+        "coefs": [B[p - 1, 1:p + 1].copy() for p in orders],
+        "train_rmse": train_rmse,
+        "test_rmse": test_rmse,
+        "aic": aic,
+        "bic": bic,
+        "train_size": n_train,
+        "test_size": int(test.sum()),
+    })
+
+
+def sweep_ar_orders(
+        ts: pd.DataFrame,
+        max_lag: int = 30,
+        test_start_years: list[int] | None = None,
+) -> pd.DataFrame:
+    """
+    Run fit_ar_orders for several split years and stack the results
+    (one extra column: test_start_year).
+    """
+    if test_start_years is None:
+        test_start_years = list(range(1980, 2021))
 
+    frames = []
+    for year in test_start_years:
+        df = fit_ar_orders(ts, max_lag=max_lag, test_start_year=year)
+        df.insert(0, "test_start_year", year)
+        frames.append(df)
 
+    return pd.concat(frames, ignore_index=True)
 
 
+@register_model("ar")
+class AREstimator(Estimator):
+    def fit(self, ts, test_start_year=2000, n_lags=2):
+        ml = build_ml_table(ts, n_lags=n_lags)
+        return fit_ar_model(ml, test_start_year=test_start_year, n_lags=n_lags)
@@ -0,0 +1,363 @@
+"""
+Component (demographic accounting) model.
+
+Population change follows the balancing equation
+
+    pop[t] - pop[t-1] = births[t] - deaths[t] + net_migration[t]
+
+Births and deaths come from the BEVNAT files. Net migration is taken as the
+residual of the equation (it also absorbs status changes and statistical
+corrections), so the identity holds exactly on the observed data. The
+remigration workbook only covers the immigration/emigration cohorts of
+2011-2024; immigrants - emigrants from it can be added as a cross-check
+column (net_migration_dvs, with_dvs=True), not as the modelled series. It
+differs from the residual by up to ~60% in single years (e.g. 2022), so
+it is only reported, not used as a tolerance check.
+
+Each component gets its own AR(p) model with an intercept. The three
+regressions share the same rows, so they are solved as one batch (one
+stacked QR), and forecasts step all components forward together.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import load_births_deaths_yearly, load_population_timeseries, load_remigration
+from src.fitted_model import FittedModel
+from src.registry import Estimator, register_model
+
+COMPONENTS = ("births", "deaths", "net_migration")
+
+# Sign of each component in the balancing equation
+SIGNS = np.array([1.0, -1.0, 1.0])
+
+logger = logging.getLogger(__name__)
+
+
+def component_table(
+    ts: pd.DataFrame,
+    vital: pd.DataFrame | None = None,
+    with_dvs: bool = False,
+) -> pd.DataFrame:
+    """
+    Yearly population and its components.
+
+    Output columns: year, population_total, births, deaths, natural_increase,
+    net_migration (residual), and with with_dvs=True net_migration_dvs
+    (2011-2024 only, else NaN; reads the remigration workbook).
+    Only years with a previous population and both vital counts are kept.
+    """
+    if vital is None:
+        vital = load_births_deaths_yearly()
+
+    ts = ts.sort_values("year")
+    years = ts["year"].to_numpy()
+    pop = ts["population_total"].to_numpy(dtype=float)
+
+    # Align births/deaths on the population years
+    vital = vital.sort_values("year")
+    v_years = vital["year"].to_numpy()
+    pos = np.searchsorted(v_years, years).clip(0, len(v_years) - 1)
+    found = v_years[pos] == years
+    births = np.where(found, vital["births"].to_numpy(dtype=float)[pos], np.nan)
+    deaths = np.where(found, vital["deaths"].to_numpy(dtype=float)[pos], np.nan)
+
+    change = np.full(len(pop), np.nan)
+    change[1:] = np.diff(pop)
+    natural = births - deaths
+
+    df = pd.DataFrame({
+        "year": years,
+        "population_total": pop,
+        "births": births,
+        "deaths": deaths,
+        "natural_increase": natural,
+        "net_migration": change - natural,
+    })
+
+    # Optional cross-check: immigrants - emigrants of each DVS cohort year
+    if with_dvs:
+        remig = load_remigration()
+        sizes = (
+            remig[remig["group"] == "Total"]
+            .drop_duplicates(["flow", "cohort_year"])
+            .pivot(index="cohort_year", columns="flow", values="cohort_size")
+        )
+        dvs = pd.Series(sizes["re-emigration"] - sizes["return"], dtype=float)
+        df["net_migration_dvs"] = dvs.reindex(years).to_numpy()
+
+    return df.dropna(subset=list(COMPONENTS)).reset_index(drop=True)
+
+
+def sanity_check_accounting(pop: np.ndarray, components: np.ndarray, tol: float = 1e-9) -> float:
+    """
+    Sanity check that pop[i] - pop[i-1] == births - deaths + net_migration
+    for every step.
+
+    Net migration is the residual of this equation and forecasts are built
+    as cumulative sums of the components, so it holds by construction: it
+    only catches misaligned arrays or sign errors in this module, not bad
+    data.
+
+    pop        : (n + 1,) population levels (the first one is the start level)
+    components : (3, n) births, deaths, net migration of the n steps
+    Returns the largest relative gap; raises ValueError if it exceeds tol.
+    """
+    gap = np.diff(pop) - SIGNS @ components
+    rel = float(np.max(np.abs(gap) / np.abs(pop[1:]), initial=0.0))
+    if rel > tol:
+        raise ValueError(f"Accounting identity violated (max relative gap {rel:.2e})")
+    return rel
+
+
+@dataclass
+class ComponentModel:
+    """
+    One AR(n_lags) model per component.
+
+    intercepts : (3,) intercept of each component's model
+    coefs      : (3, n_lags) coefficient of lag 1 .. n_lags for each component
+    """
+
+    n_lags: int
+    intercepts: np.ndarray
+    coefs: np.ndarray
+
+    def step(self, lags: np.ndarray) -> np.ndarray:
+        """
+        Next value of every component.
+        lags: (3, ..., n_lags) with lag 1 first; returns shape (3, ...).
+        """
+        return self.intercepts.reshape((3,) + (1,) * (lags.ndim - 2)) + np.einsum(
+            "c...k,ck->c...", lags, self.coefs
+        )
+
+    def forecast(self, table: pd.DataFrame, horizon: int = 10) -> pd.DataFrame:
+        """
+        Recursive forecast of the components and the total after the last
+        year of `table` (from component_table).
+
+        Returns year, births, deaths, net_migration, population_total.
+        """
+        comp = table[list(COMPONENTS)].to_numpy(dtype=float).T  # (3, n)
+        return self.forecast_from(
+            comp[:, -self.n_lags:],
+            float(table["population_total"].iloc[-1]),
+            int(table["year"].iloc[-1]),
+            horizon,
+        )
+
+    def forecast_from(
+        self,
+        last_components: np.ndarray,
+        pop_last: float,
+        last_year: int,
+        horizon: int = 10,
+    ) -> pd.DataFrame:
+        """
+        Same as forecast(), from the (3, n_lags) components of the last
+        n_lags years (oldest first) and the population of last_year.
+        """
+        path = np.empty((3, self.n_lags + horizon))
+        path[:, :self.n_lags] = last_components
+        for h in range(horizon):
+            t = self.n_lags + h
+            path[:, t] = self.step(path[:, t - self.n_lags:t][:, ::-1])
+        future = path[:, self.n_lags:]
+
+        pop = pop_last + np.concatenate([[0.0], np.cumsum(SIGNS @ future)])
+        sanity_check_accounting(pop, future)
+
+        out = pd.DataFrame(future.T, columns=list(COMPONENTS))
+        out.insert(0, "year", np.arange(last_year + 1, last_year + 1 + horizon))
+        out["population_total"] = pop[1:]
+        return out
+
+
+@dataclass
+class ComponentsFit(FittedModel):
+    """
+    FittedModel of the component model, plus what predict() needs to step
+    the components forward without rebuilding the table or refitting:
+
+    component_model  : the per-component AR models
+    last_components  : (3, n_lags) components of the last n_lags years
+    last_population  : population of last_year
+    last_year        : last year of the component table
+    """
+
+    component_model: ComponentModel | None = None
+    last_components: np.ndarray = field(default_factory=lambda: np.empty((3, 0)))
+    last_population: float = float("nan")
+    last_year: int = 0
+
+
+def _lag_design(comp: np.ndarray, n_lags: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Lagged design for every component at once.
+
+    comp: (3, n). Row r predicts comp[:, r + n_lags] from the n_lags values
+    before it (lag 1 first). Returns X (3, n - n_lags, n_lags) and
+    y (3, n - n_lags).
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(comp[:, :-1], n_lags, axis=1)
+    return windows[..., ::-1], comp[:, n_lags:]
+
+
+def estimate_components(comp: np.ndarray, train: np.ndarray, n_lags: int) -> ComponentModel:
+    """
+    Fit the three AR(n_lags) models on the rows where `train` is True,
+    with one batched QR (components have very different scales, so each is
+    divided by its mean absolute value first).
+    """
+    X, y = _lag_design(comp, n_lags)
+    scale = np.abs(comp).mean(axis=1)[:, None]
+
+    Xs = X[:, train] / scale[:, :, None]
+    ys = y[:, train] / scale
+    Z = np.concatenate([np.ones(Xs.shape[:2] + (1,)), Xs], axis=2)
+
+    Q, R = np.linalg.qr(Z)  # stacked: (3, rows, k), (3, k, k)
+    qty = np.einsum("crk,cr->ck", Q, ys)
+    B = np.linalg.solve(R, qty[..., None])[..., 0]
+
+    return ComponentModel(
+        n_lags=n_lags,
+        intercepts=B[:, 0] * scale[:, 0],
+        coefs=B[:, 1:].copy(),
+    )
+
+
+def fit_components_model(
+    ts: pd.DataFrame | None = None,
+    test_start_year: int = 2000,
+    n_lags: int = 2,
+    vital: pd.DataFrame | None = None,
+) -> ComponentsFit:
+    """
+    Fit the component model and evaluate it like the other models:
+    row t predicts the population at t+1 from the population at t and the
+    observed components up to t (one-step ahead).
+
+    The one-step prediction is linear in
+    [population_total, births_lag_1.., deaths_lag_1.., net_migration_lag_1..],
+    so the returned FittedModel has a regular intercept/coef pair
+    (deaths enter with a minus sign).
+    """
+    if ts is None:
+        ts = load_population_timeseries()
+    table = component_table(ts, vital)
+
+    years = table["year"].to_numpy()
+    pop = table["population_total"].to_numpy(dtype=float)
+    comp = table[list(COMPONENTS)].to_numpy(dtype=float).T
+
+    # The residual net migration closes the balancing equation exactly
+    sanity_check_accounting(pop, comp[:, 1:])
+
+    # Row r: year t = years[r + n_lags - 1], components at t+1 predicted
+    X, y = _lag_design(comp, n_lags)
+    row_years = years[n_lags - 1:-1]
+    train = row_years < test_start_year
+    test = ~train
+    if train.sum() <= n_lags + 1 or test.sum() == 0:
+        raise ValueError("Train or test is empty (or too short) for this test_start_year.")
+
+    model = estimate_components(comp, train, n_lags)
+
+    # Component forecasts for every row (3, rows), then the total
+    comp_pred = model.step(X)
+    pop_now = pop[n_lags - 1:-1]
+    y_pop = pop[n_lags:]
+    y_pred = pop_now + SIGNS @ comp_pred
+
+    rmse_train = np.sqrt(np.mean((y_pop[train] - y_pred[train]) ** 2))
+    rmse_test = np.sqrt(np.mean((y_pop[test] - y_pred[test]) ** 2))
+    comp_rmse = np.sqrt(np.mean((y[:, test] - comp_pred[:, test]) ** 2, axis=1))
+
+    logger.info(
+        "Component model fitted (AR(%d) per component): train RMSE %.0f, test RMSE %.0f",
+        n_lags, rmse_train, rmse_test,
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        for name, r in zip(COMPONENTS, comp_rmse):
+            logger.debug("  %-14s test RMSE: %.0f", name, r)
+
+    name = "Components (births, deaths, migration)"
+    results = {
+        "model": name,
+        "train_rmse": float(rmse_train),
+        "test_rmse": float(rmse_test),
+        "n_lags": n_lags,
+        "train_size": int(train.sum()),
+        "test_size": int(test.sum()),
+    }
+
+    feature_cols = ["population_total"] + [
+        f"{c}_lag_{k}" for c in COMPONENTS for k in range(1, n_lags + 1)
+    ]
+    coef = np.concatenate([[1.0], (SIGNS[:, None] * model.coefs).ravel()])
+
+    return ComponentsFit(
+        name=name,
+        feature_cols=feature_cols,
+        intercept=float(SIGNS @ model.intercepts),
+        coef=coef,
+        years=row_years,
+        y=y_pop,
+        y_pred=y_pred,
+        train_mask=train,
+        test_mask=test,
+        results=results,
+        component_model=model,
+        last_components=comp[:, -n_lags:].copy(),
+        last_population=float(pop[-1]),
+        last_year=int(years[-1]),
+    )
+
+
+@register_model("components")
+class ComponentsEstimator(Estimator):
+    name = "Components (births, deaths, migration)"
+
+    def fit(self, ts, test_start_year=2000, n_lags=2):
+        return fit_components_model(ts, test_start_year=test_start_year, n_lags=n_lags)
+
+    def predict(self, fitted, ts, horizon=10):
+        # Step the models estimated in fit() forward from the stored last
+        # components (ts is normally the series that was fit)
+        model = fitted.component_model
+        last_year = int(ts["year"].max())
+        if last_year == fitted.last_year:
+            out = model.forecast_from(fitted.last_components, fitted.last_population, fitted.last_year, horizon)
+        else:
+            # Callers label the forecast from last_year + 1: the components
+            # must reach that year too (births/deaths may end earlier)
+            table = component_table(ts)
+            if int(table["year"].iloc[-1]) != last_year:
+                raise ValueError(
+                    f"Components end in {int(table['year'].iloc[-1])} but the series ends in "
+                    f"{last_year}; cannot forecast the years after {last_year}"
+                )
+            out = model.forecast(table, horizon)
+        return out["population_total"].to_numpy()
+
+
+if __name__ == "__main__":
+    from src.instrumentation import configure_logging
+
+    configure_logging()
+    table = component_table(load_population_timeseries(), with_dvs=True)
+    cross = table.dropna(subset=["net_migration_dvs"])
+    gap = (cross["net_migration"] - cross["net_migration_dvs"]).abs().mean()
+    print(f"Net migration: residual vs DVS cohorts, mean absolute gap {gap:,.0f}")
+
+    fit_components_model(table[["year", "population_total"]])
+
+    train = np.ones(len(table) - 2, dtype=bool)
+    model = estimate_components(table[list(COMPONENTS)].to_numpy(dtype=float).T, train, 2)
+    print(model.forecast(table, horizon=10).round(0))
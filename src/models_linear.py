@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import logging
 from typing import Tuple
 
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
+from src.features import build_ml_table
+from src.fitted_model import FittedModel
+from src.registry import Estimator, register_model
+
+logger = logging.getLogger(__name__)
 
 
 def train_test_split_time(
@@ -23,7 +27,11 @@ def train_test_split_time(
     return train, test
 
 
-def fit_linear_model(df_ml: pd.DataFrame, test_start_year: int = 2000) -> dict:
+def fit_linear_model(
+    df_ml: pd.DataFrame,
+    test_start_year: int = 2000,
+    extra_features: list[str] | None = None,
+) -> FittedModel | None:
     """
     Fit a linear regression model to predict next year's population.
 
@@ -32,26 +40,38 @@ def fit_linear_model(df_ml: pd.DataFrame, test_start_year: int = 2000) -> dict:
       - growth_rate
       - pop_lag_1
       - pop_lag_2
+      - every column listed in extra_features (e.g. births, deaths,
+        natural_increase from build_ml_table(..., exog=...)); a missing
+        one raises KeyError
 
     The target is:
       - target_pop_next
 
-    Prints RMSE on train and test.
+    Logs RMSE on train and test and returns a FittedModel (its `results`
+    dict is the row used in the model comparison table). Raises ValueError
+    if test_start_year leaves the train or test split empty, like the
+    other models.
     """
     # 1) Train/test split
     train, test = train_test_split_time(df_ml, test_start_year=test_start_year)
 
     if train.empty or test.empty:
-        print("❌ Train or test set is empty. Check test_start_year.")
-        print("Available years:", df_ml["year"].min(), "to", df_ml["year"].max())
-        return
-
-    # 2) Select feature columns that actually exist
+        raise ValueError(
+            "Train or test is empty for this test_start_year "
+            f"(available years: {df_ml['year'].min()} to {df_ml['year'].max()})."
+        )
+
+    # 2) Select feature columns that actually exist; requested extra
+    # features must all be there (the model name lists them)
+    extra_features = list(extra_features or [])
+    missing = [c for c in extra_features if c not in df_ml.columns]
+    if missing:
+        raise KeyError(f"Extra feature column(s) not in df_ml: {missing}")
     candidate_cols = ["population_total", "growth_rate", "pop_lag_1", "pop_lag_2"]
-    feature_cols = [c for c in candidate_cols if c in df_ml.columns]
+    feature_cols = [c for c in candidate_cols if c in df_ml.columns] + extra_features
 
     if not feature_cols:
-        print("❌ No feature columns found in df_ml. Check your feature engineering.")
+        logger.warning("No feature columns found in df_ml. Check your feature engineering.")
         return
 
     # 3) Build X/y for train and test
@@ -61,35 +81,65 @@ def fit_linear_model(df_ml: pd.DataFrame, test_start_year: int = 2000) -> dict:
     X_test = test[feature_cols].values
     y_test = test["target_pop_next"].values
 
-    # 4) Fit linear regression
+    # 4) Fit linear regression (sklearn is only imported to fit; FittedModel
+    # predicts with its stored coefficients). Features are divided by their train std
+    # first: population levels (~1e6) and shares/rates (~1e-2) side by side
+    # otherwise leave the small-scale columns numerically ignored
+    scale = X_train.std(axis=0)
+    scale[scale == 0] = 1.0
+    from sklearn.linear_model import LinearRegression
+
     model = LinearRegression()
-    model.fit(X_train, y_train)
+    model.fit(X_train / scale, y_train)
 
     # 5) Predictions
-    y_pred_train = model.predict(X_train)
-    y_pred_test = model.predict(X_test)
+    y_pred_train = model.predict(X_train / scale)
+    y_pred_test = model.predict(X_test / scale)
 
     # 6) RMSE
-    rmse_train = np.sqrt(mean_squared_error(y_train, y_pred_train))
-    rmse_test = np.sqrt(mean_squared_error(y_test, y_pred_test))
+    rmse_train = np.sqrt(np.mean((y_train - y_pred_train) ** 2))
+    rmse_test = np.sqrt(np.mean((y_test - y_pred_test) ** 2))
 
-    print("✅ Linear regression fitted.")
-    print("Feature columns used:", feature_cols)
-    print(f"Train RMSE: {rmse_train:,.0f}")
-    print(f"Test  RMSE: {rmse_test:,.0f}")
-    print(f"Train n={len(train)}, Test n={len(test)}")
+    logger.info(
+        "Linear regression fitted on %s: train RMSE %.0f, test RMSE %.0f, train n=%d, test n=%d",
+        feature_cols, rmse_train, rmse_test, len(train), len(test),
+    )
+
+    name = "Linear regression"
+    if extra_features:
+        name += " + " + ", ".join(extra_features)
 
     results = {
     
-    "model": "Linear regression",
+    "model": name,
     "train_rmse": float(rmse_train),
     "test_rmse": float(rmse_test),
     "n_features": X_train.shape[1],
     "train_size": len(X_train),
     "test_size": len(X_test),
 }
-    return results
-
-
- 
 
+    # 7) Keep the fit for plots and later steps (train rows first, then test)
+    years = np.concatenate([train["year"].values, test["year"].values])
+    train_mask = np.arange(len(years)) < len(train)
+
+    return FittedModel(
+        name=name,
+        feature_cols=feature_cols,
+        intercept=float(model.intercept_),
+        coef=np.asarray(model.coef_, dtype=float) / scale,
+        years=years,
+        y=np.concatenate([y_train, y_test]).astype(float),
+        y_pred=np.concatenate([y_pred_train, y_pred_test]),
+        train_mask=train_mask,
+        test_mask=~train_mask,
+        results=results,
+    )
+
+
+@register_model("linear")
+class LinearEstimator(Estimator):
+    name = "Linear regression"
+
+    def fit(self, ts, test_start_year=2000, n_lags=2):
+        return fit_linear_model(build_ml_table(ts, n_lags=n_lags), test_start_year=test_start_year)
@@ -0,0 +1,279 @@
+"""
+Online (recursive least squares) mode for the linear and AR models.
+
+Instead of refitting from scratch when a new year is published, an
+RLSState keeps what is needed to absorb one more observation in O(p^2):
+
+- theta : [intercept, coefficients] on centred/scaled features
+- P     : inverse of the (weighted) Gram matrix of those features
+- the last few population levels, to build the next feature row
+
+Each new value pop[t+1] is first predicted from the current coefficients
+(giving the one-step error), then absorbed with the RLS update
+
+    k = P z / (lam + z' P z),   theta += k (y - z' theta),   P = (P - k z' P) / lam
+
+where lam <= 1 is the forgetting factor (1: every year weighs the same,
+which gives exactly the expanding-window OLS fit; < 1: older years are
+down-weighted by lam per year).
+
+Features are centred and divided by the std of the initial fit (fixed
+afterwards), which keeps P well conditioned with population-sized levels.
+The models are the ones of src.panel (AR: pop_lag_1..p; linear:
+population_total, growth_rate, pop_lag_1..p).
+
+States are saved as .npz files (by default under data/cache/online/), so
+refresh() can load the state, absorb the newly published years, save it
+and return the updated forecast without touching the rest of the pipeline.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.cache import cache_dir
+from src.forecasting import LagModel, forecast, history_length, lag_features
+from src.panel import feature_names, panel_design
+
+
+@dataclass
+class RLSState:
+    """
+    model       : "linear" or "ar"
+    n_lags      : number of lag features
+    forgetting  : forgetting factor lam in (0, 1]
+    center      : (k,) feature offsets (fixed at initialisation)
+    scale       : (k,) feature scales (fixed at initialisation)
+    theta       : (k + 1,) intercept and coefficients on the scaled features
+    P           : (k + 1, k + 1) inverse Gram matrix
+    history     : last levels needed for the next feature row (pop[t] last)
+    last_year   : year of history[-1]
+    n_obs       : rows absorbed so far
+    """
+
+    model: str
+    n_lags: int
+    forgetting: float
+    center: np.ndarray
+    scale: np.ndarray
+    theta: np.ndarray
+    P: np.ndarray
+    history: np.ndarray
+    last_year: int
+    n_obs: int
+
+    @property
+    def feature_cols(self) -> list[str]:
+        return feature_names(self.model, self.n_lags)
+
+    @property
+    def coef(self) -> np.ndarray:
+        """Coefficients in raw feature units."""
+        return self.theta[1:] / self.scale
+
+    @property
+    def intercept(self) -> float:
+        return float(self.theta[0] - self.coef @ self.center)
+
+    def lag_model(self) -> LagModel:
+        return LagModel(tuple(self.feature_cols), self.intercept, self.coef)
+
+    def _row(self) -> np.ndarray:
+        """Scaled design row [1, z] of the latest year."""
+        x = lag_features(self.feature_cols, self.history[None, :])[0]
+        return np.concatenate([[1.0], (x - self.center) / self.scale])
+
+    def predict_next(self) -> float:
+        """One-step forecast of the year after last_year."""
+        return float(self._row() @ self.theta)
+
+    def update(self, year: int, value: float) -> dict:
+        """
+        Absorb the observed population of `year` (must be last_year + 1).
+        Returns year, actual, predicted (before the update) and error.
+        """
+        if int(year) != self.last_year + 1:
+            raise ValueError(f"Expected year {self.last_year + 1}, got {year}")
+
+        z = self._row()
+        predicted = float(z @ self.theta)
+        error = float(value) - predicted
+
+        Pz = self.P @ z
+        gain = Pz / (self.forgetting + z @ Pz)
+        self.theta = self.theta + gain * error
+        P = (self.P - np.outer(gain, Pz)) / self.forgetting
+        self.P = (P + P.T) / 2  # keep it symmetric against round-off
+
+        self.history = np.append(self.history[1:], float(value))
+        self.last_year = int(year)
+        self.n_obs += 1
+        return {"year": int(year), "actual": float(value), "predicted": predicted, "error": error}
+
+    def forecast(self, horizon: int = 10) -> np.ndarray:
+        """Recursive forecast of the `horizon` years after last_year."""
+        return forecast(self.lag_model(), self.history, horizon)[0]
+
+    # --- persistence --------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "model": self.model,
+            "n_lags": self.n_lags,
+            "forgetting": self.forgetting,
+            "last_year": self.last_year,
+            "n_obs": self.n_obs,
+        }
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp,
+            meta=np.array(json.dumps(meta)),
+            center=self.center,
+            scale=self.scale,
+            theta=self.theta,
+            P=self.P,
+            history=self.history,
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "RLSState":
+        with np.load(path) as z:
+            meta = json.loads(str(z["meta"]))
+            arrays = {k: z[k] for k in ("center", "scale", "theta", "P", "history")}
+        return cls(**meta, **arrays)
+
+
+def default_state_path(model: str, n_lags: int) -> Path:
+    return cache_dir() / "online" / f"{model}_{n_lags}.npz"
+
+
+def init_state(
+    ts: pd.DataFrame,
+    model: str = "ar",
+    n_lags: int = 2,
+    until_year: int | None = None,
+    forgetting: float = 1.0,
+) -> RLSState:
+    """
+    Batch least-squares fit on the years up to until_year (default: all),
+    as the starting state for recursive updates.
+    """
+    if not 0 < forgetting <= 1:
+        raise ValueError("forgetting must be in (0, 1]")
+    ts = ts.sort_values("year")
+    if until_year is not None:
+        ts = ts[ts["year"] <= until_year]
+    years = ts["year"].to_numpy()
+    pop = ts["population_total"].to_numpy(dtype=float)
+
+    # 1) Rows t with target pop[t + 1]
+    X, y, _ = panel_design(pop[None, :], model, n_lags)
+    X, y = X[0], y[0]
+    k = X.shape[1]
+    if len(y) <= k + 1:
+        raise ValueError(f"Need more than {k + 1} rows to initialise, got {len(y)}")
+
+    # 2) Scaled design and its QR: theta = R^-1 Q'y, P = (Z'Z)^-1 = R^-1 R^-T
+    center = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = np.column_stack([np.ones(len(y)), (X - center) / scale])
+
+    # With forgetting, the initial rows get the geometric weights the
+    # updates would have given them (the newest row weighs 1)
+    w = np.sqrt(forgetting ** np.arange(len(y) - 1, -1, -1))
+    Q, R = np.linalg.qr(Z * w[:, None])
+    R_inv = np.linalg.inv(R)
+
+    return RLSState(
+        model=model,
+        n_lags=n_lags,
+        forgetting=forgetting,
+        center=center,
+        scale=scale,
+        theta=R_inv @ (Q.T @ (y * w)),
+        P=R_inv @ R_inv.T,
+        history=pop[-history_length(feature_names(model, n_lags)):].copy(),
+        last_year=int(years[-1]),
+        n_obs=len(y),
+    )
+
+
+def refresh(
+    ts: pd.DataFrame,
+    model: str = "ar",
+    n_lags: int = 2,
+    path: Path | None = None,
+    horizon: int = 10,
+    forgetting: float = 1.0,
+) -> dict:
+    """
+    Bring the persisted state up to date with `ts` and return the forecast.
+
+    Loads the state (or initialises it on all of ts if none is saved),
+    absorbs every year after its last_year, saves it again. A saved state
+    must match model, n_lags and forgetting (ValueError otherwise). Returns
+    {"state", "updates" (year, actual, predicted, error), "forecast" (year, population_total)}.
+    """
+    path = Path(path) if path is not None else default_state_path(model, n_lags)
+    ts = ts.sort_values("year")
+    if path.exists():
+        state = RLSState.load(path)
+        if (state.model, state.n_lags) != (model, n_lags):
+            raise ValueError(f"{path} holds a {state.model} model with n_lags={state.n_lags}")
+        if state.forgetting != forgetting:
+            raise ValueError(f"{path} was fitted with forgetting={state.forgetting}, not {forgetting}")
+    else:
+        state = init_state(ts, model, n_lags, forgetting=forgetting)
+
+    new = ts[ts["year"] > state.last_year]
+    updates = [state.update(y, v) for y, v in zip(new["year"], new["population_total"])]
+    state.save(path)
+
+    fc = state.forecast(horizon)
+    return {
+        "state": state,
+        "updates": pd.DataFrame(updates, columns=["year", "actual", "predicted", "error"]),
+        "forecast": pd.DataFrame({
+            "year": state.last_year + 1 + np.arange(horizon),
+            "population_total": fc,
+        }),
+    }
+
+
+def expanding_window(
+    ts: pd.DataFrame,
+    model: str = "ar",
+    n_lags: int = 2,
+    start_year: int = 2000,
+    forgetting: float = 1.0,
+) -> pd.DataFrame:
+    """
+    One-step-ahead evaluation: fit on the years before start_year, then
+    predict each following year and absorb it. With forgetting=1 this is
+    the expanding-window refit, at O(p^2) per year.
+
+    Returns year, actual, predicted, error.
+    """
+    ts = ts.sort_values("year")
+    state = init_state(ts, model, n_lags, until_year=start_year - 1, forgetting=forgetting)
+    rest = ts[ts["year"] >= start_year]
+    rows = [state.update(y, v) for y, v in zip(rest["year"], rest["population_total"])]
+    return pd.DataFrame(rows, columns=["year", "actual", "predicted", "error"])
+
+
+if __name__ == "__main__":
+    from src.data_loader import load_population_timeseries
+
+    ts = load_population_timeseries()
+    for model in ("linear", "ar"):
+        ev = expanding_window(ts, model=model, n_lags=2, start_year=2000)
+        rmse = np.sqrt(np.mean(ev["error"] ** 2))
+        print(f"{model:<7} expanding-window one-step RMSE since 2000: {rmse:,.0f}")
@@ -0,0 +1,233 @@
+"""
+Out-of-core panels: memory-mapped storage and chunked fitting.
+
+For cantonal/municipal x age x sex tables the panel (n_series, n_years)
+no longer fits in memory. Here it lives in a .npy file opened as a memory
+map, and everything downstream works on blocks of series:
+
+    panel/                       fit/
+      values.npy  (S, T) float64   intercepts.npy  (S,)
+      years.npy   (T,)             coefs.npy       (S, k)
+      meta.json                    train_rmse.npy  (S,)
+                                   test_rmse.npy   (S,)
+                                   meta.json
+
+The block size follows a memory ceiling in MB (the limit_mb argument;
+by default the POPGROWTH_MEMORY_LIMIT_MB environment variable, else the
+module constant MEMORY_LIMIT_MB = 256). The fixed cost of fitting one
+block (metrics table, QR workspace, small arrays) is taken off the
+ceiling, and the rest is divided by the per-series cost of the block's
+features, design and least-squares temporaries (see src.panel). Only the
+block in hand is held in memory; the memory-mapped pages are read by the
+OS and can be evicted at any time.
+
+    panel = write_synthetic_panel("data/cache/panel", n_series=1_000_000)
+    fit = fit_panel_chunked(panel, "fit", model="ar", limit_mb=64)
+    fit.metrics(0, 10)
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.panel import feature_names, fit_panel, synthetic_panel
+
+MEMORY_LIMIT_MB = 256
+
+# Float64 arrays of one year held per series while fitting a block, per
+# feature and fixed (measured on src.panel.fit_panel, with some margin)
+_ARRAYS_PER_FEATURE = 5
+_ARRAYS_FIXED = 5
+
+# Allocations of one block that do not grow with its number of series
+# (measured with tracemalloc on src.panel.fit_panel: 5-20 kB warm, ~50 kB
+# on the first call, for 50-2000 years and up to 10 features; with margin)
+_BLOCK_FIXED_MB = 0.25
+
+
+def memory_limit_mb(value: float | None = None) -> float:
+    if value is not None:
+        return float(value)
+    return float(os.environ.get("POPGROWTH_MEMORY_LIMIT_MB", MEMORY_LIMIT_MB))
+
+
+def block_size(n_years: int, n_features: int, limit_mb: float | None = None) -> int:
+    """
+    Series per block so that one block's working set (fixed cost plus
+    per-series cost) stays under the ceiling. Raises MemoryError if not
+    even one series fits.
+    """
+    limit = memory_limit_mb(limit_mb)
+    per_series = n_years * 8 * (_ARRAYS_PER_FEATURE * n_features + _ARRAYS_FIXED)
+    available = (limit - _BLOCK_FIXED_MB) * 1e6
+    if available < per_series:
+        raise MemoryError(
+            f"A block of one series needs ~{_BLOCK_FIXED_MB + per_series / 1e6:.2f} MB, "
+            f"above the memory limit of {limit:g} MB"
+        )
+    return int(available // per_series)
+
+
+@dataclass
+class MemmapPanel:
+    """(n_series, n_years) levels in a .npy memory map, with the year axis."""
+
+    path: Path
+    values: np.memmap
+    years: np.ndarray
+
+    @property
+    def n_series(self) -> int:
+        return self.values.shape[0]
+
+    @property
+    def n_years(self) -> int:
+        return self.values.shape[1]
+
+    @classmethod
+    def open(cls, path: Path) -> "MemmapPanel":
+        path = Path(path)
+        return cls(
+            path=path,
+            values=np.load(path / "values.npy", mmap_mode="r"),
+            years=np.load(path / "years.npy"),
+        )
+
+    def blocks(self, size: int) -> Iterator[tuple[int, int, np.ndarray]]:
+        """(start, stop, values[start:stop] as an in-memory array) per block."""
+        for start in range(0, self.n_series, size):
+            stop = min(start + size, self.n_series)
+            yield start, stop, np.array(self.values[start:stop])
+
+
+def create_panel(path: Path, years: np.ndarray, n_series: int, **meta) -> np.memmap:
+    """Empty (n_series, len(years)) float64 panel on disk; returns the writable map."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / "years.npy", np.asarray(years))
+    (path / "meta.json").write_text(json.dumps({"n_series": n_series, "n_years": len(years), **meta}))
+    return np.lib.format.open_memmap(
+        path / "values.npy", mode="w+", dtype=np.float64, shape=(n_series, len(years))
+    )
+
+
+def write_synthetic_panel(
+    path: Path,
+    n_series: int,
+    n_years: int = 165,
+    seed: int = 0,
+    limit_mb: float | None = None,
+) -> MemmapPanel:
+    """Synthetic stress panel (src.panel.synthetic_panel), generated block by block."""
+    size = block_size(n_years, 1, limit_mb)
+    years = 1860 + np.arange(n_years)
+    out = create_panel(path, years, n_series, kind="synthetic", seed=seed)
+    for i, start in enumerate(range(0, n_series, size)):
+        stop = min(start + size, n_series)
+        out[start:stop] = synthetic_panel(stop - start, n_years, seed=[seed, i])[1]
+    out.flush()
+    del out
+    return MemmapPanel.open(path)
+
+
+@dataclass
+class ChunkedFit:
+    """Per-series results of fit_panel_chunked, memory-mapped under `path`."""
+
+    path: Path
+    model: str
+    feature_cols: list[str]
+    n_lags: int
+    block_size: int
+
+    def _load(self, name: str) -> np.memmap:
+        return np.load(self.path / f"{name}.npy", mmap_mode="r")
+
+    @property
+    def intercepts(self) -> np.memmap:
+        return self._load("intercepts")
+
+    @property
+    def coefs(self) -> np.memmap:
+        return self._load("coefs")
+
+    @property
+    def train_rmse(self) -> np.memmap:
+        return self._load("train_rmse")
+
+    @property
+    def test_rmse(self) -> np.memmap:
+        return self._load("test_rmse")
+
+    def metrics(self, start: int = 0, stop: int | None = None) -> pd.DataFrame:
+        """Metrics of series start..stop as a DataFrame (only that slice is read)."""
+        stop = len(self.test_rmse) if stop is None else stop
+        return pd.DataFrame({
+            "series": np.arange(start, stop),
+            "train_rmse": self.train_rmse[start:stop],
+            "test_rmse": self.test_rmse[start:stop],
+        })
+
+    def summary(self) -> dict:
+        """Mean and max RMSE over all series, accumulated block by block."""
+        out = {}
+        for name in ("train_rmse", "test_rmse"):
+            values = self._load(name)
+            total, count, peak = 0.0, 0, -np.inf
+            for start in range(0, len(values), self.block_size):
+                block = np.asarray(values[start:start + self.block_size])
+                ok = block[np.isfinite(block)]
+                total += ok.sum()
+                count += len(ok)
+                peak = max(peak, ok.max(initial=-np.inf))
+            out[f"mean_{name}"] = total / count if count else np.nan
+            out[f"max_{name}"] = peak
+        return out
+
+
+def fit_panel_chunked(
+    panel: MemmapPanel,
+    out_path: Path,
+    model: str = "ar",
+    n_lags: int = 2,
+    test_start_year: int = 2000,
+    limit_mb: float | None = None,
+) -> ChunkedFit:
+    """
+    Fit `model` on every series of a memory-mapped panel, one block of
+    series at a time (src.panel.fit_panel per block), writing coefficients
+    and metrics to memory-mapped files under out_path.
+    """
+    feature_cols = feature_names(model, n_lags)
+    k = len(feature_cols)
+    size = block_size(panel.n_years, k, limit_mb)
+
+    out_path = Path(out_path)
+    out_path.mkdir(parents=True, exist_ok=True)
+    S = panel.n_series
+    outputs = {
+        name: np.lib.format.open_memmap(out_path / f"{name}.npy", mode="w+", dtype=np.float64, shape=shape)
+        for name, shape in {
+            "intercepts": (S,), "coefs": (S, k), "train_rmse": (S,), "test_rmse": (S,),
+        }.items()
+    }
+
+    for start, stop, values in panel.blocks(size):
+        fit = fit_panel(values, panel.years, model, n_lags, test_start_year, series=np.arange(start, stop))
+        outputs["intercepts"][start:stop] = fit.intercepts
+        outputs["coefs"][start:stop] = fit.coefs
+        outputs["train_rmse"][start:stop] = fit.metrics["train_rmse"].to_numpy()
+        outputs["test_rmse"][start:stop] = fit.metrics["test_rmse"].to_numpy()
+        del fit, values
+
+    for arr in outputs.values():
+        arr.flush()
+    meta = {"model": model, "feature_cols": feature_cols, "n_lags": n_lags, "block_size": size}
+    (out_path / "meta.json").write_text(json.dumps({**meta, "test_start_year": test_start_year}))
+    return ChunkedFit(path=out_path, **meta)
@@ -0,0 +1,248 @@
+"""
+Panel fitting: the linear and AR models on many series at once.
+
+A panel is an (n_series, n_years) array of levels sharing one year axis
+(age groups x sex from the population cube, or synthetic stress panels).
+The design of every series is built as strided lag views over the panel,
+stacked into (series, rows, features), and all regressions are solved in
+one batched least-squares call:
+
+- per series, features are centred and divided by their train std (the
+  intercept is recovered afterwards), as in fit_linear_model,
+- np.linalg.qr and np.linalg.solve broadcast over the series axis, so the
+  coefficients of every series come from one stacked QR instead of one
+  sklearn fit each (a stacked pinv is the fallback for rank-deficient
+  series).
+
+The models match the single-series ones:
+  - "ar":     pop_lag_1 .. pop_lag_p                       (fit_ar_model)
+  - "linear": population_total, growth_rate, pop_lag_1 .. pop_lag_p
+              (fit_linear_model on build_ml_table(ts, n_lags=p), p <= 2)
+
+fit_panel() returns the coefficients, one-step predictions and a metrics
+table with one row per series, in the columns of the model comparison
+table (see src.registry.COMPARISON_SCHEMA) plus a leading "series" column.
+Series whose features are not finite (e.g. a zero count before a growth
+rate) are left out of the solve and get NaN coefficients and metrics.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.population_cube import PopulationCube
+from src.registry import COMPARISON_SCHEMA
+
+MODELS = ("linear", "ar")
+
+
+@dataclass
+class PanelFit:
+    """
+    series     : (n_series,) series names
+    intercepts : (n_series,) intercept of every series
+    coefs      : (n_series, n_features) coefficients, in feature_cols order
+    years      : (rows,) year t of every row (the target is t+1)
+    y          : (n_series, rows) targets
+    y_pred     : (n_series, rows) one-step predictions
+    train_mask : (rows,) rows with year < test_start_year
+    metrics    : one row per series (see module docstring)
+    """
+
+    model: str
+    feature_cols: list[str]
+    series: np.ndarray
+    intercepts: np.ndarray
+    coefs: np.ndarray
+    years: np.ndarray
+    y: np.ndarray
+    y_pred: np.ndarray
+    train_mask: np.ndarray
+    metrics: pd.DataFrame
+
+
+def feature_names(model: str, n_lags: int) -> list[str]:
+    lags = [f"pop_lag_{k}" for k in range(1, n_lags + 1)]
+    if model == "ar":
+        return lags
+    if model == "linear":
+        return ["population_total", "growth_rate"] + lags
+    raise ValueError(f"model must be one of {MODELS}, not {model!r}")
+
+
+def panel_design(panel: np.ndarray, model: str, n_lags: int) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    Stacked design of every series.
+
+    Rows are the years t = start .. n_years - 2 (start = max(n_lags, 1)).
+    Returns X (n_series, rows, n_features), y (n_series, rows) and start.
+    For the AR model X is a strided view over the panel (no copy).
+    """
+    feature_names(model, n_lags)  # validates the model name
+    panel = np.asarray(panel, dtype=float)
+    start = max(n_lags, 1)
+    if panel.shape[1] - 1 <= start:
+        raise ValueError(f"Panel of {panel.shape[1]} years is too short for n_lags={n_lags}")
+
+    windows = np.lib.stride_tricks.sliding_window_view(panel[:, :-2], n_lags, axis=1)
+    lags = windows[:, start - n_lags:, ::-1]
+    y = panel[:, start + 1:]
+    if model == "ar":
+        return lags, y, start
+
+    current = panel[:, start:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = current / panel[:, start - 1:-2] - 1.0
+    X = np.concatenate([current[..., None], growth[..., None], lags], axis=2)
+    return X, y, start
+
+
+def solve_panel(X: np.ndarray, y: np.ndarray, train: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Least squares with an intercept for every series at once, on the rows
+    where `train` is True. Returns intercepts (n_series,) and coefs
+    (n_series, n_features).
+    """
+    Xt = X[:, train]
+    yt = y[:, train]
+
+    # 1) Centre and scale per series (same conditioning fix as fit_linear_model)
+    mean_x = Xt.mean(axis=1, keepdims=True)
+    mean_y = yt.mean(axis=1, keepdims=True)
+    scale = Xt.std(axis=1, keepdims=True)
+    scale[scale == 0] = 1.0
+    Z = (Xt - mean_x) / scale
+
+    # 2) One stacked QR: Z = QR, then R b = Q'y for every series
+    yc = yt - mean_y
+    Q, R = np.linalg.qr(Z)
+
+    # Rank-deficient series (a negligible pivot of R, same tolerance as
+    # matrix_rank) get the minimum-norm solution; the others are not affected
+    pivots = np.abs(np.diagonal(R, axis1=1, axis2=2))
+    tol = pivots.max(axis=1, keepdims=True) * max(Z.shape[1:]) * np.finfo(float).eps
+    deficient = (pivots <= tol).any(axis=1)
+
+    b = np.empty(Z.shape[::2])
+    full = ~deficient
+    if full.any():
+        qty = np.einsum("srk,sr->sk", Q[full], yc[full])
+        b[full] = np.linalg.solve(R[full], qty[..., None])[..., 0]
+    if deficient.any():
+        b[deficient] = (np.linalg.pinv(Z[deficient]) @ yc[deficient][..., None])[..., 0]
+
+    coefs = b / scale[:, 0]
+    intercepts = mean_y[:, 0] - np.einsum("sk,sk->s", coefs, mean_x[:, 0])
+    return intercepts, coefs
+
+
+def fit_panel(
+    panel: np.ndarray,
+    years: np.ndarray,
+    model: str = "ar",
+    n_lags: int = 2,
+    test_start_year: int = 2000,
+    series: list[str] | None = None,
+) -> PanelFit:
+    """Fit `model` on every row of `panel` (n_series, n_years) with one batched solve."""
+    panel = np.asarray(panel, dtype=float)
+    years = np.asarray(years)
+    series = np.asarray(series if series is not None else [str(i) for i in range(len(panel))])
+    feature_cols = feature_names(model, n_lags)
+
+    t0 = time.perf_counter()
+    X, y, start = panel_design(panel, model, n_lags)
+    row_years = years[start:-1]
+    train = row_years < test_start_year
+    test = ~train
+    if train.sum() <= len(feature_cols) or test.sum() == 0:
+        raise ValueError("Train or test is empty (or too short) for this test_start_year.")
+
+    # Series with non-finite features or targets are left out (NaN results)
+    valid = np.isfinite(X).all(axis=(1, 2)) & np.isfinite(y).all(axis=1)
+    intercepts = np.full(len(panel), np.nan)
+    coefs = np.full((len(panel), len(feature_cols)), np.nan)
+    if valid.all():
+        intercepts, coefs = solve_panel(X, y, train)
+    elif valid.any():
+        intercepts[valid], coefs[valid] = solve_panel(X[valid], y[valid], train)
+    fit_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    y_pred = intercepts[:, None] + np.einsum("srk,sk->sr", X, coefs)
+    predict_seconds = time.perf_counter() - t0
+
+    err = y - y_pred
+    name = f"AR({n_lags})" if model == "ar" else "Linear regression"
+    n_series = len(panel)
+    metrics = pd.DataFrame({
+        "series": series,
+        "model": name,
+        "train_rmse": np.sqrt(np.mean(err[:, train] ** 2, axis=1)),
+        "test_rmse": np.sqrt(np.mean(err[:, test] ** 2, axis=1)),
+        "train_size": int(train.sum()),
+        "test_size": int(test.sum()),
+        "n_features": len(feature_cols),
+        "n_lags": n_lags,
+        # one batched call for all series: report the per-series share
+        "fit_seconds": fit_seconds / n_series,
+        "predict_seconds": predict_seconds / n_series,
+    })
+    metrics = metrics.reindex(columns=["series"] + [c for c in COMPARISON_SCHEMA if c in metrics])
+
+    return PanelFit(
+        model=model,
+        feature_cols=feature_cols,
+        series=series,
+        intercepts=intercepts,
+        coefs=coefs,
+        years=row_years,
+        y=y,
+        y_pred=y_pred,
+        train_mask=train,
+        metrics=metrics,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Panels
+# ---------------------------------------------------------------------------
+
+def cube_panel(
+    cube: PopulationCube,
+    age_width: int = 5,
+    open_age: int = 85,
+) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """
+    Age-group x sex panel from the population cube: age bands of age_width
+    years up to open_age (which collects everyone older), for the total,
+    men and women. Returns (series names, years, values (n_series, n_years)).
+    """
+    edges = list(range(0, open_age, age_width)) + [open_age]
+    counts = np.add.reduceat(cube.values[:, 1:, :], edges, axis=1)  # (sex, bands, years)
+
+    bands = [f"{lo}-{hi - 1}" for lo, hi in zip(edges[:-1], edges[1:])] + [f"{open_age}+"]
+    names = [f"{sex} | {band}" for sex in cube.sex_labels for band in bands]
+    return names, cube.years, counts.reshape(-1, counts.shape[2]).astype(float)
+
+
+def synthetic_panel(n_series: int, n_years: int = 165, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Population-like stress panel (trend + noisy increments per series). Returns (years, values)."""
+    rng = np.random.default_rng(seed)
+    level = rng.uniform(1e4, 1e6, size=(n_series, 1))
+    drift = rng.normal(0.01, 0.005, size=(n_series, 1)) * level
+    increments = drift + rng.normal(0.0, 0.3, size=(n_series, n_years)) * np.abs(drift)
+    return 1860 + np.arange(n_years), level + np.cumsum(increments, axis=1)
+
+
+if __name__ == "__main__":
+    from src.data_loader import load_population_cube
+
+    names, years, values = cube_panel(load_population_cube())
+    for model in MODELS:
+        fit = fit_panel(values, years, model=model, n_lags=2, series=names)
+        print(f"\n{model}: {len(names)} series\n")
+        print(fit.metrics[["series", "model", "train_rmse", "test_rmse"]].round(0).to_string(index=False))
@@ -0,0 +1,384 @@
+"""
+Lightweight incremental build graph.
+
+Each Stage declares the stages it depends on, its parameters and the code it
+runs. Its cache key is a hash of:
+
+- its name and parameters,
+- the source code of the modules it depends on (code version): the modules
+  listed in `code` and every module of the same package they import,
+  directly or not (imports inside functions included, found by parsing the
+  source, so nothing is imported to compute a key). For the module that
+  defines the stage function only its module-level imports are followed:
+  its lazy imports inside other stage functions belong to those stages,
+  which list them in `code`,
+- the keys of its dependencies (so a key changes whenever anything
+  upstream changes; raw-data stages put the file fingerprint in params).
+
+Outputs are pickled under data/cache/pipeline/. On a rerun a stage is only
+executed when no output exists for its key (or one of its output files is
+missing: declared up front, or returned by the stage when the names are
+only known at run time); otherwise nothing is computed, and cached outputs
+are only unpickled if a downstream stage actually needs them.
+
+Stages are run level by level in dependency order. Independent stages
+marked parallel=True (e.g. figures) run together in a process pool.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from src.cache import cache_dir, cache_enabled
+from src.instrumentation import record
+
+
+@dataclass
+class Stage:
+    """
+    name     : unique stage name
+    func     : module-level callable, called as func(*dep_outputs, **params)
+    deps     : names of the stages whose outputs are passed to func (in order)
+    params   : keyword arguments (must have a stable repr)
+    code     : modules whose source defines the code version (default: func's module)
+    outputs  : files the stage writes; missing files force a rerun
+    parallel : may run in a worker process next to other parallel stages
+    returns_outputs : func returns the list of files it wrote, which are
+               checked like `outputs`
+    """
+
+    name: str
+    func: Callable
+    deps: list[str] = field(default_factory=list)
+    params: dict = field(default_factory=dict)
+    code: tuple[str, ...] = ()
+    outputs: list[Path] = field(default_factory=list)
+    parallel: bool = False
+    returns_outputs: bool = False
+
+
+_SOURCES: dict[str, bytes | None] = {}
+_IMPORTS: dict[tuple[str, bool], set[str]] = {}
+_IMPORT_CACHE: dict[str, dict[str, list[str]]] | None = None
+_IMPORT_CACHE_DIRTY = False
+_SOURCE_HASHES: dict[str, str] = {}
+
+
+def _module_file(module_name: str) -> Path | None:
+    """File of a module, found from its top-level package's folder (nothing is imported)."""
+    package, *rest = module_name.split(".")
+    try:
+        spec = importlib.util.find_spec(package)
+        root = Path(spec.origin).parent
+    except (AttributeError, ImportError, TypeError, ValueError):
+        return None
+    if not rest:
+        return Path(spec.origin)
+    base = root.joinpath(*rest)
+    for path in (base.with_suffix(".py"), base / "__init__.py"):
+        if path.is_file():
+            return path
+    return None
+
+
+def _module_source(module_name: str) -> bytes | None:
+    """Source of a module, read from its file without importing it (None if not found)."""
+    if module_name not in _SOURCES:
+        path = _module_file(module_name)
+        try:
+            _SOURCES[module_name] = path.read_bytes() if path is not None else None
+        except OSError:
+            _SOURCES[module_name] = None
+    return _SOURCES[module_name]
+
+
+def _import_nodes(tree: ast.Module, lazy: bool):
+    """
+    Statements of a module, nested blocks included (imports are statements,
+    so expressions are not visited); with lazy=False, not inside functions.
+    """
+    todo = list(tree.body)
+    while todo:
+        node = todo.pop()
+        if not lazy and isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        yield node
+        for name in ("body", "orelse", "finalbody", "handlers", "cases"):
+            todo.extend(n for n in getattr(node, name, ()) if isinstance(n, ast.AST))
+
+
+def _imported_names(source: bytes, lazy: bool) -> list[str]:
+    """Every module name an import statement of `source` may refer to."""
+    names = []
+    for node in _import_nodes(ast.parse(source), lazy):
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            # "from src import run_store" imports the module src.run_store
+            names += [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+    return sorted(set(names))
+
+
+def _import_cache_path() -> Path:
+    return cache_dir() / "pipeline" / "module_imports.json"
+
+
+def _parsed_imports(source: bytes) -> dict[str, list[str]]:
+    """
+    {"lazy": names, "module": names} for a source, memoized on disk by its
+    hash (parsing every module on each run would cost more than the rest
+    of a cached run's planning).
+    """
+    global _IMPORT_CACHE, _IMPORT_CACHE_DIRTY
+    if _IMPORT_CACHE is None:
+        _IMPORT_CACHE = {}
+        if cache_enabled():
+            try:
+                _IMPORT_CACHE = json.loads(_import_cache_path().read_text())
+            except (OSError, ValueError):
+                pass
+    digest = hashlib.sha256(source).hexdigest()
+    if digest not in _IMPORT_CACHE:
+        _IMPORT_CACHE[digest] = {"lazy": _imported_names(source, True), "module": _imported_names(source, False)}
+        _IMPORT_CACHE_DIRTY = True
+    return _IMPORT_CACHE[digest]
+
+
+def _save_import_cache() -> None:
+    global _IMPORT_CACHE_DIRTY
+    if not (_IMPORT_CACHE_DIRTY and cache_enabled()):
+        return
+    path = _import_cache_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(_IMPORT_CACHE))
+    os.replace(tmp, path)
+    _IMPORT_CACHE_DIRTY = False
+
+
+def _package_imports(module_name: str, lazy: bool = True) -> set[str]:
+    """Modules of the same top-level package imported in module_name."""
+    if (module_name, lazy) not in _IMPORTS:
+        source = _module_source(module_name)
+        names = _parsed_imports(source)["lazy" if lazy else "module"] if source is not None else []
+        package = module_name.split(".")[0]
+        _IMPORTS[module_name, lazy] = {
+            n for n in names if n.split(".")[0] == package and _module_source(n) is not None
+        }
+    return _IMPORTS[module_name, lazy]
+
+
+def _module_hash(module_name: str, lazy: bool = True) -> str:
+    """
+    Hash of a module's source and of every package module it imports,
+    transitively. lazy=False skips the module's own imports inside functions
+    (the modules it imports are still followed in full).
+    """
+    key = module_name if lazy else f"{module_name} (module level)"
+    if key not in _SOURCE_HASHES:
+        seen = {module_name}
+        todo = list(_package_imports(module_name, lazy) - seen)
+        while todo:
+            name = todo.pop()
+            if name not in seen:
+                seen.add(name)
+                todo.extend(_package_imports(name) - seen)
+        h = hashlib.sha256()
+        for name in sorted(seen):
+            h.update(name.encode())
+            h.update(_module_source(name) or b"")
+        _SOURCE_HASHES[key] = h.hexdigest()
+        _save_import_cache()
+    return _SOURCE_HASHES[key]
+
+
+def _call_stage(func: Callable, inputs: list, params: dict) -> tuple[Any, float]:
+    """Run one stage and time it (module-level so it can run in a worker)."""
+    t0 = time.perf_counter()
+    out = func(*inputs, **params)
+    return out, time.perf_counter() - t0
+
+
+class Pipeline:
+    def __init__(self, stages: list[Stage], store: Path | None = None) -> None:
+        self.stages = {s.name: s for s in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        for s in stages:
+            missing = [d for d in s.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {s.name!r} depends on unknown stage(s) {missing}")
+        self.store = Path(store) if store is not None else cache_dir() / "pipeline"
+        self._keys: dict[str, str] = {}
+        self._outputs: dict[str, Any] = {}
+        self._levels = self._compute_levels()
+
+    # --- graph ------------------------------------------------------------
+
+    def _compute_levels(self) -> list[list[str]]:
+        """Group stages by depth: every stage comes after all of its deps."""
+        depth: dict[str, int] = {}
+
+        def visit(name: str, stack: tuple[str, ...] = ()) -> int:
+            if name in stack:
+                raise ValueError(f"Cycle in pipeline: {' -> '.join(stack + (name,))}")
+            if name not in depth:
+                deps = self.stages[name].deps
+                depth[name] = 1 + max((visit(d, stack + (name,)) for d in deps), default=-1)
+            return depth[name]
+
+        for name in self.stages:
+            visit(name)
+
+        levels: list[list[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for name in self.stages:  # keep declaration order inside a level
+            levels[depth[name]].append(name)
+        return levels
+
+    def key(self, name: str) -> str:
+        if name not in self._keys:
+            s = self.stages[name]
+            h = hashlib.sha256()
+            h.update(name.encode())
+            h.update(repr(sorted(s.params.items())).encode())
+            for module_name in s.code or (s.func.__module__,):
+                lazy = module_name != s.func.__module__
+                h.update(_module_hash(module_name, lazy).encode())
+            for d in s.deps:
+                h.update(self.key(d).encode())
+            self._keys[name] = h.hexdigest()[:20]
+        return self._keys[name]
+
+    def _path(self, name: str) -> Path:
+        return self.store / f"{name}-{self.key(name)}.pkl"
+
+    def is_cached(self, name: str) -> bool:
+        if not cache_enabled():
+            return False
+        s = self.stages[name]
+        path = self._path(name)
+        if not (path.exists() and all(Path(p).exists() for p in s.outputs)):
+            return False
+        if s.returns_outputs:
+            try:
+                with open(path, "rb") as f:
+                    written = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return False
+            return all(Path(p).exists() for p in written)
+        return True
+
+    # --- running ----------------------------------------------------------
+
+    def plan(self, force: bool = False) -> list[str]:
+        """Stages that would execute, in run order."""
+        return [
+            name for level in self._levels for name in level
+            if force or not self.is_cached(name)
+        ]
+
+    def run(
+        self,
+        dry_run: bool = False,
+        force: bool = False,
+        max_workers: int | None = None,
+    ) -> dict[str, dict]:
+        """
+        Execute invalidated stages. Returns {stage: {"status", "seconds", "key"}}
+        where status is "run", "cached" or "would run" (dry run).
+        """
+        todo = set(self.plan(force=force))
+        report = {
+            name: {"status": "cached", "seconds": 0.0, "key": self.key(name)}
+            for level in self._levels for name in level
+        }
+        if dry_run:
+            for name in todo:
+                report[name]["status"] = "would run"
+            return report
+
+        outputs = self._outputs = {}
+
+        def get_output(name: str) -> Any:
+            if name not in outputs:
+                with open(self._path(name), "rb") as f:
+                    outputs[name] = pickle.load(f)
+            return outputs[name]
+
+        self.store.mkdir(parents=True, exist_ok=True)
+        workers = max_workers or os.cpu_count() or 1
+
+        for level in self._levels:
+            names = [n for n in level if n in todo]
+            pooled = [n for n in names if self.stages[n].parallel] if workers > 1 else []
+            serial = [n for n in names if n not in pooled]
+
+            results: dict[str, tuple[Any, float]] = {}
+            if len(pooled) > 1:
+                with ProcessPoolExecutor(max_workers=min(workers, len(pooled))) as pool:
+                    futures = {
+                        n: pool.submit(
+                            _call_stage,
+                            self.stages[n].func,
+                            [get_output(d) for d in self.stages[n].deps],
+                            self.stages[n].params,
+                        )
+                        for n in pooled
+                    }
+                    results = {n: fut.result() for n, fut in futures.items()}
+            else:
+                serial = pooled + serial
+
+            for n in serial:
+                s = self.stages[n]
+                results[n] = _call_stage(s.func, [get_output(d) for d in s.deps], s.params)
+
+            for n, (out, seconds) in results.items():
+                outputs[n] = out
+                report[n].update(status="run", seconds=seconds)
+                record(f"pipeline:{n}", seconds)
+                if cache_enabled():
+                    self._store_output(n, out)
+
+        return report
+
+    def output(self, name: str) -> Any:
+        """Output of a stage after run(): computed in this run, or read from the cache."""
+        if name not in self._outputs:
+            with open(self._path(name), "rb") as f:
+                self._outputs[name] = pickle.load(f)
+        return self._outputs[name]
+
+    def _store_output(self, name: str, out: Any) -> None:
+        path = self._path(name)
+        for stale in self.store.glob(f"{name}-*.pkl"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(out, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+def print_report(report: dict[str, dict], dry_run: bool = False) -> None:
+    """Per-stage status and timing summary."""
+    title = "Pipeline plan (dry run)" if dry_run else "Pipeline stages"
+    print(f"\n{title}:")
+    width = max(len(n) for n in report)
+    total = 0.0
+    for name, info in report.items():
+        total += info["seconds"]
+        seconds = f"{info['seconds']:7.3f} s" if info["status"] == "run" else ""
+        print(f"  {name:<{width}}  {info['status']:<9}  {seconds}")
+    if not dry_run:
+        n_run = sum(info["status"] == "run" for info in report.values())
+        print(f"  {n_run}/{len(report)} stages executed, {total:.3f} s in stage code")
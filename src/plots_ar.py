@@ -3,105 +3,107 @@ from __future__ import annotations
 from pathlib import Path
 
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
 
 from src.data_loader import load_population_timeseries
 from src.features import build_ml_table
+from src.fitted_model import FittedModel
+from src.models_ar import fit_ar_model
+from src.rendering import FigureSpec, render_figures
 
+RESULTS_DIR = Path(__file__).resolve().parents[1] / "results" / "figures"
 
-def rmse(y_true: np.ndarray, y_pred: np.ndarray) -> float:
-    return float(np.sqrt(mean_squared_error(y_true, y_pred)))
 
+def rmse(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+    return float(np.sqrt(np.mean((y_true - y_pred) ** 2)))
+
+
+def main(
+    test_start_year: int = 2000,
+    n_lags: int = 2,
+    fit: FittedModel | None = None,
+) -> None:
+    # 1) Reuse the AR fit from the pipeline if given, otherwise fit it here
+    if fit is None:
+        ts = load_population_timeseries()
+        df = build_ml_table(ts, n_lags=n_lags)
+        fit = fit_ar_model(df, test_start_year=test_start_year, n_lags=n_lags)
+
+    # 2) Split the stored predictions (years are year t; target is t+1)
+    y_train, yhat_train = fit.y[fit.train_mask], fit.y_pred[fit.train_mask]
+    y_test, yhat_test = fit.y[fit.test_mask], fit.y_pred[fit.test_mask]
+    years_test = fit.years[fit.test_mask]
+
+    if len(y_train) == 0 or len(y_test) == 0:
+        raise ValueError("Train or test is empty. Check test_start_year.")
 
-def main(test_start_year: int = 2000, n_lags: int = 2) -> None:
-    # 1) Load & build ML table (includes lag features + target)
-    ts = load_population_timeseries()
-    df = build_ml_table(ts, n_lags=n_lags).copy()
-    df = df.sort_values("year").reset_index(drop=True)
+    train_rmse = rmse(y_train, yhat_train)
+    test_rmse = rmse(y_test, yhat_test)
 
-    # 2) Build AR(X) design matrix: predict next year's pop using ONLY lags
-    lag_cols = [f"pop_lag_{k}" for k in range(1, n_lags + 1)]
-    for c in lag_cols:
-        if c not in df.columns:
-            raise ValueError(f"Missing column {c}. Available columns: {list(df.columns)}")
+    print("AR plot script ran.")
+    print(f"AR({n_lags}) train RMSE: {train_rmse:,.0f}")
+    print(f"AR({n_lags}) test  RMSE: {test_rmse:,.0f}")
 
-    X = df[lag_cols].values
-    y = df["target_pop_next"].values
-    years = df["year"].values  # year t (target is t+1)
+    # 3) Figures (rendered headless by src.rendering)
+    render_figures(figure_specs(fit, test_start_year=test_start_year, n_lags=n_lags))
+    print(f"Saved AR({n_lags}) figures to {RESULTS_DIR}")
 
-    # 3) Time split
-    train_mask = years < test_start_year
-    test_mask = years >= test_start_year
 
-    X_train, y_train = X[train_mask], y[train_mask]
-    X_test, y_test = X[test_mask], y[test_mask]
-    years_train = years[train_mask]
-    years_test = years[test_mask]
+def draw_actual_vs_pred(fig, years, y_true, y_pred, n_lags, test_start_year) -> None:
+    ax = fig.add_subplot()
+    # years are year t; target is pop at t+1, so label x as (t+1)
+    ax.plot(years + 1, y_true, label="Actual (t+1)")
+    ax.plot(years + 1, y_pred, label="Predicted (t+1)")
+    ax.set_title(f"AR({n_lags}) — Actual vs Predicted (Test from {test_start_year})")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Population")
+    ax.legend()
 
-    if len(X_train) == 0 or len(X_test) == 0:
-        raise ValueError("Train or test is empty. Check test_start_year.")
 
-    # 4) Fit AR model (LinearRegression on lag features)
-    model = LinearRegression()
-    model.fit(X_train, y_train)
+def draw_residuals(fig, years, residuals, n_lags) -> None:
+    ax = fig.add_subplot()
+    ax.plot(years + 1, residuals)
+    ax.axhline(0)
+    ax.set_title(f"AR({n_lags}) — Residuals (Actual - Predicted), Test")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Residual")
 
-    yhat_train = model.predict(X_train)
-    yhat_test = model.predict(X_test)
 
-    train_rmse = rmse(y_train, yhat_train)
-    test_rmse = rmse(y_test, yhat_test)
+def draw_residual_hist(fig, residuals, n_lags) -> None:
+    ax = fig.add_subplot()
+    ax.hist(residuals, bins=20)
+    ax.set_title(f"AR({n_lags}) — Residual Distribution (Test)")
+    ax.set_xlabel("Residual")
+    ax.set_ylabel("Count")
 
-    print("AR plot script ran.")
-    print(f"AR({n_lags}) train RMSE: {train_rmse:,.0f}")
-    print(f"AR({n_lags}) test  RMSE: {test_rmse:,.0f}")
 
-    # 5) Output folder
-    results_dir = Path(__file__).resolve().parents[1] / "results" / "figures"
-    results_dir.mkdir(parents=True, exist_ok=True)
-
-    # --- Plot 1: Actual vs Pred (test period)
-    plt.figure(figsize=(10, 5))
-    # years_test is year t; target is pop at t+1, so label x as (t+1)
-    plt.plot(years_test + 1, y_test, label="Actual (t+1)")
-    plt.plot(years_test + 1, yhat_test, label="Predicted (t+1)")
-    plt.title(f"AR({n_lags}) — Actual vs Predicted (Test from {test_start_year})")
-    plt.xlabel("Year")
-    plt.ylabel("Population")
-    plt.legend()
-    out1 = results_dir / f"ar{n_lags}_actual_vs_pred_test.png"
-    plt.tight_layout()
-    plt.savefig(out1, dpi=200)
-    plt.close()
-
-    # --- Plot 2: Residuals test
+def figure_specs(fit: FittedModel, test_start_year: int = 2000, n_lags: int = 2) -> list[FigureSpec]:
+    """The three AR diagnostics figures for the test period."""
+    years_test = fit.years[fit.test_mask]
+    y_test = fit.y[fit.test_mask]
+    yhat_test = fit.y_pred[fit.test_mask]
     residuals = y_test - yhat_test
-    plt.figure(figsize=(10, 5))
-    plt.plot(years_test + 1, residuals)
-    plt.axhline(0)
-    plt.title(f"AR({n_lags}) — Residuals (Actual - Predicted), Test")
-    plt.xlabel("Year")
-    plt.ylabel("Residual")
-    out2 = results_dir / f"ar{n_lags}_residuals_test.png"
-    plt.tight_layout()
-    plt.savefig(out2, dpi=200)
-    plt.close()
-
-    # --- Plot 3: Residual histogram test
-    plt.figure(figsize=(10, 5))
-    plt.hist(residuals, bins=20)
-    plt.title(f"AR({n_lags}) — Residual Distribution (Test)")
-    plt.xlabel("Residual")
-    plt.ylabel("Count")
-    out3 = results_dir / f"ar{n_lags}_residual_hist_test.png"
-    plt.tight_layout()
-    plt.savefig(out3, dpi=200)
-    plt.close()
-
-    print(f"Saved:\n- {out1}\n- {out2}\n- {out3}")
+
+    return [
+        FigureSpec(
+            RESULTS_DIR / f"ar{n_lags}_actual_vs_pred_test.png",
+            draw_actual_vs_pred,
+            dict(years=years_test, y_true=y_test, y_pred=yhat_test,
+                 n_lags=n_lags, test_start_year=test_start_year),
+            dpi=200,
+        ),
+        FigureSpec(
+            RESULTS_DIR / f"ar{n_lags}_residuals_test.png",
+            draw_residuals,
+            dict(years=years_test, residuals=residuals, n_lags=n_lags),
+            dpi=200,
+        ),
+        FigureSpec(
+            RESULTS_DIR / f"ar{n_lags}_residual_hist_test.png",
+            draw_residual_hist,
+            dict(residuals=residuals, n_lags=n_lags),
+            dpi=200,
+        ),
+    ]
 
 
 if __name__ == "__main__":
@@ -111,6 +113,6 @@ if __name__ == "__main__":
 """
 AR model diagnostics and forecast plots.
 
-This script refits an AR(p) model on lagged population data
-and produces diagnostic plots on the test period.
+This script plots an AR(p) fit of lagged population data (reusing the
+pipeline's fit when one is passed in) on the test period.
 """
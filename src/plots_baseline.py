@@ -1,18 +1,51 @@
+from __future__ import annotations
+
+import logging
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import pandas as pd
 
 from src.data_loader import load_population_timeseries
 from src.baseline_model import estimate_baseline_growth, forecast_baseline
+from src.rendering import FigureSpec, render_figures
+
+RESULTS_DIR = Path(__file__).resolve().parents[1] / "results" / "figures"
+
+logger = logging.getLogger(__name__)
+
+
+def main(
+    test_start_year: int = 2000,
+    start_year_for_growth: int = 1980,
+    horizon: int = 20,
+    ts: pd.DataFrame | None = None,
+) -> None:
+    # 1 Load yearly population data (unless the pipeline already did)
+    if ts is None:
+        ts = load_population_timeseries()
+
+    specs = figure_specs(ts)
+    render_figures(specs)
+    print(f" Saved plot to {specs[0].out_path}")
 
-def main(test_start_year: int = 2000, start_year_for_growth: int = 1980, horizon: int = 20) -> None:
-    # 1 Load yearly population data 
-    ts = load_population_timeseries()
 
+def draw_baseline_forecast(fig, hist_years, hist_pop, fut_years, fut_pop) -> None:
+    # Plot: convert population to millions for nicer y-axis
+    ax = fig.add_subplot()
+    ax.plot(hist_years, hist_pop / 1_000_000, label="Historical population")
+    ax.plot(fut_years, fut_pop / 1_000_000, "--", label="Baseline forecast")
+
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Population (millions)")
+    ax.set_title("Swiss Population — Historical vs Baseline Constant-Growth Forecast")
+    ax.legend()
+
+
+def figure_specs(ts: pd.DataFrame) -> list[FigureSpec]:
+    """Historical series + 20-year constant-growth forecast (growth since 1980)."""
     # 2 Estimate baseline growth model from recent history (eg from 1980)
     avg_growth = estimate_baseline_growth(ts, start_year = 1980)
-    print(f"Average annual growth since 1980: {avg_growth:.4%}")
+    logger.info("Average annual growth since 1980: %.4f%%", avg_growth * 100)
 
     # Forecast 20 years into the future 
     combined = forecast_baseline(ts, avg_growth=avg_growth, horizon=20)
@@ -23,39 +56,20 @@ def main(test_start_year: int = 2000, start_year_for_growth: int = 1980, horizon
     hist = combined[combined["year"] <= last_historical_year]
     fut = combined[combined["year"] > last_historical_year]
 
-    # Plot: convert population to millions for nicer y-axis
-    plt.figure(figsize=(10,5))
-    plt.plot(
-        hist["year"],
-        hist["population_total"] / 1_000_000,
-        label="Historical population",
-    )
-    plt.plot(
-        fut["year"],
-         fut["population_total"] / 1_000_000,
-        "--",
-        label="Baseline forecast",
-    )
-
-    plt.xlabel("Year")
-    plt.ylabel("Population (millions)")
-    plt.title("Swiss Population — Historical vs Baseline Constant-Growth Forecast")
-    plt.legend()
-    plt.tight_layout()
-
-    # 5. Ensure results/ folder exists, then save figure
-    results_dir = Path(__file__).resolve().parents[1] / "results" / "figures"
-    results_dir.mkdir(parents=True, exist_ok=True)
-    out_path = results_dir / "baseline_forecast.png"
-    results_dir.mkdir(exist_ok=True)
-    out_path = results_dir / "baseline_forecast.png"
-    plt.savefig(out_path, dpi=150)
-    print(f" Saved plot to {out_path}")
-
-    # Optional: show the window (if running locally with GUI)
-    plt.close()
+    return [
+        FigureSpec(
+            RESULTS_DIR / "baseline_forecast.png",
+            draw_baseline_forecast,
+            dict(
+                hist_years=hist["year"].to_numpy(),
+                hist_pop=hist["population_total"].to_numpy(dtype=float),
+                fut_years=fut["year"].to_numpy(),
+                fut_pop=fut["population_total"].to_numpy(dtype=float),
+            ),
+            dpi=150,
+        )
+    ]
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.bootstrap import DEFAULT_LEVELS, forecast_intervals
+from src.fitted_model import FittedModel
+from src.rendering import FigureSpec, render_figures
+
+RESULTS_DIR = Path(__file__).resolve().parents[1] / "results" / "figures"
+
+# Output file per model name (other models get a slug of their name)
+FAN_FILES = {"Baseline constant growth": "baseline_fan.png", "Linear regression": "linear_fan.png"}
+
+
+def main(
+    test_start_year: int = 2000,
+    n_lags: int = 2,
+    fits: dict | None = None,
+) -> None:
+    # 1) Reuse the fits from the pipeline if given, otherwise fit them here
+    if fits is None:
+        from src.compare_models import fit_all_models
+
+        fits = fit_all_models(test_start_year=test_start_year, n_lags=n_lags)
+
+    # 2) Bootstrap intervals + fan charts
+    specs = figure_specs(fits["ts"], linear=fits["linear"], ar=fits["ar"])
+    render_figures(specs)
+    print(f"Saved {len(specs)} fan charts to {RESULTS_DIR}")
+
+
+def draw_fan_chart(fig, hist_years, hist_pop, years, median, lower, upper, levels, title) -> None:
+    """lower/upper: (n_levels, horizon), one row per interval level (narrowest first)."""
+    ax = fig.add_subplot()
+    ax.plot(hist_years, hist_pop / 1_000_000, color="black", label="Historical population")
+
+    # Widest band first, so narrower (darker) bands are drawn on top
+    for i in np.argsort(levels)[::-1]:
+        ax.fill_between(
+            years, lower[i] / 1_000_000, upper[i] / 1_000_000,
+            color="tab:blue", alpha=0.2 + 0.5 * (1 - levels[i]),
+            linewidth=0, label=f"{levels[i]:.0%} interval",
+        )
+    ax.plot(years, median / 1_000_000, "--", color="tab:blue", label="Median forecast")
+
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Population (millions)")
+    ax.set_title(title)
+    ax.legend(loc="upper left")
+
+
+def figure_specs(
+    ts: pd.DataFrame,
+    linear: FittedModel | None = None,
+    ar: FittedModel | None = None,
+    horizon: int = 10,
+    n_paths: int = 5000,
+    seed: int = 0,
+    levels: tuple[float, ...] = DEFAULT_LEVELS,
+    history_from: int = 1950,
+) -> list[FigureSpec]:
+    """One fan chart per model: history since history_from + bootstrap intervals."""
+    intervals = forecast_intervals(
+        ts, linear=linear, ar=ar, horizon=horizon, n_paths=n_paths, seed=seed, levels=levels
+    )
+    hist = ts[ts["year"] >= history_from]
+
+    specs = []
+    for name, df in intervals.items():
+        file_name = FAN_FILES.get(name) or name.lower().replace("(", "").replace(")", "") + "_fan.png"
+        pcts = [round(level * 100) for level in levels]
+        specs.append(FigureSpec(
+            RESULTS_DIR / file_name,
+            draw_fan_chart,
+            dict(
+                hist_years=hist["year"].to_numpy(),
+                hist_pop=hist["population_total"].to_numpy(dtype=float),
+                years=df["year"].to_numpy(),
+                median=df["median"].to_numpy(),
+                lower=np.vstack([df[f"lower_{p}"].to_numpy() for p in pcts]),
+                upper=np.vstack([df[f"upper_{p}"].to_numpy() for p in pcts]),
+                levels=np.asarray(levels),
+                title=f"Swiss Population — {name} forecast with bootstrap intervals",
+            ),
+            dpi=150,
+        ))
+    return specs
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,67 @@
-import matplotlib.pyplot as plt
+from __future__ import annotations
+
 from pathlib import Path
 
 from src.data_loader import load_population_timeseries
 from src.features import build_ml_table
-from src.models_linear import train_test_split_time
-from sklearn.linear_model import LinearRegression
+from src.fitted_model import FittedModel
+from src.models_linear import fit_linear_model
+from src.rendering import FigureSpec, render_figures
 
 RESULTS_DIR = Path(__file__).resolve().parents[1] / "results" / "figures"
-RESULTS_DIR.mkdir(parents=True, exist_ok=True)
-
 
-def main(test_start_year: int = 2000, n_lags: int = 2) -> None:
-    ts = load_population_timeseries()
-    ml = build_ml_table(ts, n_lags=2)
 
-    train, test = train_test_split_time(ml, test_start_year)
+def main(
+    test_start_year: int = 2000,
+    n_lags: int = 2,
+    fit: FittedModel | None = None,
+) -> None:
+    # Reuse the pipeline's fit if given, otherwise fit it here
+    if fit is None:
+        ts = load_population_timeseries()
+        ml = build_ml_table(ts, n_lags=2)
+        fit = fit_linear_model(ml, test_start_year=test_start_year)
 
-    feature_cols = ["population_total", "growth_rate", "pop_lag_1", "pop_lag_2"]
+    render_figures(figure_specs(fit))
 
-    X_train = train[feature_cols]
-    y_train = train["target_pop_next"]
-    X_test = test[feature_cols]
-    y_test = test["target_pop_next"]
 
-    model = LinearRegression()
-    model.fit(X_train, y_train)
+def draw_actual_vs_pred(fig, years, y_true, y_pred) -> None:
+    ax = fig.add_subplot()
+    ax.plot(years, y_true, label="Actual")
+    ax.plot(years, y_pred, label="Predicted")
+    ax.set_title("Linear Regression: Actual vs Predicted Population")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Population")
+    ax.legend()
 
-    y_pred = model.predict(X_test)
 
-    #  Actual vs Predicted 
+def draw_residuals(fig, years, residuals) -> None:
+    ax = fig.add_subplot()
+    ax.plot(years, residuals)
+    ax.axhline(0, linestyle="--", color="black")
+    ax.set_title("Linear Regression: Residuals")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Residual")
 
-    plt.figure(figsize=(10, 5))
-    plt.plot(test["year"], y_test, label="Actual")
-    plt.plot(test["year"], y_pred, label="Predicted")
-    plt.title("Linear Regression: Actual vs Predicted Population")
-    plt.xlabel("Year")
-    plt.ylabel("Population")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(RESULTS_DIR / "linear_actual_vs_pred.png")
-    plt.close()
 
-    #  Residuals 
-    residuals = y_test - y_pred
+def figure_specs(fit: FittedModel) -> list[FigureSpec]:
+    """Actual vs predicted and residuals on the test period."""
+    test_years = fit.years[fit.test_mask]
+    y_test = fit.y[fit.test_mask]
+    y_pred = fit.y_pred[fit.test_mask]
 
-    plt.figure(figsize=(10, 5))
-    plt.plot(test["year"], residuals)
-    plt.axhline(0, linestyle="--", color="black")
-    plt.title("Linear Regression: Residuals")
-    plt.xlabel("Year")
-    plt.ylabel("Residual")
-    plt.tight_layout()
-    plt.savefig(RESULTS_DIR / "linear_residuals.png")
-    plt.close()
+    return [
+        FigureSpec(
+            RESULTS_DIR / "linear_actual_vs_pred.png",
+            draw_actual_vs_pred,
+            dict(years=test_years, y_true=y_test, y_pred=y_pred),
+        ),
+        FigureSpec(
+            RESULTS_DIR / "linear_residuals.png",
+            draw_residuals,
+            dict(years=test_years, residuals=y_test - y_pred),
+        ),
+    ]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+"""
+Dense (sex, age, year) cube for the BFS population-by-sex-and-age table.
+
+All values live in one contiguous NumPy array; axes are integer-coded and
+labels are only kept as lookup tables, so slicing is plain indexing (no
+string comparisons) and the returned arrays are views.
+
+The cube is cached by src.data_loader (in memory, and on disk through
+to_arrays/from_arrays) and shared by every caller, so its arrays are
+read-only: copy a slice before changing it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Sex axis codes (same order as in Pop_sex_age.px)
+TOTAL = 0
+MALE = 1
+FEMALE = 2
+SEX_LABELS = ("Geschlecht - Total", "Mann", "Frau")
+
+# Age axis: position 0 is the "all ages" total, position a + 1 is age a
+AGE_TOTAL = 0
+
+
+@dataclass(frozen=True)
+class PopulationCube:
+    """
+    values      : array of shape (3, n_ages + 1, n_years), indexed (sex, age, year)
+    sex_labels  : labels of the sex axis (total, male, female)
+    age_labels  : labels of the age axis (total, 0, 1, ..., last age is open-ended)
+    years       : int array of years, consecutive and sorted
+    """
+
+    values: np.ndarray
+    sex_labels: tuple[str, ...]
+    age_labels: tuple[str, ...]
+    years: np.ndarray
+
+    @classmethod
+    def from_px(cls, table) -> "PopulationCube":
+        """Build the cube from a src.data_loader.PxTable of Pop_sex_age.px."""
+        sex_labels, age_labels, year_labels = table.labels
+        if tuple(sex_labels) != SEX_LABELS:
+            raise ValueError(f"Expected the sex axis {SEX_LABELS}, got {tuple(sex_labels)}")
+        years = np.array([int(y) for y in year_labels])
+
+        order = np.argsort(years)
+        values = np.ascontiguousarray(table.data[:, :, order])
+        years = years[order]
+        if not np.array_equal(np.diff(years), np.ones(len(years) - 1, dtype=years.dtype)):
+            raise ValueError("PopulationCube expects consecutive yearly data")
+
+        # Counts are integers; keep them as int64 unless cells are missing
+        if not np.isnan(values).any():
+            values = values.astype(np.int64)
+
+        values.setflags(write=False)
+        years.setflags(write=False)
+        return cls(
+            values=values,
+            sex_labels=tuple(sex_labels),
+            age_labels=tuple(age_labels),
+            years=years,
+        )
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """The cube as plain arrays (for an .npz archive)."""
+        return {
+            "values": self.values,
+            "sex_labels": np.array(self.sex_labels, dtype=str),
+            "age_labels": np.array(self.age_labels, dtype=str),
+            "years": self.years,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "PopulationCube":
+        """Inverse of to_arrays."""
+        values = np.ascontiguousarray(arrays["values"])
+        years = np.asarray(arrays["years"])
+        values.setflags(write=False)
+        years.setflags(write=False)
+        return cls(
+            values=values,
+            sex_labels=tuple(str(x) for x in arrays["sex_labels"]),
+            age_labels=tuple(str(x) for x in arrays["age_labels"]),
+            years=years,
+        )
+
+    # --- axes -------------------------------------------------------------
+
+    @property
+    def n_ages(self) -> int:
+        """Number of single-year age classes (the last one is open-ended)."""
+        return self.values.shape[1] - 1
+
+    @property
+    def ages(self) -> np.ndarray:
+        """Age of each single-year class: 0, 1, ..., n_ages - 1."""
+        return np.arange(self.n_ages)
+
+    def year_index(self, year: int) -> int:
+        """Position of `year` on the year axis (O(1), years are consecutive)."""
+        j = int(year) - int(self.years[0])
+        if not 0 <= j < len(self.years):
+            raise KeyError(f"Year {year} outside {self.years[0]}-{self.years[-1]}")
+        return j
+
+    # --- slices (all views into self.values) ------------------------------
+
+    def total(self, sex: int = TOTAL) -> np.ndarray:
+        """Population of all ages per year, shape (n_years,)."""
+        return self.values[sex, AGE_TOTAL, :]
+
+    def by_age(self, year: int, sex: int = TOTAL) -> np.ndarray:
+        """Single-year age distribution for one year, shape (n_ages,)."""
+        return self.values[sex, 1:, self.year_index(year)]
+
+    def age_matrix(self, sex: int = TOTAL) -> np.ndarray:
+        """Age x year matrix for one sex, shape (n_ages, n_years)."""
+        return self.values[sex, 1:, :]
+
+    def sex_ratio(self) -> np.ndarray:
+        """Men per woman for every year, shape (n_years,)."""
+        return self.values[MALE, AGE_TOTAL, :] / self.values[FEMALE, AGE_TOTAL, :]
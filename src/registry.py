@@ -0,0 +1,197 @@
+"""
+Model registry and a common estimator protocol.
+
+Every model module defines a small Estimator subclass and registers it:
+
+    @register_model("ar")
+    class AREstimator(Estimator):
+        def fit(self, ts, test_start_year, n_lags): ...
+
+- fit(ts, test_start_year, n_lags)  -> fitted artifact (FittedModel, or the
+                                       results dict for the baseline), or None
+- predict(fitted, ts, horizon)      -> forecast of the `horizon` years after ts
+- evaluate(fitted)                  -> one row of the comparison table
+
+run_models() discovers the registered models, fits them concurrently and
+times fit and predict; results_table() turns the runs into a table checked
+against COMPARISON_SCHEMA.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import stage
+
+# Modules whose import registers a model (in table order)
+MODEL_MODULES = ("src.evaluation", "src.models_linear", "src.models_ar", "src.models_components")
+
+# Column -> dtype kind ("O" text, "f" float, "i" integer); required columns may not be missing
+COMPARISON_SCHEMA = {
+    "model": "O",
+    "train_rmse": "f",
+    "test_rmse": "f",
+    "avg_growth": "f",
+    "train_size": "i",
+    "test_size": "i",
+    "n_features": "f",
+    "n_lags": "f",
+    "fit_seconds": "f",
+    "predict_seconds": "f",
+}
+REQUIRED_COLUMNS = ("model", "test_rmse", "train_size", "test_size", "fit_seconds", "predict_seconds")
+
+_REGISTRY: dict[str, type["Estimator"]] = {}
+
+logger = logging.getLogger(__name__)
+
+
+class Estimator:
+    """Default protocol for models that return a FittedModel."""
+
+    name = "model"
+
+    def fit(self, ts: pd.DataFrame, test_start_year: int = 2000, n_lags: int = 2) -> Any:
+        raise NotImplementedError
+
+    def predict(self, fitted: Any, ts: pd.DataFrame, horizon: int = 10) -> np.ndarray:
+        from src.forecasting import forecast
+
+        pop = ts.sort_values("year")["population_total"].to_numpy(dtype=float)
+        return forecast(fitted, pop, horizon)[0]
+
+    def evaluate(self, fitted: Any) -> dict:
+        return dict(fitted.results)
+
+
+def register_model(key: str):
+    """Class decorator: make an Estimator available to run_models under `key`."""
+    def decorator(cls: type[Estimator]) -> type[Estimator]:
+        if key in _REGISTRY and _REGISTRY[key] is not cls:
+            raise ValueError(f"Model key {key!r} is already registered")
+        _REGISTRY[key] = cls
+        return cls
+    return decorator
+
+
+def discover() -> dict[str, type[Estimator]]:
+    """Import the model modules (which registers them) and return the registry."""
+    for module in MODEL_MODULES:
+        importlib.import_module(module)
+    return dict(_REGISTRY)
+
+
+def available_models() -> list[str]:
+    return list(discover())
+
+
+@dataclass
+class ModelRun:
+    """
+    key      : registry key
+    fitted   : what the estimator's fit returned
+    results  : comparison row, with fit_seconds and predict_seconds
+    forecast : predict() output for the years after the series
+    """
+
+    key: str
+    fitted: Any
+    results: dict
+    forecast: np.ndarray
+
+
+def run_model(
+    key: str,
+    ts: pd.DataFrame,
+    test_start_year: int = 2000,
+    n_lags: int = 2,
+    horizon: int = 10,
+) -> ModelRun | None:
+    """Fit, predict and evaluate one registered model (None if it could not be fit)."""
+    estimator = discover()[key]()
+
+    t0 = time.perf_counter()
+    with stage(f"fit:{key}", rows=len(ts)):
+        fitted = estimator.fit(ts, test_start_year=test_start_year, n_lags=n_lags)
+    fit_seconds = time.perf_counter() - t0
+    if fitted is None:
+        return None
+
+    t0 = time.perf_counter()
+    with stage(f"predict:{key}", rows=horizon):
+        fc = estimator.predict(fitted, ts, horizon=horizon)
+    predict_seconds = time.perf_counter() - t0
+
+    results = estimator.evaluate(fitted)
+    results.update(fit_seconds=fit_seconds, predict_seconds=predict_seconds)
+    return ModelRun(key=key, fitted=fitted, results=results, forecast=np.asarray(fc))
+
+
+def run_models(
+    ts: pd.DataFrame,
+    keys: list[str] | None = None,
+    test_start_year: int = 2000,
+    n_lags: int = 2,
+    horizon: int = 10,
+    executor: str = "thread",
+    max_workers: int | None = None,
+) -> dict[str, ModelRun]:
+    """
+    Run every registered model (or only `keys`) and return {key: ModelRun},
+    in registry order. executor: "thread", "process" or "serial".
+    """
+    keys = list(keys) if keys is not None else available_models()
+    unknown = set(keys) - set(discover())
+    if unknown:
+        raise KeyError(f"Unknown model(s) {sorted(unknown)}; available: {available_models()}")
+
+    args = (ts, test_start_year, n_lags, horizon)
+    if executor == "serial" or len(keys) == 1:
+        runs = [run_model(k, *args) for k in keys]
+    elif executor in ("thread", "process"):
+        pool_cls = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+        with pool_cls(max_workers=max_workers or len(keys)) as pool:
+            futures = [pool.submit(run_model, k, *args) for k in keys]
+            runs = [f.result() for f in futures]
+    else:
+        raise ValueError(f"executor must be 'thread', 'process' or 'serial', not {executor!r}")
+
+    out = {}
+    for key, run in zip(keys, runs):
+        if run is None:
+            logger.warning("Model %r could not be fit; left out of the comparison.", key)
+        else:
+            out[key] = run
+    return out
+
+
+def validate_table(df: pd.DataFrame) -> pd.DataFrame:
+    """Check a comparison table against COMPARISON_SCHEMA; returns it in schema order."""
+    unknown = [c for c in df.columns if c not in COMPARISON_SCHEMA]
+    if unknown:
+        raise ValueError(f"Unexpected comparison column(s): {unknown}")
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns or df[c].isna().any()]
+    if missing:
+        raise ValueError(f"Comparison column(s) missing or incomplete: {missing}")
+
+    df = df.reindex(columns=list(COMPARISON_SCHEMA))
+    for col, kind in COMPARISON_SCHEMA.items():
+        if kind == "O":
+            continue
+        values = pd.to_numeric(df[col], errors="raise")
+        if kind == "i" and not np.array_equal(values, values.round()):
+            raise ValueError(f"Column {col!r} must hold integers")
+        df[col] = values.astype("int64" if kind == "i" else "float64")
+    return df
+
+
+def results_table(runs) -> pd.DataFrame:
+    """Validated comparison table, one row per ModelRun."""
+    return validate_table(pd.DataFrame([run.results for run in runs]))
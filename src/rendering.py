@@ -0,0 +1,144 @@
+"""
+Headless figure rendering stage.
+
+Plot modules describe their figures as FigureSpec objects: a module-level
+draw function plus the (small) data it needs. This module renders them with
+matplotlib's object-oriented API on the Agg canvas (no pyplot, no global
+figure manager), in parallel worker processes, and skips figures whose
+inputs have not changed since the last run.
+
+A manifest next to the figures (results/figures/.render_manifest.json)
+stores a hash of each figure's inputs: the data, the draw function's source
+and the output settings. Callers that render at the same time (e.g. the
+pipeline's parallel figure stages) pass their own manifest_name, so no two
+processes rewrite the same file; manifests are replaced atomically.
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+MANIFEST_NAME = ".render_manifest.json"
+
+
+@dataclass
+class FigureSpec:
+    """
+    out_path : where the PNG is written
+    draw     : module-level function draw(fig, **data) that fills a Figure
+    data     : keyword arguments for draw (arrays, numbers, strings)
+    figsize  : figure size in inches
+    dpi      : output resolution
+    """
+
+    out_path: Path
+    draw: Callable
+    data: dict = field(default_factory=dict)
+    figsize: tuple[float, float] = (10, 5)
+    dpi: int = 100
+
+    def input_hash(self) -> str:
+        """Hash of everything that determines the output image."""
+        h = hashlib.sha256()
+        h.update(f"{self.draw.__module__}.{self.draw.__qualname__}".encode())
+        try:
+            h.update(inspect.getsource(self.draw).encode())
+        except (OSError, TypeError):
+            pass
+        h.update(repr((tuple(self.figsize), self.dpi)).encode())
+        for key in sorted(self.data):
+            value = self.data[key]
+            h.update(key.encode())
+            if isinstance(value, np.ndarray):
+                h.update(str(value.dtype).encode())
+                h.update(repr(value.shape).encode())
+                h.update(np.ascontiguousarray(value).tobytes())
+            else:
+                h.update(repr(value).encode())
+        return h.hexdigest()
+
+
+def _render_one(spec: FigureSpec) -> Path:
+    """Draw and save one figure (runs in a worker process)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=spec.figsize)
+    FigureCanvasAgg(fig)
+    spec.draw(fig, **spec.data)
+    fig.tight_layout()
+
+    out_path = Path(spec.out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(out_path, dpi=spec.dpi)
+    return out_path
+
+
+def _load_manifest(folder: Path, name: str = MANIFEST_NAME) -> dict:
+    path = folder / name
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(folder: Path, manifest: dict, name: str = MANIFEST_NAME) -> None:
+    folder.mkdir(parents=True, exist_ok=True)
+    tmp = folder / f"{name}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp, folder / name)
+
+
+def render_figures(
+    specs: list[FigureSpec],
+    max_workers: int | None = None,
+    force: bool = False,
+    manifest_name: str = MANIFEST_NAME,
+) -> dict[str, list[Path]]:
+    """
+    Render every figure whose inputs changed (or whose file is missing).
+    manifest_name: file (next to the figures) holding the input hashes.
+
+    Returns {"rendered": [...], "skipped": [...]} with the output paths.
+    """
+    # 1) Decide what needs rendering
+    manifests: dict[Path, dict] = {}
+    pending: list[tuple[FigureSpec, str]] = []
+    skipped: list[Path] = []
+
+    for spec in specs:
+        out_path = Path(spec.out_path)
+        folder = out_path.parent
+        manifest = manifests.setdefault(folder, _load_manifest(folder, manifest_name))
+        digest = spec.input_hash()
+        if not force and out_path.exists() and manifest.get(out_path.name) == digest:
+            skipped.append(out_path)
+        else:
+            pending.append((spec, digest))
+
+    # 2) Render, in parallel when there is more than one figure to draw
+    workers = min(len(pending), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(_render_one, [spec for spec, _ in pending]))
+    else:
+        rendered = [_render_one(spec) for spec, _ in pending]
+
+    # 3) Remember the input hashes of what was written
+    for (spec, digest), out_path in zip(pending, rendered):
+        manifests[out_path.parent][out_path.name] = digest
+    for folder, manifest in manifests.items():
+        if pending:
+            _save_manifest(folder, manifest, manifest_name)
+
+    return {"rendered": rendered, "skipped": skipped}
@@ -0,0 +1,307 @@
+"""
+Append-only run store: every run's tables, kept side by side.
+
+Instead of overwriting loose CSVs, each run appends its tables (model
+comparison metrics and timings, forecasts, lag sensitivity, ...) as one
+columnar file per table and run, partitioned by table and date:
+
+    results/runs/
+      comparison/
+        _manifest.jsonl                 one line per file (see below)
+        run_date=2026-10-17/
+          20261017T101500-3fa2c1.parquet
+      forecasts/
+        ...
+
+Files are Parquet when pyarrow is installed, otherwise compressed .npz
+archives in the src.cache layout (both can sit in the same store). Every
+row gets the run_id, the creation time and the run parameters as
+param_<name> columns, so runs can be told apart and compared.
+
+The manifest keeps, per file, the run, its row count and the min/max of
+every column. query() uses it for predicate pushdown: files whose ranges
+cannot satisfy the filters are not opened, and only the requested columns
+are read from the others.
+
+    append("comparison", df, params={"test_start_year": 2000})
+    query("comparison", columns=["run_id", "model", "test_rmse"],
+          filters=[("model", "in", ["AR(2)", "Linear regression"])])
+    compare_runs("test_rmse")      # runs x models
+
+The root is results/runs, or POPGROWTH_RUN_STORE if set.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import logging
+import operator
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.cache import load_frame_npz, save_frame_npz
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+MANIFEST = "_manifest.jsonl"
+
+OPS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+logger = logging.getLogger(__name__)
+
+_RUN_ID: str | None = None
+
+
+def store_dir() -> Path:
+    return Path(os.environ.get("POPGROWTH_RUN_STORE", PROJECT_ROOT / "results" / "runs"))
+
+
+def new_run_id() -> str:
+    """Sortable, unique run id: timestamp + random suffix."""
+    return f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def current_run_id() -> str:
+    """Run id shared by everything this process appends."""
+    global _RUN_ID
+    if _RUN_ID is None:
+        _RUN_ID = new_run_id()
+    return _RUN_ID
+
+
+def file_format() -> str:
+    return "parquet" if importlib.util.find_spec("pyarrow") is not None else "npz"
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def _column_stats(df: pd.DataFrame) -> dict:
+    """{column: [min, max]} over the non-missing values (None if there are none)."""
+    stats = {}
+    for col in df.columns:
+        values = df[col].dropna()
+        if values.empty:
+            stats[col] = None
+        elif pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+            stats[col] = [float(values.min()), float(values.max())]
+        else:
+            values = values.astype(str)
+            stats[col] = [values.min(), values.max()]
+    return stats
+
+
+def append(
+    table: str,
+    df: pd.DataFrame,
+    params: dict | None = None,
+    run_id: str | None = None,
+    root: Path | None = None,
+) -> Path:
+    """
+    Append `df` as a new file of `table` and return its path.
+    Scalar params are stored as param_<name> columns on every row.
+    """
+    root = Path(root) if root is not None else store_dir()
+    run_id = run_id or current_run_id()
+    created = datetime.now()
+
+    # 1) Rows tagged with the run
+    out = df.reset_index(drop=True).copy()
+    out.insert(0, "run_id", run_id)
+    out.insert(1, "created", created.isoformat(timespec="seconds"))
+    for name, value in (params or {}).items():
+        out[f"param_{name}"] = value
+
+    # 2) One file per table and run (written atomically; never overwritten)
+    fmt = file_format()
+    path = root / table / f"run_date={created:%Y-%m-%d}" / f"{run_id}.{fmt}"
+    if path.exists():
+        raise FileExistsError(f"Run {run_id} already wrote table {table!r}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        tmp = path.with_suffix(".tmp.parquet")
+        out.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    else:
+        save_frame_npz(out, path)
+
+    # 3) Manifest entry with the column ranges used for pruning
+    entry = {
+        "run_id": run_id,
+        "created": created.isoformat(timespec="seconds"),
+        "path": path.relative_to(root / table).as_posix(),
+        "rows": len(out),
+        "params": params or {},
+        "stats": _column_stats(out),
+    }
+    with open(root / table / MANIFEST, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(entry, default=str) + "\n")
+
+    logger.debug("Appended %d rows to run store table %r → %s", len(out), table, path)
+    return path
+
+
+def save_table(
+    table: str,
+    df: pd.DataFrame,
+    csv_path: Path | None = None,
+    params: dict | None = None,
+) -> Path:
+    """
+    Append `df` to the store and, if csv_path is given, also write it there
+    as a snapshot of the latest run (for the figures and the report).
+    """
+    path = append(table, df, params=params)
+    if csv_path is not None:
+        df.to_csv(csv_path, index=False)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def manifest(table: str, root: Path | None = None) -> list[dict]:
+    """Manifest entries of `table`, oldest first (files that are gone are skipped)."""
+    base = (Path(root) if root is not None else store_dir()) / table
+    path = base / MANIFEST
+    if not path.exists():
+        return []
+    entries = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if (base / entry["path"]).exists():
+                entries.append(entry)
+    return entries
+
+
+def runs(table: str = "comparison", root: Path | None = None) -> pd.DataFrame:
+    """One row per stored run of `table`: run_id, created, rows and the parameters."""
+    rows = [
+        {"run_id": e["run_id"], "created": e["created"], "rows": e["rows"], **e["params"]}
+        for e in manifest(table, root)
+    ]
+    return pd.DataFrame(rows)
+
+
+def _may_match(stats: dict, filters: list[tuple]) -> bool:
+    """False if a file's column ranges rule out one of the filters."""
+    for col, op, value in filters:
+        if col not in stats:
+            return False  # column absent from the file: no row can match
+        bounds = stats[col]
+        if bounds is None:
+            if op != "!=":
+                return False  # only missing values
+            continue
+        lo, hi = bounds
+        try:
+            if op == "in":
+                ok = any(lo <= v <= hi for v in value)
+            elif op == "==":
+                ok = lo <= value <= hi
+            elif op == "!=":
+                ok = not (lo == hi == value)
+            elif op in ("<", "<="):
+                ok = OPS[op](lo, value)
+            else:
+                ok = OPS[op](hi, value)
+        except TypeError:  # e.g. a number against a text column: read the file
+            ok = True
+        if not ok:
+            return False
+    return True
+
+
+def _read_file(path: Path, columns: list[str] | None) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        if columns is None:
+            return pd.read_parquet(path)
+        import pyarrow.parquet as pq
+
+        available = pq.read_schema(path).names
+        return pd.read_parquet(path, columns=[c for c in columns if c in available])
+    return load_frame_npz(path, columns)
+
+
+def query(
+    table: str,
+    columns: list[str] | None = None,
+    filters: list[tuple] | None = None,
+    root: Path | None = None,
+) -> pd.DataFrame:
+    """
+    Rows of `table` across runs.
+
+    columns : columns to return (default: all)
+    filters : (column, op, value) conditions, all of which must hold;
+              op is one of ==, !=, <, <=, >, >=, in
+    """
+    filters = list(filters or [])
+    for _, op, _ in filters:
+        if op not in OPS and op != "in":
+            raise ValueError(f"Unknown filter operator {op!r}; use one of {list(OPS) + ['in']}")
+
+    base = (Path(root) if root is not None else store_dir()) / table
+    entries = manifest(table, root)
+    keep = [e for e in entries if _may_match(e["stats"], filters)]
+    logger.debug("Run store %r: reading %d of %d files", table, len(keep), len(entries))
+
+    # Only the requested and the filtered columns are read
+    needed = None if columns is None else list(dict.fromkeys(list(columns) + [f[0] for f in filters]))
+    frames = []
+    for entry in keep:
+        df = _read_file(base / entry["path"], needed)
+        mask = np.ones(len(df), dtype=bool)
+        for col, op, value in filters:
+            if col not in df:
+                mask[:] = False
+            elif op == "in":
+                mask &= df[col].isin(list(value)).to_numpy()
+            else:
+                mask &= OPS[op](df[col], value).fillna(False).to_numpy(dtype=bool)
+        frames.append(df[mask])
+
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    out = pd.concat(frames, ignore_index=True)
+    return out if columns is None else out.reindex(columns=columns)
+
+
+def compare_runs(
+    metric: str = "test_rmse",
+    table: str = "comparison",
+    filters: list[tuple] | None = None,
+    root: Path | None = None,
+) -> pd.DataFrame:
+    """`metric` by model (columns) for every stored run (rows, oldest first)."""
+    df = query(table, columns=["run_id", "created", "model", metric], filters=filters, root=root)
+    if df.empty:
+        return df
+    return (
+        df.pivot_table(index=["created", "run_id"], columns="model", values=metric, aggfunc="first")
+        .reset_index(level="created", drop=True)
+    )
+
+
+if __name__ == "__main__":
+    listed = runs("comparison")
+    print(f"{len(listed)} stored run(s) in {store_dir()}\n")
+    if not listed.empty:
+        print(compare_runs("test_rmse").round(0).to_string())
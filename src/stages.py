@@ -0,0 +1,175 @@
+"""
+Stages of the main pipeline (load -> time series -> fits -> comparison
+table -> figures), wired into a src.pipeline.Pipeline.
+
+The plot modules (and matplotlib, via src.rendering) are only imported
+when a figure stage actually runs, so a table-only or fully cached run
+does not pay for them.
+"""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.cache import file_fingerprint
+from src.data_loader import RAW_DATA_DIR, load_population_cube, timeseries_from_cube
+from src.pipeline import Pipeline, Stage
+from src.registry import ModelRun, results_table, run_model
+
+PX_PATH = RAW_DATA_DIR / "Pop_sex_age.px"
+COMPONENT_FILES = ["Briths_monthly.px", "deaths_monthly.px"]
+
+logger = logging.getLogger(__name__)
+
+
+def load_raw(fingerprint: str):
+    """Raw stage: the population cube. `fingerprint` only feeds the cache key."""
+    return load_population_cube()
+
+
+def fit_model(
+    ts: pd.DataFrame,
+    key: str,
+    test_start_year: int,
+    n_lags: int,
+    fingerprints: tuple = (),
+) -> ModelRun:
+    """Fit one registered model. `fingerprints` of extra source files only feed the cache key."""
+    run = run_model(key, ts, test_start_year=test_start_year, n_lags=n_lags)
+    if run is None:
+        raise ValueError(f"Model {key!r} could not be fit")
+    return run
+
+
+def forecast_frame(ts: pd.DataFrame, *runs: ModelRun) -> pd.DataFrame:
+    """Long table of every run's forecast: model, year, population_total."""
+    first_year = int(ts["year"].max()) + 1
+    frames = [
+        pd.DataFrame({
+            "model": run.results["model"],
+            "year": first_year + np.arange(len(run.forecast.ravel())),
+            "population_total": run.forecast.ravel(),
+        })
+        for run in runs
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def export_table(*runs: ModelRun, out_path: str) -> pd.DataFrame:
+    """Comparison table (metrics and timings), also written to out_path as CSV."""
+    df = results_table(runs)
+    df.to_csv(out_path, index=False)
+    logger.info("Saved model comparison table → %s", out_path)
+    return df
+
+
+def baseline_figures(ts: pd.DataFrame) -> list:
+    from src.plots_baseline import figure_specs
+
+    return figure_specs(ts)
+
+
+def linear_figures(run: ModelRun) -> list:
+    from src.plots_linear import figure_specs
+
+    return figure_specs(run.fitted)
+
+
+def ar_figures(run: ModelRun, test_start_year: int, n_lags: int) -> list:
+    from src.plots_ar import figure_specs
+
+    return figure_specs(run.fitted, test_start_year=test_start_year, n_lags=n_lags)
+
+
+def fan_figures(ts: pd.DataFrame, linear: ModelRun, ar: ModelRun) -> list:
+    from src.plots_fan import figure_specs
+
+    return figure_specs(ts, linear=linear.fitted, ar=ar.fitted)
+
+
+def render_specs(specs: list, manifest_name: str) -> list[Path]:
+    """
+    Render a figure_specs() list (figures whose inputs did not change are
+    skipped, see src.rendering) and return the paths of all its figures.
+    Each figure stage keeps its own render manifest (manifest_name), since
+    the stages run side by side.
+    """
+    from src.rendering import render_figures
+
+    # The figure stages already run side by side in the pipeline's pool
+    render_figures(specs, max_workers=1, manifest_name=manifest_name)
+    return [Path(spec.out_path) for spec in specs]
+
+
+def build_pipeline(
+    tables_dir: Path,
+    test_start_year: int = 2000,
+    n_lags: int = 2,
+    figures: bool = True,
+) -> Pipeline:
+    """Pipeline of the main run; figures=False stops at the comparison table."""
+    table_path = Path(tables_dir) / "model_comparison.csv"
+
+    stages = [
+        Stage("raw", load_raw, params={"fingerprint": file_fingerprint(PX_PATH)},
+              code=("src.stages", "src.data_loader", "src.population_cube")),
+        Stage("timeseries", timeseries_from_cube, deps=["raw"]),
+    ]
+
+    # One stage per registered model (all go through src.registry.run_model)
+    models = {
+        "baseline": ("src.evaluation", "src.forecasting"),
+        "linear": ("src.models_linear", "src.features", "src.forecasting"),
+        "ar": ("src.models_ar", "src.features", "src.forecasting"),
+        "components": ("src.models_components", "src.data_loader"),
+    }
+    for key, modules in models.items():
+        fingerprints = COMPONENT_FILES if key == "components" else []
+        stages.append(Stage(
+            f"fit_{key}", fit_model, deps=["timeseries"],
+            params={
+                "key": key,
+                "test_start_year": test_start_year,
+                "n_lags": n_lags,
+                "fingerprints": tuple(file_fingerprint(RAW_DATA_DIR / f) for f in fingerprints),
+            },
+            code=("src.stages", "src.registry", "src.fitted_model") + modules,
+        ))
+
+    stages.append(
+        Stage("table", export_table, deps=[f"fit_{key}" for key in models],
+              params={"out_path": str(table_path)},
+              code=("src.stages", "src.registry"), outputs=[table_path])
+    )
+    stages.append(
+        Stage("forecasts", forecast_frame, deps=["timeseries"] + [f"fit_{key}" for key in models])
+    )
+    if not figures:
+        return Pipeline(stages)
+
+    stages += [
+        Stage("specs_baseline", baseline_figures, deps=["timeseries"],
+              code=("src.stages", "src.plots_baseline", "src.baseline_model", "src.rendering")),
+        Stage("specs_linear", linear_figures, deps=["fit_linear"],
+              code=("src.stages", "src.plots_linear", "src.rendering")),
+        Stage("specs_ar", ar_figures, deps=["fit_ar"],
+              params={"test_start_year": test_start_year, "n_lags": n_lags},
+              code=("src.stages", "src.plots_ar", "src.rendering")),
+        Stage("specs_fan", fan_figures, deps=["timeseries", "fit_linear", "fit_ar"],
+              code=("src.stages", "src.plots_fan", "src.bootstrap", "src.rendering")),
+    ]
+
+    # One render stage per figure_specs() list; the file names come from the
+    # specs themselves and are returned by the stage, so a missing PNG reruns it
+    for specs_stage in ("specs_baseline", "specs_linear", "specs_ar", "specs_fan"):
+        name = "fig_" + specs_stage.removeprefix("specs_")
+        stages.append(Stage(
+            name, render_specs, deps=[specs_stage],
+            params={"manifest_name": f".render_manifest-{name}.json"},
+            code=("src.stages", "src.rendering"), returns_outputs=True, parallel=True,
+        ))
+
+    return Pipeline(stages)
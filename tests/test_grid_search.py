@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pytest
+
+from src.data_loader import load_population_timeseries
+from src.evaluation import evaluate_baseline_constant_growth
+from src.features import build_ml_table
+from src.grid_search import run_grid
+from src.models_ar import fit_ar_model
+from src.models_linear import fit_linear_model
+
+
+@pytest.fixture(scope="module")
+def ts():
+    return load_population_timeseries()
+
+
+def test_every_model_rejects_an_empty_split(ts):
+    ml = build_ml_table(ts, n_lags=2)
+    with pytest.raises(ValueError):
+        evaluate_baseline_constant_growth(ts, test_start_year=2100)
+    with pytest.raises(ValueError):
+        fit_linear_model(ml, test_start_year=2100)
+    with pytest.raises(ValueError):
+        fit_ar_model(ml, test_start_year=2100, n_lags=2)
+
+
+def test_grid_skips_out_of_range_years(ts):
+    df = run_grid(
+        test_start_years=[2000, 2100],
+        n_lags_values=[1, 2],
+        growth_start_years=[1980],
+        max_workers=1,
+        ts=ts,
+    )
+    assert set(df["test_start_year"]) == {2000}
+    assert set(df["model"].str.split().str[0]) == {"Baseline", "Linear", "AR(1)", "AR(2)"}
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_check_out_of_core_small_limit():
+    # Own process: the check measures allocations with tracemalloc
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.check_out_of_core", "--limits", "2", "--factor", "4"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    assert proc.stdout.rstrip().endswith("OK")